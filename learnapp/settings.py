@@ -43,8 +43,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # answers /static/ requests before anything else runs (see myapp/staticfiles.py)
+    'myapp.staticfiles.StaticFilesMiddleware',
+    # outermost of the application middleware, so its timings cover the rest of the stack
+    'myapp.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'myapp.routers.ReplicaPinningMiddleware',
+    # under ASGI, routes the catalog pages to myapp/async_views.py
+    'myapp.async_views.AsyncCatalogMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -53,6 +60,8 @@ MIDDLEWARE = [
 ]
 
 ROOT_URLCONF = 'learnapp.urls'
+# URLconf for requests served by learnapp.asgi: async home/category/course views
+ASGI_URLCONF = 'learnapp.urls_asgi'
 
 TEMPLATES = [
     {
@@ -81,9 +90,134 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Keep each worker's connection (and its PRAGMAs and page cache) for a
+        # minute, checking it is still usable before reusing it
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Seconds to wait for a lock before "database is locked"
+            'timeout': 20,
+            # Take the write lock when a transaction starts: a deferred
+            # transaction that upgrades to a writer cannot wait out the lock
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# Catalog reads can be served by read replicas (see myapp/routers.py). Locally
+# a replica is an SQLite copy kept fresh with `manage.py refresh_replicas
+# --interval 30`, e.g.:
+#
+#   DATABASES['replica'] = {
+#       **DATABASES['default'],
+#       'NAME': BASE_DIR / 'db.replica.sqlite3',
+#       'TEST': {'MIRROR': 'default'},
+#   }
+#   CATALOG_REPLICAS = ['replica']
+DATABASE_ROUTERS = ['myapp.routers.CatalogReplicaRouter']
+CATALOG_REPLICAS = []
+# Seconds a browser keeps reading from the primary after it wrote something
+CATALOG_REPLICA_PIN_SECONDS = 5
+
+# Applied to every new SQLite connection (see myapp/db.py).
+# Run `manage.py sqlite_maintenance` on deploy and from cron (e.g. nightly): it
+# switches the database file to SQLITE_JOURNAL_MODE, keeps the planner
+# statistics fresh and returns free pages to the filesystem.
+SQLITE_JOURNAL_MODE = 'WAL'
+SQLITE_PRAGMAS = {
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,  # ms, matches OPTIONS['timeout']
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -20000,  # ~20 MB
+    'temp_store': 'MEMORY',
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Catalog fragments are versioned (see myapp/cache.py). With several worker
+# processes point this at a shared backend (Redis/Memcached) so that a version
+# bump in one worker is seen by all of them.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'learnapp-default',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    # Sessions and request.user (see myapp/auth.py), apart so catalog fragments
+    # never evict them. Must be shared by every worker process: a logout in one
+    # worker has to reach the others (`manage.py check --deploy` fails
+    # otherwise).
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'learnapp-sessions',
+        'OPTIONS': {
+            'MAX_ENTRIES': 50000,
+        },
+    },
+}
+
+# Sessions are read from the cache and written through to the database
+# (see myapp/sessions.py); clearsessions purges expired rows in batches.
+SESSION_ENGINE = 'myapp.sessions'
+SESSION_CACHE_ALIAS = 'sessions'
+SESSION_PURGE_BATCH_SIZE = 1000
+
+# request.user is loaded from the cache (see myapp/auth.py). ModelBackend stays
+# listed so sessions that were logged in through it keep working.
+AUTHENTICATION_BACKENDS = [
+    'myapp.auth.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+USER_CACHE_ALIAS = 'sessions'
+USER_CACHE_TIMEOUT = 60 * 15
+
+# Login throttling (see myapp/throttle.py): token buckets per client IP and
+# per username, as (burst, attempts refilled per minute), and at most
+# LOGIN_HASH_SLOTS password hashes at once per process.
+LOGIN_THROTTLE_RATES = {
+    'ip': (20, 10),
+    'username': (5, 2),
+}
+LOGIN_HASH_SLOTS = 2
+LOGIN_HASH_WAIT = 5
+
+# Seconds a rendered catalog fragment (home strips, course cards) stays cached
+CATALOG_CACHE_TIMEOUT = 60 * 15
+
+
+# Quiz attempts are written behind the request in batches (see myapp/attempts.py).
+# A flush interval of 0 writes each attempt synchronously.
+QUIZ_ATTEMPT_BUFFER_SIZE = 1000
+QUIZ_ATTEMPT_BATCH_SIZE = 200
+QUIZ_ATTEMPT_FLUSH_INTERVAL = 2.0
+# The queue is drained on these signals before the previous handler runs
+QUIZ_ATTEMPT_FLUSH_SIGNALS = ('SIGTERM',)
+
+
+# Request metrics, served at /manage/metrics/ (see myapp/metrics.py).
+# Set METRICS_SHARED_PATH to a file path to sum the metrics of all worker
+# processes there; each process adds its deltas every METRICS_FLUSH_INTERVAL s.
+METRICS_SHARED_PATH = None
+METRICS_FLUSH_INTERVAL = 10
+# Wraps django.template.base.Template.render once at startup to time rendering
+METRICS_TIME_TEMPLATES = True
+
+# Course image renditions (see myapp/images.py) are built on a background
+# thread after the save commits; False builds them inside the saving request.
+IMAGE_RENDITIONS_ASYNC = True
+
+# Mixed into the ETags of catalog and course pages (see myapp/conditional.py).
+# Change it, e.g. to the release tag, when a deploy changes templates.
+PAGE_ETAG_SALT = ''
+
+# Threads (and so at most this many DB connections per process) that run the
+# blocking ORM work of the async views (see myapp/db.py).
+ASYNC_DB_THREADS = 8
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -121,6 +255,14 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS=[ os.path.join(BASE_DIR, 'static')]
+# `manage.py collectstatic` writes hashed names plus .gz/.br siblings here;
+# myapp.staticfiles.StaticFilesMiddleware serves them
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'myapp.staticfiles.CompressedManifestStaticFilesStorage'},
+}
 
 
 # Default primary key field type
@@ -0,0 +1,19 @@
+"""
+URL configuration used under learnapp.asgi (see ASGI_URLCONF and
+myapp.async_views.AsyncCatalogMiddleware).
+
+The async catalog views come first and shadow their sync counterparts; every
+other route, and every URL name, is the same as in learnapp.urls.
+"""
+from django.urls import path
+
+from myapp import async_views
+
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('', async_views.home, name='home'),
+    path('category/<slug:slug>/', async_views.category_courses, name='category_courses'),
+    path('course/<slug:slug>/', async_views.course_detail, name='course_detail'),
+    *sync_urlpatterns,
+]
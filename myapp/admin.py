@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Course, Course_detail,  Module, Quiz, Question, Option, CustomUser, Category, SuggestedCourse
+from .models import Course, Course_detail,  Module, Quiz, Question, Option, CustomUser, Category, SuggestedCourse, QuizAttempt, QuizAnswer
 from django.contrib.auth.admin import UserAdmin
 
 
@@ -35,11 +35,11 @@ class SuggestedCourseAdmin(admin.ModelAdmin):
                 # editing existing suggestion: allow current course + others not suggested
                 suggestion_obj = self.get_object(request, request.resolver_match.kwargs["object_id"])
                 current_course_qs = Course.all_objects.filter(pk=suggestion_obj.course_id)
-                others_qs = Course.all_objects.filter(suggestedcourse__isnull=True)
+                others_qs = Course.all_objects.filter(is_suggested=False)
                 kwargs["queryset"] = current_course_qs.union(others_qs)
             else:
                 # creating: only courses that are not suggested
-                kwargs["queryset"] = Course.all_objects.filter(suggestedcourse__isnull=True)
+                kwargs["queryset"] = Course.all_objects.filter(is_suggested=False)
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
 
@@ -52,4 +52,18 @@ admin.site.register(Quiz)
 admin.site.register(Question)
 admin.site.register(Option)
 admin.site.register(CustomUser, CustomUserAdmin)
-admin.site.register(Category)
\ No newline at end of file
+admin.site.register(Category)
+
+
+class QuizAnswerInline(admin.TabularInline):
+    model = QuizAnswer
+    extra = 0
+    raw_id_fields = ("question", "selected_option")
+
+
+@admin.register(QuizAttempt)
+class QuizAttemptAdmin(admin.ModelAdmin):
+    list_display = ("quiz", "user", "score", "submitted_at")
+    list_select_related = ("quiz", "user")
+    raw_id_fields = ("user", "quiz")
+    inlines = [QuizAnswerInline]
\ No newline at end of file
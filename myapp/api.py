@@ -0,0 +1,268 @@
+# myapp/api.py
+"""
+Read-only JSON catalog API under ``/api/``.
+
+Every endpoint reads rows with ``values()``, so no model instances are built,
+and answers with a fixed number of queries whatever the page size (the
+budgets are checked by ``manage.py benchmark_views``):
+
+========================================  =======
+``/api/courses/``                         1 query
+``/api/courses/<slug>/``                  2 (1 without ``categories``)
+``/api/courses/<slug>/outline/``          2
+``/api/categories/``                      1
+``/api/suggested/``                       1
+========================================  =======
+
+Lists return ``{"results": [...], "next": <url or null>}``. Courses are
+paginated with the same ``(created_at, id)`` keyset cursors as the HTML
+catalog, categories by id; ``?limit=`` sets the page size. ``?fields=a,b``
+restricts each object to the listed fields. Responses are encoded with
+``orjson`` when it is installed.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from functools import wraps
+
+from django.core.files.storage import default_storage
+from django.db.models import Exists, OuterRef
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+
+from .models import Category, Course, Course_detail, Module, SuggestedCourse
+from .pagination import CURSOR_NEXT, KEYSET_ORDERING, decode_cursor, encode_position, seek_filter
+
+try:
+    import orjson
+except ImportError:  # optional: the standard library encoder is used without it
+    orjson = None
+
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+
+# Public field name -> ORM path
+COURSE_FIELDS = {
+    "id": "id",
+    "slug": "slug",
+    "title": "title",
+    "description": "description",
+    "price": "price",
+    "duration": "duration",
+    "image": "image",
+    "start_date": "start_date",
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+    "is_suggested": "is_suggested",
+}
+DETAIL_FIELDS = {
+    **COURSE_FIELDS,
+    "instructor": "details__instructor",
+    "instructor_bio": "details__instructor_bio",
+    "short_description": "details__short_description",
+    "overview": "details__overview_list",
+    "outcomes": "details__outcomes_list",
+    "skills": "details__skills_list",
+    "tools": "details__tools_list",
+    "requirements": "details__requirements_list",
+    "language": "details__language",
+    "certificate": "details__certificate",
+    "languages_available": "details__languages_available",
+    "last_updated": "details__last_updated",
+    "exercises_count": "details__exercises_count",
+    # Loaded by a second query; see course_detail_api
+    "categories": None,
+}
+CATEGORY_FIELDS = {"id": "id", "name": "name", "slug": "slug"}
+SUGGESTED_FIELDS = {
+    "order": "order",
+    **{name: f"course__{path}" for name, path in COURSE_FIELDS.items()},
+}
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        # A string keeps prices exact
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def json_response(data, status=200):
+    if orjson is not None:
+        body = orjson.dumps(data, default=_default)
+    else:
+        body = json.dumps(data, default=_default, separators=(",", ":"), ensure_ascii=False).encode()
+    return HttpResponse(body, status=status, content_type="application/json")
+
+
+def api_view(view):
+    """GET-only JSON endpoint: view returns plain data or raises ApiError."""
+    @require_GET
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            data = view(request, *args, **kwargs)
+        except ApiError as exc:
+            return json_response({"error": str(exc)}, status=exc.status)
+        return json_response(data)
+    return wrapper
+
+
+# -------- Request parsing --------
+def _fields(request, available):
+    """Public field names requested with ?fields= (all of them by default)."""
+    raw = request.GET.get("fields")
+    if not raw:
+        return list(available)
+    names = list(dict.fromkeys(name.strip() for name in raw.split(",") if name.strip()))
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ApiError(f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(available)}.")
+    return names
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get("limit", API_PAGE_SIZE))
+    except ValueError:
+        raise ApiError("limit must be an integer.")
+    return min(max(limit, 1), API_MAX_PAGE_SIZE)
+
+
+def _cursor(request):
+    token = request.GET.get("cursor")
+    if not token:
+        return None
+    position = decode_cursor(token)
+    if position is None or position[2] != CURSOR_NEXT:
+        raise ApiError("Invalid cursor.")
+    return position
+
+
+def _next_url(request, created_at, pk):
+    query = request.GET.copy()
+    query["cursor"] = encode_position(created_at, pk, CURSOR_NEXT)
+    return f"{request.path}?{query.urlencode()}"
+
+
+# -------- Serialization --------
+def _project(rows, fields, paths):
+    """Rename ORM paths to public names, keeping only fields; image paths become URLs."""
+    objects = []
+    for row in rows:
+        obj = {name: row[paths[name]] for name in fields}
+        if obj.get("image"):
+            obj["image"] = default_storage.url(obj["image"])
+        objects.append(obj)
+    return objects
+
+
+def _columns(fields, paths, *extra):
+    return list(dict.fromkeys([*(paths[name] for name in fields if paths[name]), *extra]))
+
+
+# -------- Querysets --------
+def course_list_queryset(category_slug=None, position=None):
+    """Courses in catalog order, optionally of one category and after a cursor position."""
+    queryset = Course.all_objects.order_by(*KEYSET_ORDERING)
+    if category_slug:
+        # EXISTS keeps the walk along the (created_at, id) index; a join would sort
+        queryset = queryset.filter(Exists(Course_detail.categories.through.objects.filter(
+            course_detail__course=OuterRef("pk"), category__slug=category_slug,
+        )))
+    if position is not None:
+        queryset = queryset.filter(seek_filter(position[0], position[1], forward=True))
+    return queryset
+
+
+# -------- Endpoints --------
+@api_view
+def courses_api(request):
+    """Courses in catalog order; ?category=<slug> keeps those of one category."""
+    fields = _fields(request, COURSE_FIELDS)
+    limit = _limit(request)
+    queryset = course_list_queryset(request.GET.get("category"), _cursor(request))
+    rows = list(queryset.values(*_columns(fields, COURSE_FIELDS, *KEYSET_ORDERING))[:limit + 1])
+    next_url = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_url = _next_url(request, rows[-1]["created_at"], rows[-1]["id"])
+    return {"results": _project(rows, fields, COURSE_FIELDS), "next": next_url}
+
+
+@api_view
+def course_detail_api(request, slug):
+    fields = _fields(request, DETAIL_FIELDS)
+    row = Course.all_objects.filter(slug=slug).values(*_columns(fields, DETAIL_FIELDS, "id")).first()
+    if row is None:
+        raise ApiError("Course not found.", status=404)
+    course = _project([row], [name for name in fields if name != "categories"], DETAIL_FIELDS)[0]
+    if "categories" in fields:
+        links = (
+            Course_detail.categories.through.objects
+            .filter(course_detail__course_id=row["id"])
+            .order_by("category_id")
+            .values_list("category_id", "category__name", "category__slug")
+        )
+        course["categories"] = [
+            {"id": category_id, "name": name, "slug": category_slug}
+            for category_id, name, category_slug in links
+        ]
+    return course
+
+
+@api_view
+def course_outline_api(request, slug):
+    """Modules of a course with their quizzes (no questions: those are behind the quiz page)."""
+    course = Course.all_objects.filter(slug=slug).values("id", "slug", "title").first()
+    if course is None:
+        raise ApiError("Course not found.", status=404)
+    # Modules LEFT JOIN quizzes: one row per quiz, or per module without quizzes
+    rows = (
+        Module.objects.filter(course_id=course["id"])
+        .order_by("id", "quizzes__id")
+        .values_list("id", "title", "description", "quizzes__id", "quizzes__title")
+    )
+    modules = {}
+    for module_id, title, description, quiz_id, quiz_title in rows:
+        module = modules.get(module_id)
+        if module is None:
+            module = modules[module_id] = {
+                "id": module_id, "title": title, "description": description, "quizzes": [],
+            }
+        if quiz_id is not None:
+            module["quizzes"].append({"id": quiz_id, "title": quiz_title})
+    return {"course": course, "modules": list(modules.values())}
+
+
+@api_view
+def categories_api(request):
+    fields = _fields(request, CATEGORY_FIELDS)
+    limit = _limit(request)
+    queryset = Category.objects.order_by("id")
+    position = _cursor(request)
+    if position is not None:
+        queryset = queryset.filter(id__gt=position[1])
+
+    rows = list(queryset.values(*_columns(fields, CATEGORY_FIELDS, "id"))[:limit + 1])
+    next_url = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_url = _next_url(request, None, rows[-1]["id"])
+    return {"results": _project(rows, fields, CATEGORY_FIELDS), "next": next_url}
+
+
+@api_view
+def suggested_api(request):
+    """The home page's suggested strip, in display order. It is curated and short, so not paginated."""
+    fields = _fields(request, SUGGESTED_FIELDS)
+    rows = SuggestedCourse.objects.values(*_columns(fields, SUGGESTED_FIELDS))
+    return {"results": _project(rows, fields, SUGGESTED_FIELDS), "next": None}
@@ -3,4 +3,42 @@ from django.apps import AppConfig
 
 class MyappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'myapp'
\ No newline at end of file
+    name = 'myapp'
+
+    def ready(self):
+        # Connect cache-invalidation signal handlers
+        from . import signals  # noqa: F401
+
+        # Shared-cache requirements for cached sessions and users (see myapp/checks.py)
+        from . import checks  # noqa: F401
+
+        # WAL, busy timeout etc. on every new SQLite connection (see myapp/db.py)
+        from django.db.backends.signals import connection_created
+
+        from .db import configure_sqlite_connection
+        connection_created.connect(configure_sqlite_connection, dispatch_uid="sqlite_pragmas")
+
+        # A request that wrote reads its own writes from the primary (see myapp/routers.py)
+        from django.db.models.signals import post_delete, post_save
+
+        from .routers import pin_after_write
+        post_save.connect(pin_after_write, dispatch_uid="replica_pin_save")
+        post_delete.connect(pin_after_write, dispatch_uid="replica_pin_delete")
+
+        # Per-request SQL counts and timings for /manage/metrics/ (see myapp/metrics.py)
+        from django.conf import settings
+
+        from .metrics import install_query_timer, install_template_timer
+        connection_created.connect(install_query_timer, dispatch_uid="metrics_query_timer")
+        if (
+            "myapp.metrics.MetricsMiddleware" in settings.MIDDLEWARE
+            and getattr(settings, "METRICS_TIME_TEMPLATES", True)
+        ):
+            install_template_timer()
+
+        # Queued quiz attempts are written before the worker stops (see myapp/attempts.py)
+        import threading
+
+        from .attempts import install_shutdown_flush
+        if threading.current_thread() is threading.main_thread():
+            install_shutdown_flush()
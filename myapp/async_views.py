@@ -0,0 +1,150 @@
+# myapp/async_views.py
+"""
+Async variants of the catalog views, served when the app runs under
+``learnapp.asgi``.
+
+``AsyncCatalogMiddleware`` points ASGI requests at ``ASGI_URLCONF``
+(``learnapp/urls_asgi.py``), which routes ``home``, ``category_courses`` and
+``course_detail`` here and everything else to the usual sync views. Under
+WSGI nothing changes.
+
+Blocking work (ORM, cache, template rendering) runs on the bounded DB pool
+through ``myapp.db.run_db``; independent pieces are awaited together with
+``asyncio.gather`` so they run on separate pool threads at the same time.
+The event loop itself never waits on the database.
+"""
+import asyncio
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404
+from django.shortcuts import get_object_or_404, redirect, render
+
+from .cache import get_catalog_version
+from .conditional import (
+    async_conditional_page,
+    catalog_etag,
+    course_detail_etag,
+    detail_page_course,
+    home_etag,
+)
+from .course_state import get_course_state
+from .db import run_db
+from .models import Category
+from .pagination import KeysetPaginator
+from .views import (
+    category_course_queryset,
+    home_category_bar_html,
+    home_course_page,
+    home_suggested_html,
+)
+
+
+class AsyncCatalogMiddleware:
+    """Route ASGI requests through ASGI_URLCONF, where the async catalog views live."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.urlconf = getattr(settings, "ASGI_URLCONF", None)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if self.urlconf and isinstance(request, ASGIRequest):
+            request.urlconf = self.urlconf
+        return await self.get_response(request)
+
+
+def _is_authenticated(request):
+    # Loads the session and the user on a pool thread
+    return request.user.is_authenticated
+
+
+# -------- Home --------
+@async_conditional_page(home_etag)
+async def home(request):
+    if not await run_db(_is_authenticated, request):
+        return redirect("login")
+
+    version = await run_db(get_catalog_version)
+    # Independent cache lookups (and queries on a miss): all three at once
+    suggested_html, category_bar_html, (page_obj, course_cards) = await asyncio.gather(
+        run_db(home_suggested_html, version),
+        run_db(home_category_bar_html, version),
+        run_db(home_course_page, version, request.GET.get("page"), request.GET.get("cursor")),
+    )
+    return await run_db(
+        render,
+        request,
+        "home.html",
+        {
+            "course_cards": course_cards,
+            "page_obj": page_obj,
+            "category_bar_html": category_bar_html,
+            "suggested_html": suggested_html,
+        },
+    )
+
+
+# -------- Category --------
+def _category_page(slug, page_number, cursor):
+    category = get_object_or_404(Category, slug=slug)
+    paginator = KeysetPaginator(category_course_queryset(category), 9)
+    return category, paginator.get_page(page_number, cursor)
+
+
+@async_conditional_page(catalog_etag)
+async def category_courses(request, slug):
+    # Each step needs the one before it: this view gains a free event loop, not parallel queries
+    category, page_obj = await run_db(
+        _category_page, slug, request.GET.get("page"), request.GET.get("cursor")
+    )
+    return await run_db(
+        render,
+        request,
+        "category_courses.html",
+        {
+            "category": category,
+            "courses": page_obj.object_list,
+            "page_obj": page_obj,
+        },
+    )
+
+
+# -------- Course Detail --------
+async def _course_detail_etag(request, slug):
+    # The course row and the session/user do not depend on each other
+    await asyncio.gather(
+        run_db(detail_page_course, request, slug),
+        run_db(_is_authenticated, request),
+    )
+    # Both are now loaded; this only reads the cache versions
+    return await run_db(course_detail_etag, request, slug)
+
+
+@async_conditional_page(_course_detail_etag)
+async def course_detail(request, slug):
+    course = await run_db(detail_page_course, request, slug)
+    if course is None:
+        raise Http404("No Course matches the given query.")
+    state = await run_db(get_course_state, request.user, course.id)
+    return await run_db(
+        render,
+        request,
+        "course_detail.html",
+        {
+            "course": course,
+            "enrolled": state.enrolled,
+            "wishlisted": state.wishlisted,
+        },
+    )
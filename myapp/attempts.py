@@ -0,0 +1,218 @@
+# myapp/attempts.py
+"""
+Write-behind persistence for quiz attempts.
+
+Submissions are queued in memory and written with ``bulk_create`` in one
+transaction per batch, either when ``QUIZ_ATTEMPT_BATCH_SIZE`` attempts are
+waiting or every ``QUIZ_ATTEMPT_FLUSH_INTERVAL`` seconds. The queue is bounded
+by ``QUIZ_ATTEMPT_BUFFER_SIZE``: a request that fills it flushes synchronously
+instead of dropping anything. A failed write is logged and its batch queued
+again for the next flush, never turned into an error response after the
+submission was graded. Set ``QUIZ_ATTEMPT_FLUSH_INTERVAL = 0`` to write every
+attempt through immediately (handy in tests and management commands).
+
+The queue is drained when the process stops: at interpreter exit, and on the
+signals in ``QUIZ_ATTEMPT_FLUSH_SIGNALS`` (SIGTERM by default, which is how
+gunicorn and process managers stop workers) before the previous handler runs.
+"""
+import atexit
+import logging
+import signal
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from .models import QuizAnswer, QuizAttempt
+
+logger = logging.getLogger(__name__)
+
+
+class AttemptBuffer:
+    def __init__(self, max_size=None, batch_size=None, flush_interval=None):
+        self.max_size = max_size or getattr(settings, "QUIZ_ATTEMPT_BUFFER_SIZE", 1000)
+        self.batch_size = batch_size or getattr(settings, "QUIZ_ATTEMPT_BATCH_SIZE", 200)
+        if flush_interval is None:
+            flush_interval = getattr(settings, "QUIZ_ATTEMPT_FLUSH_INTERVAL", 2.0)
+        self.flush_interval = flush_interval
+
+        self._pending = deque()
+        self._lock = threading.Lock()
+        # Only one flush at a time, so batches are written in submission order
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._worker = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, record):
+        """Queue one attempt record, flushing inline if the buffer is full."""
+        with self._lock:
+            self._pending.append(record)
+            size = len(self._pending)
+            if self.flush_interval:
+                self._ensure_worker()
+        if not self.flush_interval or size >= self.max_size:
+            # Back-pressure: never drop an attempt, pay for the write here instead
+            try:
+                self.flush()
+            except Exception:
+                # The submission is already graded; the batch stays queued for a retry
+                logger.exception("Failed to flush %d quiz attempts", len(self._pending))
+        elif size >= self.batch_size:
+            self._wake.set()
+
+    def flush(self, blocking=True):
+        """
+        Write every queued attempt. Returns the number of attempts written.
+
+        With blocking=False, returns 0 at once when another thread is already
+        flushing; that flush, or the flusher thread's next one, writes the rest.
+        """
+        if not self._flush_lock.acquire(blocking=blocking):
+            return 0
+        try:
+            return self._flush()
+        finally:
+            self._flush_lock.release()
+
+    def _flush(self):
+        written = 0
+        while True:
+            with self._lock:
+                batch = [
+                    self._pending.popleft()
+                    for _ in range(min(self.batch_size, len(self._pending)))
+                ]
+            if not batch:
+                return written
+            try:
+                self._write(batch)
+            except IntegrityError:
+                # e.g. the quiz was deleted meanwhile: keep the rows that still fit
+                self._write_one_by_one(batch)
+            except Exception:
+                # Put the batch back in front so a later flush retries it
+                with self._lock:
+                    self._pending.extendleft(reversed(batch))
+                raise
+            written += len(batch)
+
+    @staticmethod
+    def _write(batch):
+        with transaction.atomic():
+            attempts = QuizAttempt.objects.bulk_create(
+                QuizAttempt(
+                    user_id=record["user_id"],
+                    quiz_id=record["quiz_id"],
+                    correct=record["correct"],
+                    total=record["total"],
+                    score=record["score"],
+                    submitted_at=record["submitted_at"],
+                )
+                for record in batch
+            )
+            QuizAnswer.objects.bulk_create(
+                (
+                    QuizAnswer(
+                        attempt_id=attempt.id,
+                        question_id=question_id,
+                        selected_option_id=option_id,
+                        is_correct=is_correct,
+                    )
+                    for attempt, record in zip(attempts, batch)
+                    for question_id, option_id, is_correct in record["answers"]
+                ),
+                batch_size=500,
+            )
+
+    def _write_one_by_one(self, batch):
+        for record in batch:
+            try:
+                self._write([record])
+            except IntegrityError:
+                logger.warning(
+                    "Dropping quiz attempt for quiz %s: it no longer matches the database",
+                    record["quiz_id"],
+                )
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._worker = threading.Thread(
+            target=self._run, name="quiz-attempt-flusher", daemon=True
+        )
+        self._worker.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush %d quiz attempts", len(self._pending))
+            finally:
+                # This thread's connection is not covered by request_finished
+                connection.close()
+
+
+attempt_buffer = AttemptBuffer()
+atexit.register(attempt_buffer.flush)
+
+
+def _flushing_handler(previous):
+    def handler(signum, frame):
+        try:
+            # Not blocking: the signal may interrupt a flush holding the lock in
+            # this very thread; atexit drains whatever that one leaves
+            attempt_buffer.flush(blocking=False)
+        except Exception:
+            logger.exception("Failed to flush %d quiz attempts", len(attempt_buffer))
+        if callable(previous):
+            previous(signum, frame)
+        elif previous == signal.SIG_DFL:
+            # The default action would end the process without running atexit
+            raise SystemExit(128 + signum)
+
+    handler.flushes_quiz_attempts = True
+    return handler
+
+
+def install_shutdown_flush():
+    """
+    Drain the queue on QUIZ_ATTEMPT_FLUSH_SIGNALS, then hand over to the handler
+    installed before (e.g. gunicorn's graceful exit). Must run in the main thread.
+    """
+    for name in getattr(settings, "QUIZ_ATTEMPT_FLUSH_SIGNALS", ("SIGTERM",)):
+        signum = getattr(signal, name)
+        previous = signal.getsignal(signum)
+        if not getattr(previous, "flushes_quiz_attempts", False):
+            signal.signal(signum, _flushing_handler(previous))
+
+
+def record_attempt(user, quiz, result):
+    """
+    Queue a graded submission for persistence.
+
+    ``quiz`` is a ``myapp.quiz.QuizSnapshot`` and ``result`` the dict returned
+    by ``myapp.quiz.grade_submission``.
+    """
+    user_answers = result["user_answers"]
+    answers = []
+    for question_id, (option_ids, correct_ids) in quiz.answer_key.items():
+        option_id = user_answers.get(question_id)
+        answers.append((question_id, option_id, option_id in correct_ids))
+
+    attempt_buffer.add({
+        "user_id": user.pk if user.is_authenticated else None,
+        "quiz_id": quiz.id,
+        "correct": result["correct"],
+        "total": result["total"],
+        "score": result["score"],
+        "submitted_at": timezone.now(),
+        "answers": answers,
+    })
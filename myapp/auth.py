@@ -0,0 +1,76 @@
+# myapp/auth.py
+"""
+Cached user loading for ``AuthenticationMiddleware``.
+
+``AuthenticationMiddleware`` resolves ``request.user`` through the backend
+that logged the user in. ``CachedModelBackend`` is Django's ``ModelBackend``
+with ``get_user`` answered from the cache, so a logged-in request no longer
+queries ``myapp_customuser``. Authentication and permissions are unchanged.
+
+The cached user is dropped whenever the user is saved or deleted (see
+``myapp.signals``), which covers password changes: the next request loads
+the new password hash, and sessions authenticated with the old one are
+logged out by Django's session hash check as before. ``QuerySet.update()``
+does not send signals; call ``invalidate_cached_user`` after one.
+
+Users are cached in ``USER_CACHE_ALIAS``, which must be shared by all
+workers so an invalidation reaches every one of them (``myapp/checks.py``).
+
+``django.contrib.auth.backends.ModelBackend`` stays listed after this backend
+so sessions that name it keep working; to keep a failed login from being
+hashed a second time by it, ``authenticate`` ends the chain on bad
+credentials.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.core.exceptions import PermissionDenied
+
+
+def _key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def _cache():
+    return caches[getattr(settings, "USER_CACHE_ALIAS", "default")]
+
+
+def _timeout():
+    return getattr(settings, "USER_CACHE_TIMEOUT", 60 * 15)
+
+
+def invalidate_cached_user(user_id):
+    _cache().delete(_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        user = super().authenticate(request, username=username, password=password, **kwargs)
+        if user is None and password is not None:
+            # ModelBackend, next in the list, would check the same password again
+            raise PermissionDenied
+        return user
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        user = await super().aauthenticate(request, username=username, password=password, **kwargs)
+        if user is None and password is not None:
+            raise PermissionDenied
+        return user
+
+    def get_user(self, user_id):
+        cache = _cache()
+        user = cache.get(_key(user_id))
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(_key(user_id), user, _timeout())
+        return user
+
+    async def aget_user(self, user_id):
+        cache = _cache()
+        user = await cache.aget(_key(user_id))
+        if user is None:
+            user = await super().aget_user(user_id)
+            if user is not None:
+                await cache.aset(_key(user_id), user, _timeout())
+        return user
@@ -0,0 +1,99 @@
+# myapp/cache.py
+"""
+Versioned cache helpers for catalog pages.
+
+Every catalog fragment key carries the current catalog version. The signal
+handlers in ``myapp.signals`` bump the version whenever a Course, Course_detail,
+SuggestedCourse or Category changes, so stale fragments are never read again
+and simply expire from the cache.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .pagination import CatalogPage
+
+CATALOG_VERSION_KEY = "catalog:version"
+
+
+def _timeout():
+    return getattr(settings, "CATALOG_CACHE_TIMEOUT", 60 * 15)
+
+
+def get_version(key):
+    """Return the version stored under key, creating it on first use."""
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted version never collides with an old one
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    """Move key to a new version, orphaning every entry built on the old one."""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = time.time_ns()
+        cache.set(key, version, timeout=None)
+        return version
+
+
+def get_catalog_version():
+    """Return the current catalog version, creating it on first use."""
+    return get_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    """Invalidate every catalog fragment by moving to a new version."""
+    return bump_version(CATALOG_VERSION_KEY)
+
+
+def catalog_key(*parts, version=None):
+    if version is None:
+        version = get_catalog_version()
+    return "catalog:%s:%s" % (version, ":".join(str(p) for p in parts))
+
+
+def get_or_set_fragment(key, render):
+    """Return the cached fragment for key, rendering and storing it on a miss."""
+    html = cache.get(key)
+    if html is None:
+        html = render()
+        cache.set(key, html, _timeout())
+    return html
+
+
+def get_or_set_many_fragments(keys_by_id, render_missing):
+    """
+    Fetch fragments for several ids at once.
+
+    ``keys_by_id`` maps an object id to its cache key. ``render_missing`` receives
+    the ids that were not cached and must return a dict of id -> html.
+    Returns the fragments in the order of ``keys_by_id``.
+    """
+    cached = cache.get_many(list(keys_by_id.values()))
+    missing = [pk for pk, key in keys_by_id.items() if key not in cached]
+    if missing:
+        rendered = render_missing(missing)
+        cache.set_many({keys_by_id[pk]: html for pk, html in rendered.items()}, _timeout())
+        cached.update({keys_by_id[pk]: html for pk, html in rendered.items()})
+    return [cached[key] for key in keys_by_id.values() if key in cached]
+
+
+def cached_page(key, build_page):
+    """
+    Return a catalog page, caching its object ids and navigation state.
+
+    ``build_page`` is called on a miss and must return a
+    ``myapp.pagination.CatalogPage``. On a warm hit no query is issued and the
+    returned page holds the cached ids instead of model instances.
+    """
+    state = cache.get(key)
+    if state is None:
+        page_obj = build_page()
+        state = page_obj.get_state()
+        cache.set(key, state, _timeout())
+    return CatalogPage.from_state(state)
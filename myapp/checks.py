@@ -0,0 +1,46 @@
+# myapp/checks.py
+"""
+System checks for settings the app relies on in production.
+
+Cached sessions and the cached ``request.user`` are only correct when every
+worker process reads the same cache: a logout, password change or
+deactivation clears the entry in the cache it runs against, and a
+process-local cache (locmem) would keep serving the old copy in every other
+worker. Outside DEBUG those aliases must therefore be shared (Redis,
+Memcached, the database cache); ``manage.py check --deploy`` fails when they
+are not. A deployment that really runs a single process can silence
+``myapp.E001``.
+"""
+from django.conf import settings
+from django.core import checks
+
+PROCESS_LOCAL_CACHES = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+def _is_process_local(alias):
+    return settings.CACHES.get(alias, {}).get("BACKEND") in PROCESS_LOCAL_CACHES
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_auth_caches(app_configs, **kwargs):
+    if settings.DEBUG:
+        return []
+    uses = []
+    if settings.SESSION_ENGINE == "myapp.sessions":
+        uses.append(("SESSION_CACHE_ALIAS", settings.SESSION_CACHE_ALIAS, "sessions"))
+    if "myapp.auth.CachedModelBackend" in settings.AUTHENTICATION_BACKENDS:
+        uses.append(("USER_CACHE_ALIAS", getattr(settings, "USER_CACHE_ALIAS", "default"), "request.user"))
+    return [
+        checks.Error(
+            f"{setting} = {alias!r} caches {what} in a process-local cache.",
+            hint="Point it at a cache shared by all workers (Redis, Memcached or "
+                 "DatabaseCache); otherwise a logout or password change in one "
+                 "worker is not seen by the others.",
+            id="myapp.E001",
+        )
+        for setting, alias, what in uses
+        if _is_process_local(alias)
+    ]
@@ -0,0 +1,141 @@
+# myapp/conditional.py
+"""
+Conditional GET for catalog pages.
+
+``conditional_page(etag_func)`` wraps a view in Django's ``condition``
+decorator: ``etag_func`` builds a validator from cheap inputs (cache versions,
+``updated_at`` columns) and a matching ``If-None-Match`` is answered with 304
+before the view queries or renders anything.
+
+Every validator also covers what the shared layout shows for the viewer (user
+id and staff flag), the CSRF secret embedded in the page's forms and the
+deployed static assets. Pages with pending flash messages are never answered
+with 304, so the messages are shown.
+"""
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import quote_etag
+from django.views.decorators.http import condition
+
+from .cache import get_catalog_version
+from .course_state import course_state_version
+from .db import run_db
+from .models import Course
+
+
+def _viewer_parts(request):
+    user = request.user
+    return (
+        user.pk if user.is_authenticated else "anon",
+        int(user.is_staff),
+        # Forms carry a token derived from it; it changes on login
+        request.META.get("CSRF_COOKIE", ""),
+        getattr(staticfiles_storage, "manifest_hash", ""),
+        getattr(settings, "PAGE_ETAG_SALT", ""),
+    )
+
+
+def make_etag(request, *parts):
+    """Hash parts and the viewer into an ETag, or None when the page must be rendered."""
+    if len(get_messages(request)):
+        return None
+    text = "|".join(str(part) for part in (*parts, *_viewer_parts(request)))
+    return hashlib.sha256(text.encode()).hexdigest()[:32]
+
+
+def _revalidate(response):
+    if response.status_code not in (200, 304):
+        # A 404 or redirect must not be revalidated into a 304 later
+        response.headers.pop("ETag", None)
+    elif response.has_header("ETag"):
+        # Without no-cache a browser may reuse the page heuristically, skipping the 304 check
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ("Cookie",))
+    return response
+
+
+def conditional_page(etag_func):
+    """condition(etag_func=...) for per-user pages: the browser must revalidate every time."""
+    def decorator(view):
+        conditional_view = condition(etag_func=etag_func)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            return _revalidate(conditional_view(request, *args, **kwargs))
+        return wrapper
+    return decorator
+
+
+def async_conditional_page(etag_func):
+    """
+    conditional_page for async views. Django's condition() would call etag_func
+    on the event loop, where the ORM refuses to run, so a sync etag_func runs
+    on the DB pool (myapp.db.run_db); an async one is awaited.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            etag = None
+            if request.method in ("GET", "HEAD"):
+                if iscoroutinefunction(etag_func):
+                    etag = await etag_func(request, *args, **kwargs)
+                else:
+                    etag = await run_db(etag_func, request, *args, **kwargs)
+            if etag:
+                etag = quote_etag(etag)
+                response = get_conditional_response(request, etag=etag)
+                if response is not None:
+                    # As condition() does: the 304 names the ETag it confirms
+                    response.headers["ETag"] = etag
+                    return _revalidate(response)
+            response = await view(request, *args, **kwargs)
+            if etag:
+                response.headers.setdefault("ETag", etag)
+            return _revalidate(response)
+        return wrapper
+    return decorator
+
+
+# -------- Validators --------
+def catalog_etag(request, *args, **kwargs):
+    """Catalog listings: everything they show is covered by the catalog version."""
+    return make_etag(request, request.path, request.GET.urlencode(), get_catalog_version())
+
+
+def home_etag(request):
+    if not request.user.is_authenticated:
+        return None  # redirected to login
+    return catalog_etag(request)
+
+
+def detail_page_course(request, slug):
+    """
+    The course (with details) shown on the course page, loaded once per request:
+    the validator needs its timestamps and the view then renders the same row.
+    """
+    cached = getattr(request, "_detail_page_course", None)
+    if cached is None or cached[0] != slug:
+        course = Course.all_objects.select_related("details").filter(slug=slug).first()
+        cached = request._detail_page_course = (slug, course)
+    return cached[1]
+
+
+def course_detail_etag(request, slug):
+    course = detail_page_course(request, slug)
+    if course is None:
+        return None  # let the view answer 404
+    details = getattr(course, "details", None)
+    return make_etag(
+        request, course.id, course.updated_at, details and details.updated_at,
+        course_state_version(request.user),
+    )
@@ -0,0 +1,95 @@
+# myapp/course_state.py
+"""
+Per-user course state (enrolled / wishlisted) for one or many courses.
+
+States for any number of courses are loaded in a single query and cached per
+user under a user version. The enroll, unenroll, toggle and wishlist views call
+``invalidate_course_state`` after they write, which moves the user to a new
+version.
+"""
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Exists, OuterRef, Subquery
+
+from .cache import bump_version, get_version
+from .models import Course, Enrollment, Wishlist
+
+# enrolled: active enrollment; has_enrollment: any enrollment row, active or not
+CourseState = namedtuple("CourseState", "enrolled has_enrollment wishlisted")
+ANONYMOUS_STATE = CourseState(enrolled=False, has_enrollment=False, wishlisted=False)
+
+
+def _version_key(user_id):
+    return f"course_state:{user_id}:version"
+
+
+def _timeout():
+    return getattr(settings, "COURSE_STATE_CACHE_TIMEOUT", 60 * 15)
+
+
+def course_state_version(user):
+    """Changes whenever the user's enrollments or wishlist change; None when anonymous."""
+    if not user.is_authenticated:
+        return None
+    return get_version(_version_key(user.pk))
+
+
+def invalidate_course_state(user):
+    bump_version(_version_key(user.pk))
+
+
+def course_states_queryset(user, course_ids):
+    """(course id, active enrollment or None, wishlisted) rows for user."""
+    enrollment = Enrollment.objects.filter(user=user, course=OuterRef("pk"))
+    # The state reflects the user's own writes, so never read it from a catalog replica
+    return (
+        Course.all_objects.using(DEFAULT_DB_ALIAS).filter(id__in=course_ids)
+        .annotate(
+            enrollment_active=Subquery(enrollment.values("is_active")[:1]),
+            wishlisted=Exists(Wishlist.objects.filter(user=user, course=OuterRef("pk"))),
+        )
+        .values_list("id", "enrollment_active", "wishlisted")
+    )
+
+
+def load_course_states(user, course_ids):
+    """Query the state of every course in course_ids for user (one query)."""
+    rows = course_states_queryset(user, course_ids)
+    return {
+        course_id: CourseState(
+            enrolled=bool(active),
+            has_enrollment=active is not None,
+            wishlisted=wishlisted,
+        )
+        for course_id, active, wishlisted in rows
+    }
+
+
+def get_course_states(user, course_ids):
+    """Return {course_id: CourseState}, served from the per-user cache when warm."""
+    course_ids = list(course_ids)
+    if not user.is_authenticated:
+        return {course_id: ANONYMOUS_STATE for course_id in course_ids}
+
+    version = get_version(_version_key(user.pk))
+    keys = {
+        course_id: f"course_state:{user.pk}:{version}:{course_id}" for course_id in course_ids
+    }
+    cached = cache.get_many(list(keys.values()))
+    states = {
+        course_id: cached[key] for course_id, key in keys.items() if key in cached
+    }
+
+    missing = [course_id for course_id in course_ids if course_id not in states]
+    if missing:
+        loaded = load_course_states(user, missing)
+        cache.set_many({keys[course_id]: state for course_id, state in loaded.items()}, _timeout())
+        states.update(loaded)
+    return states
+
+
+def get_course_state(user, course_id):
+    return get_course_states(user, [course_id]).get(course_id, ANONYMOUS_STATE)
@@ -0,0 +1,87 @@
+# myapp/db.py
+"""
+SQLite connection tuning.
+
+``configure_sqlite_connection`` is connected to ``connection_created`` in
+``MyappConfig.ready`` and runs the ``SQLITE_PRAGMAS`` setting on every new
+SQLite connection. With ``CONN_MAX_AGE`` that is once per worker connection
+rather than once per request.
+
+WAL lets readers keep going while one writer commits, which is what removes
+"database is locked" under several gunicorn workers; ``busy_timeout`` makes a
+second writer wait for the lock instead of failing straight away. The journal
+mode is stored in the database file itself, so it is not a per-connection
+pragma: ``manage.py sqlite_maintenance`` switches the database to
+``SQLITE_JOURNAL_MODE`` (run it on deploy and from cron). Opening the
+checked-in development database, as ``check``, ``test`` or ``makemigrations``
+do, leaves the file as it is.
+
+``run_db`` is how async views run blocking ORM work: on a bounded thread pool
+(``ASYNC_DB_THREADS``), so concurrent requests cannot open more connections
+than the pool has threads.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+DEFAULT_SQLITE_JOURNAL_MODE = "WAL"
+DEFAULT_SQLITE_PRAGMAS = {
+    # Durable at every checkpoint; only the last commits can be lost on power failure
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,  # ms
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -20000,  # negative = KiB, i.e. ~20 MB page cache per connection
+    "temp_store": "MEMORY",
+}
+
+
+def sqlite_pragmas():
+    return getattr(settings, "SQLITE_PRAGMAS", DEFAULT_SQLITE_PRAGMAS)
+
+
+def sqlite_journal_mode():
+    return getattr(settings, "SQLITE_JOURNAL_MODE", DEFAULT_SQLITE_JOURNAL_MODE)
+
+
+def apply_pragmas(cursor, pragmas):
+    """Run ``PRAGMA name = value`` for every item of pragmas on a DB-API cursor."""
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def configure_sqlite_connection(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, sqlite_pragmas())
+
+
+_db_executor = None
+
+
+def _executor():
+    global _db_executor
+    if _db_executor is None:
+        _db_executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "ASYNC_DB_THREADS", 8), thread_name_prefix="async-db",
+        )
+    return _db_executor
+
+
+def _run_in_pool(func):
+    # Pool threads never see request_started/finished: apply CONN_MAX_AGE and
+    # drop broken connections here instead
+    close_old_connections()
+    return func()
+
+
+async def run_db(func, *args, **kwargs):
+    """Run the blocking callable func(*args, **kwargs) on the DB thread pool and await it."""
+    # thread_sensitive=False: calls may run in parallel, each on its own pool
+    # thread (and so on its own connection); contextvars are carried over
+    return await sync_to_async(_run_in_pool, thread_sensitive=False, executor=_executor())(
+        partial(func, *args, **kwargs)
+    )
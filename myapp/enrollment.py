@@ -0,0 +1,91 @@
+# myapp/enrollment.py
+"""
+Enrollment and wishlist writes, each a single SQL statement.
+
+The course is resolved from its slug inside the statement, and the upserts
+(``INSERT ... ON CONFLICT``) and conditional ``UPDATE ... RETURNING`` make
+every write atomic on its own: a double submit or two tabs racing each other
+can neither hit the ``(user, course)`` unique constraint nor lose an update,
+and the new state comes back from the same round-trip.
+
+Every function returns None when the course (or, for the updates, the
+enrollment) does not exist, which the views turn into a 404. The statements
+bypass model signals, so a statement that wrote a row pins the request to the
+primary itself (``myapp.routers.record_write``: the redirected page must not
+read a replica that has not caught up yet), and the views invalidate the
+user's course state (``myapp.course_state``) themselves.
+
+Needs ``ON CONFLICT`` and ``RETURNING``: SQLite 3.35+ or PostgreSQL.
+"""
+from django.db import connection
+from django.utils import timezone
+
+from .models import Course, Enrollment, Wishlist
+from .routers import record_write
+
+COURSE_TABLE = Course._meta.db_table
+ENROLLMENT_TABLE = Enrollment._meta.db_table
+WISHLIST_TABLE = Wishlist._meta.db_table
+
+
+def _now():
+    return connection.ops.adapt_datetimefield_value(timezone.now())
+
+
+def _fetch_one(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    if row is not None:
+        # Every statement returns a row only when it wrote one
+        record_write()
+    return row
+
+
+def enroll(user, slug):
+    """Enroll user in the course, reactivating an inactive enrollment. Returns the course id."""
+    row = _fetch_one(
+        f"INSERT INTO {ENROLLMENT_TABLE} (user_id, course_id, enrolled_at, is_active) "
+        f"SELECT %s, id, %s, %s FROM {COURSE_TABLE} WHERE slug = %s "
+        f"ON CONFLICT (user_id, course_id) DO UPDATE SET is_active = excluded.is_active "
+        f"RETURNING course_id",
+        [user.pk, _now(), True, slug],
+    )
+    return row and row[0]
+
+
+def toggle_enrollment(user, slug):
+    """Flip the enrollment's is_active and return the new value."""
+    row = _fetch_one(
+        f"UPDATE {ENROLLMENT_TABLE} SET is_active = NOT is_active "
+        f"WHERE user_id = %s AND course_id = (SELECT id FROM {COURSE_TABLE} WHERE slug = %s) "
+        f"RETURNING is_active",
+        [user.pk, slug],
+    )
+    return None if row is None else bool(row[0])
+
+
+def unenroll(user, slug):
+    """Deactivate the enrollment. Returns the course id."""
+    row = _fetch_one(
+        f"UPDATE {ENROLLMENT_TABLE} SET is_active = %s "
+        f"WHERE user_id = %s AND course_id = (SELECT id FROM {COURSE_TABLE} WHERE slug = %s) "
+        f"RETURNING course_id",
+        [False, user.pk, slug],
+    )
+    return row and row[0]
+
+
+def wishlist_course(user, slug):
+    """Wishlist the course (a no-op when it already is). Returns the course id."""
+    row = _fetch_one(
+        f"INSERT INTO {WISHLIST_TABLE} (user_id, course_id, created_at) "
+        f"SELECT %s, id, %s FROM {COURSE_TABLE} WHERE slug = %s "
+        f"ON CONFLICT (user_id, course_id) DO NOTHING "
+        f"RETURNING course_id",
+        [user.pk, _now(), slug],
+    )
+    if row is not None:
+        return row[0]
+    # Already wishlisted (nothing inserted), or no such course
+    return Course.all_objects.filter(slug=slug).values_list("id", flat=True).first()
@@ -0,0 +1,134 @@
+# myapp/images.py
+"""
+Resized WebP/JPEG renditions of ``Course.image``.
+
+When a course is saved with a new image, ``schedule_renditions`` resizes it to
+each width in ``RENDITION_WIDTHS`` (card, detail and their 2x retina sizes),
+in WebP and JPEG, and records the result in ``Course.image_renditions``.
+Files are named after a hash of the source bytes, so identical uploads (every
+course on the default image, say) share one set of files, and a rendition that
+already exists on disk is never rebuilt.
+
+The resize runs on a background thread after the transaction commits, so the
+request that saved the course does not wait for it; with
+``IMAGE_RENDITIONS_ASYNC = False`` it runs inline after commit instead. The
+``{% course_image %}`` tag in ``custom_tags`` turns the recorded renditions
+into a lazy-loaded ``<picture>`` with ``srcset``/``sizes``.
+"""
+import hashlib
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Card 1x, detail 1x / card 2x, detail 2x
+RENDITION_WIDTHS = (400, 800, 1600)
+RENDITION_FORMATS = {"webp": ("WEBP", 80), "jpeg": ("JPEG", 82)}
+# Same folder layout as Course.image uploads
+RENDITION_DIR = "static/images/renditions"
+
+# Only one resize at a time: this is a small, CPU-bound side job
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-renditions")
+
+
+def _save(path, image, fmt, quality):
+    if default_storage.exists(path):
+        return
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, quality=quality, optimize=True)
+    default_storage.save(path, ContentFile(buffer.getvalue()))
+
+
+def build_renditions(field_file):
+    """
+    Resize field_file and return the rendition record for ``image_renditions``:
+    ``{"source", "width", "height", "webp": [[width, name], ...], "jpeg": [...]}``.
+    """
+    from PIL import Image, ImageOps
+
+    with field_file.open("rb") as source:
+        data = source.read()
+    digest = hashlib.sha256(data).hexdigest()[:16]
+
+    with Image.open(io.BytesIO(data)) as original:
+        original = ImageOps.exif_transpose(original)
+        original.load()
+    has_alpha = original.mode in ("RGBA", "LA") or "transparency" in original.info
+    rgba = original.convert("RGBA" if has_alpha else "RGB")
+
+    # Never upscale: widths above the original collapse into one full-size rendition
+    widths = sorted({min(width, rgba.width) for width in RENDITION_WIDTHS})
+    record = {
+        "source": field_file.name,
+        "width": rgba.width,
+        "height": rgba.height,
+        "webp": [],
+        "jpeg": [],
+    }
+    for width in widths:
+        height = max(1, round(rgba.height * width / rgba.width))
+        resized = rgba if width == rgba.width else rgba.resize((width, height), Image.LANCZOS)
+        for ext, (fmt, quality) in RENDITION_FORMATS.items():
+            image = resized
+            if fmt == "JPEG" and has_alpha:
+                # JPEG has no alpha channel: flatten onto white
+                image = Image.new("RGB", resized.size, "white")
+                image.paste(resized, mask=resized.getchannel("A"))
+            name = f"{RENDITION_DIR}/{digest}-{width}.{ext}"
+            _save(name, image, fmt, quality)
+            record[ext].append([width, name])
+    return record
+
+
+def generate_course_renditions(course_id):
+    """Build and store the renditions of one course. Returns False if it has no image."""
+    from .cache import bump_catalog_version
+    from .models import Course
+
+    course = Course.all_objects.filter(pk=course_id).only("image").first()
+    if course is None or not course.image:
+        return False
+    record = build_renditions(course.image)
+    # update() rather than save(): no signals, so no second round of renditions
+    Course.all_objects.filter(pk=course_id, image=course.image.name).update(
+        image_renditions=record, updated_at=timezone.now()
+    )
+    # Cached course cards embed the <img> markup
+    bump_catalog_version()
+    return True
+
+
+def _generate_in_background(course_id):
+    try:
+        generate_course_renditions(course_id)
+    except Exception:
+        logger.exception("Could not build image renditions for course %s", course_id)
+    finally:
+        # This thread's connection is not covered by request_finished
+        connection.close()
+
+
+def _generate_inline(course_id):
+    try:
+        generate_course_renditions(course_id)
+    except Exception:
+        # A broken upload must not break saving the course; templates fall back to the original
+        logger.exception("Could not build image renditions for course %s", course_id)
+
+
+def schedule_renditions(course):
+    """Rebuild course's renditions once the current transaction commits, if its image changed."""
+    if not course.image or course.image_renditions.get("source") == course.image.name:
+        return
+    course_id = course.pk
+    if getattr(settings, "IMAGE_RENDITIONS_ASYNC", True):
+        transaction.on_commit(lambda: _executor.submit(_generate_in_background, course_id))
+    else:
+        transaction.on_commit(lambda: _generate_inline(course_id))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from myapp.models import Course_detail
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-parse outcomes/skills/tools/requirements/overview into the *_list columns "
+        "of every Course_detail (needed after bulk imports or queryset.update())."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        updated = 0
+        last_pk = 0
+        # Walk the table in primary-key batches so no cursor stays open across writes
+        while True:
+            batch = list(
+                Course_detail.objects.filter(pk__gt=last_pk).order_by("pk")[:batch_size]
+            )
+            if not batch:
+                break
+            for detail in batch:
+                detail.parse_lists()
+            with transaction.atomic():
+                Course_detail.objects.bulk_update(batch, Course_detail.LIST_FIELDS)
+            updated += len(batch)
+            last_pk = batch[-1].pk
+        self.stdout.write(self.style.SUCCESS(f"Backfilled {updated} course details."))
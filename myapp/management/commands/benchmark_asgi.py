@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from myapp.models import Category, Course, CustomUser
+
+BENCH_USERNAME = "bench-asgi"
+VIEWS = ("home", "category_courses", "course_detail")
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def _summary(timings, errors, elapsed):
+    return {
+        "rps": len(timings) / elapsed if elapsed else 0.0,
+        "p50_ms": _percentile(timings, 0.5) * 1000,
+        "p95_ms": _percentile(timings, 0.95) * 1000,
+        "errors": errors,
+    }
+
+
+def _run_wsgi(user, url, concurrency, total):
+    """total requests from concurrency threads, like a threaded WSGI worker."""
+    local = threading.local()
+    clients = []
+
+    def one(_):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = Client()
+            client.force_login(user)
+            clients.append(client)
+        started = time.perf_counter()
+        status = client.get(url).status_code
+        return time.perf_counter() - started, status
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(one, range(concurrency)))  # log in and warm up every thread
+        started = time.perf_counter()
+        results = list(pool.map(one, range(total)))
+        elapsed = time.perf_counter() - started
+        list(pool.map(lambda client: client.logout(), clients))
+    return _summary([t for t, _ in results], sum(status != 200 for _, status in results), elapsed)
+
+
+async def _run_asgi(user, url, concurrency, total):
+    """total requests from concurrency tasks sharing one event loop, like an ASGI worker."""
+    clients = [AsyncClient() for _ in range(concurrency)]
+    for client in clients:
+        await client.aforce_login(user)
+    remaining = total
+    timings, errors = [], 0
+
+    async def worker(client, budget):
+        nonlocal errors
+        for _ in range(budget):
+            started = time.perf_counter()
+            response = await client.get(url)
+            timings.append(time.perf_counter() - started)
+            errors += response.status_code != 200
+
+    await asyncio.gather(*(client.get(url) for client in clients))  # warm up
+    started = time.perf_counter()
+    budgets = []
+    for index in range(concurrency):
+        budgets.append(remaining // (concurrency - index))
+        remaining -= budgets[-1]
+    await asyncio.gather(*(worker(client, budget) for client, budget in zip(clients, budgets)))
+    elapsed = time.perf_counter() - started
+    for client in clients:
+        await client.alogout()
+    return _summary(timings, errors, elapsed)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the catalog views under WSGI (sync views, one thread per concurrent "
+        "request) and ASGI (myapp/async_views.py, one event loop) in-process, at "
+        "several concurrency levels. Run it against a dataset from generate_dataset."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", default="1,8,32",
+                            help="Comma-separated numbers of concurrent requests.")
+        parser.add_argument("--requests", type=int, default=200,
+                            help="Requests per view, mode and concurrency level.")
+        parser.add_argument("--views", default=",".join(VIEWS),
+                            help=f"Comma-separated subset of: {', '.join(VIEWS)}.")
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(level) for level in options["concurrency"].split(",")]
+        except ValueError:
+            raise CommandError("--concurrency must be a comma-separated list of integers.")
+        views = [name.strip() for name in options["views"].split(",") if name.strip()]
+        unknown = set(views) - set(VIEWS)
+        if unknown:
+            raise CommandError(f"Unknown view(s): {', '.join(sorted(unknown))}.")
+
+        course = Course.all_objects.filter(details__isnull=False).order_by("id").first()
+        category = Category.objects.filter(courses__isnull=False).order_by("id").first()
+        if course is None or category is None:
+            raise CommandError("No course with details in a category; run generate_dataset first.")
+        user, created = CustomUser.objects.get_or_create(username=BENCH_USERNAME)
+        if created:
+            user.set_unusable_password()
+            user.save(update_fields=["password"])
+
+        urls = {
+            "home": reverse("home"),
+            "category_courses": reverse("category_courses", args=[category.slug]),
+            "course_detail": reverse("course_detail", args=[course.slug]),
+        }
+        self.stdout.write(
+            f"{'view':<18}{'conc':>5}  {'WSGI req/s':>10} {'p50':>8} {'p95':>8}"
+            f"  {'ASGI req/s':>10} {'p50':>8} {'p95':>8}"
+        )
+        for name in views:
+            for level in levels:
+                wsgi = _run_wsgi(user, urls[name], level, options["requests"])
+                asgi = asyncio.run(_run_asgi(user, urls[name], level, options["requests"]))
+                line = (
+                    f"{name:<18}{level:>5}  {wsgi['rps']:>10.0f} {wsgi['p50_ms']:>6.1f}ms {wsgi['p95_ms']:>6.1f}ms"
+                    f"  {asgi['rps']:>10.0f} {asgi['p50_ms']:>6.1f}ms {asgi['p95_ms']:>6.1f}ms"
+                )
+                if wsgi["errors"] or asgi["errors"]:
+                    line += f"  errors: WSGI {wsgi['errors']}, ASGI {asgi['errors']}"
+                self.stdout.write(line)
@@ -0,0 +1,107 @@
+import time
+from statistics import median
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from myapp.models import Category, Course, Course_detail
+from myapp.pagination import CURSOR_NEXT, KEYSET_ORDERING, encode_cursor
+from myapp.views import category_course_queryset, category_courses
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Regression benchmark for category_courses: fills one category with N courses "
+        "inside a transaction, times the first, a numbered and a deep cursor page, "
+        "then rolls everything back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--courses", type=int, default=100_000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--max-ms", type=float, default=50.0,
+            help="Fail if the median latency of any page exceeds this many milliseconds.",
+        )
+        parser.add_argument(
+            "--max-queries", type=int, default=4,
+            help="Fail if any page runs more SQL queries than this.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                results = self._run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        failed = False
+        for label, ms, queries in results:
+            ok = ms <= options["max_ms"] and queries <= options["max_queries"]
+            failed |= not ok
+            style = self.style.SUCCESS if ok else self.style.ERROR
+            self.stdout.write(style(f"{label:<24} {ms:8.2f} ms  {queries} queries"))
+        if failed:
+            raise CommandError("category_courses exceeded its latency or query budget")
+
+    def _run(self, options):
+        total = options["courses"]
+        self.stdout.write(f"Creating {total} courses in one category...")
+        category = Category.objects.create(name="Benchmark Category", slug="benchmark-category")
+        through = Course_detail.categories.through
+        batch = options["batch_size"]
+        for start in range(0, total, batch):
+            courses = Course.all_objects.bulk_create(
+                Course(
+                    title=f"Benchmark course {i}",
+                    slug=f"benchmark-course-{i}",
+                    description="Benchmark description",
+                    price=100,
+                )
+                for i in range(start, min(start + batch, total))
+            )
+            details = Course_detail.objects.bulk_create(
+                Course_detail(course=course, short_description="Benchmark") for course in courses
+            )
+            through.objects.bulk_create(
+                through(course_detail_id=detail.id, category_id=category.id) for detail in details
+            )
+
+        # A small category sharing the same catalog, to catch plans that only
+        # suit big categories
+        sparse = Category.objects.create(name="Benchmark Sparse", slug="benchmark-sparse")
+        detail_ids = Course_detail.objects.filter(categories=category).values_list("id", flat=True)
+        sparse.courses.add(*list(detail_ids)[:: max(1, total // 20)])
+
+        deep = category_course_queryset(category).order_by(*KEYSET_ORDERING)[total // 2]
+        pages = [
+            ("first page", category, {}),
+            ("numbered page 10", category, {"page": 10}),
+            (f"cursor page @{total // 2}", category, {"cursor": encode_cursor(deep, CURSOR_NEXT)}),
+            ("sparse category", sparse, {}),
+        ]
+
+        factory = RequestFactory()
+        results = []
+        for label, category, params in pages:
+            timings = []
+            for _ in range(options["repeat"]):
+                request = factory.get(f"/category/{category.slug}/", params)
+                request.user = AnonymousUser()
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = category_courses(request, slug=category.slug)
+                    timings.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    raise CommandError(f"{label}: HTTP {response.status_code}")
+            results.append((label, median(timings), len(queries)))
+        return results
@@ -0,0 +1,139 @@
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from statistics import median
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from myapp.db import apply_pragmas, sqlite_journal_mode, sqlite_pragmas
+from myapp.models import Course
+from myapp.pagination import KeysetPaginator
+
+# What a connection gets without myapp/db.py: rollback journal and Python's
+# default 5 s busy handler
+DEFAULT_PROFILE = {"journal_mode": "DELETE", "synchronous": "FULL"}
+DEFAULT_TIMEOUT = 5.0
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def _worker(path, pragmas, timeout, read_sql, write_sql, course_ids, duration, write_ratio, seed, results):
+    """One "gunicorn worker": a mix of listing reads and single-row writes."""
+    db = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+    apply_pragmas(db.cursor(), {k: v for k, v in pragmas.items() if k != "journal_mode"})
+    rng = random.Random(seed)
+    reads, writes, errors = [], [], 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        is_write = rng.random() < write_ratio
+        started = time.perf_counter()
+        try:
+            if is_write:
+                db.execute(write_sql, [rng.choice(course_ids)])
+            else:
+                db.execute(*read_sql).fetchall()
+        except sqlite3.OperationalError:
+            errors += 1  # "database is locked"
+            continue
+        (writes if is_write else reads).append((time.perf_counter() - started) * 1000)
+    db.close()
+    results.put((reads, writes, errors))
+
+
+class Command(BaseCommand):
+    help = (
+        "Before/after concurrency benchmark for the SQLite profile: copies the database, "
+        "then runs N worker processes doing catalog reads and writes against the default "
+        "configuration and against SQLITE_PRAGMAS (WAL), and prints throughput, latency "
+        "and 'database is locked' errors for both."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--duration", type=float, default=5.0, help="Seconds per profile.")
+        parser.add_argument("--write-ratio", type=float, default=0.2)
+        parser.add_argument(
+            "--timeout", type=float, default=None,
+            help="Busy timeout (s) for both profiles; defaults to each profile's own.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("benchmark_sqlite_concurrency only applies to the SQLite backend.")
+
+        course_ids = list(Course.all_objects.values_list("id", flat=True)[:1000])
+        if not course_ids:
+            raise CommandError("No courses to benchmark against; load some data first.")
+
+        # The home page listing query, in sqlite3's own placeholder style so
+        # workers can run it without Django
+        sql, params = KeysetPaginator(Course.objects.all(), 9).queryset[:10].query.sql_with_params()
+        read_sql = (sql.replace("%s", "?"), list(params))
+        write_sql = "UPDATE myapp_course SET price = price WHERE id = ?"
+
+        production = {"journal_mode": sqlite_journal_mode(), **sqlite_pragmas()}
+        production_timeout = production.get("busy_timeout", 5000) / 1000
+        profiles = [
+            ("default", DEFAULT_PROFILE, DEFAULT_TIMEOUT),
+            ("production", production, production_timeout),
+        ]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            rows = []
+            for label, pragmas, timeout in profiles:
+                path = os.path.join(tmp, f"{label}.sqlite3")
+                self._copy_database(path, pragmas.get("journal_mode", "DELETE"))
+                rows.append((label, self._run(
+                    path, pragmas, options["timeout"] or timeout, read_sql, write_sql,
+                    course_ids, options,
+                )))
+
+        self.stdout.write(
+            f"{'profile':<12}{'ops/s':>10}{'read p50':>11}{'read p95':>11}"
+            f"{'write p50':>11}{'write p95':>11}{'locked':>8}"
+        )
+        for label, (ops, reads, writes, errors) in rows:
+            self.stdout.write(
+                f"{label:<12}{ops:>10.0f}{median(reads or [0]):>9.2f}ms"
+                f"{_percentile(reads, 0.95):>9.2f}ms{median(writes or [0]):>9.2f}ms"
+                f"{_percentile(writes, 0.95):>9.2f}ms{errors:>8}"
+            )
+
+    @staticmethod
+    def _copy_database(path, journal_mode):
+        target = sqlite3.connect(path)
+        connection.ensure_connection()
+        connection.connection.backup(target)
+        target.execute(f"PRAGMA journal_mode = {journal_mode}")
+        target.close()
+
+    def _run(self, path, pragmas, timeout, read_sql, write_sql, course_ids, options):
+        results = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(target=_worker, args=(
+                path, pragmas, timeout, read_sql, write_sql, course_ids,
+                options["duration"], options["write_ratio"], seed, results,
+            ))
+            for seed in range(options["workers"])
+        ]
+        for worker in workers:
+            worker.start()
+        reads, writes, errors = [], [], 0
+        for _ in workers:
+            worker_reads, worker_writes, worker_errors = results.get()
+            reads += worker_reads
+            writes += worker_writes
+            errors += worker_errors
+        for worker in workers:
+            worker.join()
+        ops = (len(reads) + len(writes)) / options["duration"]
+        return ops, reads, writes, errors
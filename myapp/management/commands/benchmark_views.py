@@ -0,0 +1,374 @@
+import gc
+import io
+import json
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.template.base import Template
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+
+from myapp import urls as myapp_urls
+from myapp.attempts import attempt_buffer
+from myapp.models import (
+    Category,
+    Course,
+    CustomUser,
+    Enrollment,
+    SuggestedCourse,
+    Wishlist,
+)
+from myapp.quiz import get_quiz_snapshot
+
+BASELINE_PATH = Path(__file__).resolve().parents[2] / "view_benchmark_baseline.json"
+BENCH_PASSWORD = "bench-password-123"
+
+# who: "anon", "user" or "staff". kwargs/data: callables taking the fixture dict.
+ViewCase = namedtuple("ViewCase", "name who method url_name kwargs data")
+
+
+def _case(name, who, method, url_name, kwargs=None, data=None):
+    return ViewCase(name, who, method, url_name, kwargs or (lambda f: {}), data or (lambda f: {}))
+
+
+CASES = [
+    # Home redirects anonymous visitors to the login page
+    _case("home", "user", "GET", "home"),
+    _case("home page 5", "user", "GET", "home", data=lambda f: {"page": 5}),
+    _case("category_courses", "anon", "GET", "category_courses", lambda f: {"slug": f["category"].slug}),
+    _case("search", "anon", "GET", "search", data=lambda f: {"q": "python"}),
+    _case("course_detail", "anon", "GET", "course_detail", lambda f: {"slug": f["course"].slug}),
+    _case("course_detail (user)", "user", "GET", "course_detail", lambda f: {"slug": f["course"].slug}),
+    _case("module_list", "anon", "GET", "module_list", lambda f: {"course_slug": f["course"].slug}),
+    _case("quiz_detail", "anon", "GET", "quiz_detail", lambda f: {"quiz_id": f["quiz"].id}),
+    _case("quiz_detail submit", "user", "POST", "quiz_detail",
+          lambda f: {"quiz_id": f["quiz"].id}, lambda f: f["quiz_answers"]),
+    _case("register", "anon", "GET", "register"),
+    _case("register submit", "anon", "POST", "register", data=lambda f: {
+        "username": "bench-new", "email": "bench-new@example.com",
+        "password1": BENCH_PASSWORD, "password2": BENCH_PASSWORD,
+    }),
+    _case("login", "anon", "GET", "login"),
+    _case("login submit", "anon", "POST", "login",
+          data=lambda f: {"username": f["user"].username, "password": BENCH_PASSWORD}),
+    _case("logout", "user", "POST", "logout"),
+    _case("my_courses", "user", "GET", "my_courses"),
+    _case("enroll_course", "user", "POST", "enroll_course", lambda f: {"slug": f["other_course"].slug}),
+    _case("toggle_enrollment_status", "user", "POST", "toggle_enrollment_status",
+          lambda f: {"course_slug": f["course"].slug}),
+    _case("unenroll_course", "user", "POST", "unenroll_course", lambda f: {"course_slug": f["course"].slug}),
+    _case("add_to_wishlist", "user", "POST", "add_to_wishlist", lambda f: {"slug": f["other_course"].slug}),
+    _case("wishlist_page", "user", "GET", "wishlist_page"),
+    _case("remove_from_wishlist", "user", "POST", "remove_from_wishlist", lambda f: {"slug": f["course"].slug}),
+    _case("manage_suggested_courses", "staff", "GET", "manage_suggested_courses"),
+    _case("add_suggested_course", "staff", "POST", "add_suggested_course",
+          data=lambda f: {"course_id": f["other_course"].id, "order": 1}),
+    _case("remove_suggested_course", "staff", "POST", "remove_suggested_course",
+          lambda f: {"suggestion_id": f["suggestion"].id}),
+    _case("manage_categories", "staff", "GET", "manage_categories"),
+    _case("category_create", "staff", "GET", "category_create"),
+    _case("category_create submit", "staff", "POST", "category_create", data=lambda f: {"name": "Bench New"}),
+    _case("category_update", "staff", "GET", "category_update", lambda f: {"pk": f["category"].pk}),
+    _case("category_update submit", "staff", "POST", "category_update",
+          lambda f: {"pk": f["category"].pk}, lambda f: {"name": "Bench Renamed"}),
+    _case("category_delete", "staff", "GET", "category_delete", lambda f: {"pk": f["category"].pk}),
+    _case("category_delete submit", "staff", "POST", "category_delete", lambda f: {"pk": f["category"].pk}),
+    _case("manage_category_courses", "staff", "GET", "manage_category_courses", lambda f: {"pk": f["category"].pk}),
+    _case("available_category_courses", "staff", "GET", "available_category_courses",
+          lambda f: {"pk": f["category"].pk}, lambda f: {"q": "python"}),
+    _case("add_course_to_category", "staff", "POST", "add_course_to_category",
+          lambda f: {"pk": f["category"].pk}, lambda f: {"course_id": f["outside_course"].id}),
+    _case("remove_course_from_category", "staff", "POST", "remove_course_from_category",
+          lambda f: {"pk": f["category"].pk, "course_detail_id": f["member_detail"].id}),
+    _case("metrics", "staff", "GET", "metrics"),
+    _case("api_courses", "anon", "GET", "api_courses"),
+    _case("api_courses limit 100", "anon", "GET", "api_courses", data=lambda f: {"limit": 100}),
+    _case("api_courses category", "anon", "GET", "api_courses", data=lambda f: {"category": f["category"].slug}),
+    _case("api_course_detail", "anon", "GET", "api_course_detail", lambda f: {"slug": f["course"].slug}),
+    _case("api_course_outline", "anon", "GET", "api_course_outline", lambda f: {"slug": f["course"].slug}),
+    _case("api_categories", "anon", "GET", "api_categories"),
+    _case("api_suggested", "anon", "GET", "api_suggested"),
+]
+
+
+class _Rollback(Exception):
+    pass
+
+
+# The checked-in baseline holds only the query counts, which are the same on
+# every machine; latencies go to the machine-local --latency-baseline file
+QUERY_KEYS = ("queries",)
+LATENCY_KEYS = ("p50_ms", "p95_ms", "render_ms")
+
+
+def _select(results, keys):
+    return {
+        size: {name: {key: numbers[key] for key in keys} for name, numbers in views.items()}
+        for size, views in results.items()
+    }
+
+
+def _read_json(path):
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def _write_json(path, data):
+    path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+@contextmanager
+def _template_timer(totals):
+    """Add the wall time of every top-level template render to totals[0]."""
+    original = Template._render
+    depth = [0]
+
+    def timed_render(self, context):
+        depth[0] += 1
+        started = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            depth[0] -= 1
+            if not depth[0]:
+                totals[0] += time.perf_counter() - started
+
+    Template._render = timed_render
+    try:
+        yield
+    finally:
+        Template._render = original
+
+
+def _build_fixture():
+    courses = list(Course.objects.filter(details__isnull=False).order_by("id")[:3])
+    if len(courses) < 3:
+        raise CommandError("The dataset needs at least 3 courses with details.")
+    course, other_course, suggested_course = courses
+    category = Category.objects.filter(courses__course=course).first()
+    member_detail = category.courses.exclude(course=course).first() or course.details
+    # add_course_to_category looks courses up through Course.objects, which hides suggested ones
+    outside = (
+        Course.objects.filter(details__isnull=False)
+        .exclude(details__categories=category).exclude(pk=suggested_course.pk)
+        .order_by("id").first()
+    )
+    quiz = get_quiz_snapshot(course.modules.order_by("id").first().quizzes.order_by("id").first().id)
+
+    user = CustomUser.objects.create_user("bench-user", "bench-user@example.com", BENCH_PASSWORD)
+    staff = CustomUser.objects.create_user(
+        "bench-staff", "bench-staff@example.com", BENCH_PASSWORD, is_staff=True, is_superuser=True,
+    )
+    Enrollment.objects.create(user=user, course=course)
+    Wishlist.objects.create(user=user, course=course)
+    suggestion = SuggestedCourse.objects.create(course=suggested_course, order=0)
+
+    return {
+        "course": course,
+        "other_course": other_course,
+        "outside_course": outside or other_course,
+        "category": category,
+        "member_detail": member_detail,
+        "quiz": quiz,
+        "quiz_answers": {
+            f"question_{question.id}": question.options[0].id for question in quiz.questions
+        },
+        "user": user,
+        "staff": staff,
+        "suggestion": suggestion,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every URL in myapp/urls.py through the test client against generated "
+        "datasets of several sizes. After one warm-up request per view, records p50/p95 "
+        "latency, SQL queries and template render time per view. Fails when a view runs "
+        "more queries than the checked-in baseline allows and, with --latency-baseline, "
+        "when it got slower than on an earlier run on the same machine."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", default="0.1,1",
+            help="Comma-separated generate_dataset --scale values (default: 0.1,1).",
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--baseline", default=str(BASELINE_PATH),
+            help="Baseline JSON (default: myapp/view_benchmark_baseline.json).",
+        )
+        parser.add_argument(
+            "--latency-baseline",
+            help="Local JSON of p50/p95 latencies to gate on as well. Not checked in: "
+                 "the numbers only hold on the machine that recorded them.",
+        )
+        parser.add_argument("--update-baseline", action="store_true",
+                            help="Write the measured query counts (and, with --latency-baseline, "
+                                 "latencies) as the new baselines.")
+        parser.add_argument(
+            "--threshold", type=float, default=0.5,
+            help="Allowed relative p50 latency increase before failing (default 0.5 = +50%%); "
+                 "p95 may grow twice as much.",
+        )
+        parser.add_argument(
+            "--queries-only", action="store_true",
+            help="Only fail on query count increases, even with --latency-baseline.",
+        )
+        parser.add_argument(
+            "--min-ms", type=float, default=10.0,
+            help="Latency increases smaller than this many ms never fail (timer noise).",
+        )
+
+    def handle(self, *args, **options):
+        covered = {case.url_name for case in CASES}
+        missing = sorted(p.name for p in myapp_urls.urlpatterns if p.name not in covered)
+        if missing:
+            raise CommandError(f"No benchmark case for: {', '.join(missing)}")
+
+        results = {}
+        try:
+            setup_test_environment()
+            own_test_environment = True
+        except RuntimeError:
+            # Already set up, e.g. when run from the test suite
+            own_test_environment = False
+        # Write attempts inline, inside the rolled-back transaction
+        flush_interval, attempt_buffer.flush_interval = attempt_buffer.flush_interval, 0
+        try:
+            for size in options["sizes"].split(","):
+                size = size.strip()
+                try:
+                    with transaction.atomic():
+                        results[size] = self._run_size(float(size), options["repeat"])
+                        raise _Rollback
+                except _Rollback:
+                    pass
+        finally:
+            attempt_buffer.flush_interval = flush_interval
+            if own_test_environment:
+                teardown_test_environment()
+
+        baseline_path = Path(options["baseline"])
+        latency_path = options["latency_baseline"] and Path(options["latency_baseline"])
+        if options["update_baseline"]:
+            _write_json(baseline_path, _select(results, QUERY_KEYS))
+            self.stdout.write(self.style.SUCCESS(f"Wrote query counts to {baseline_path}."))
+            if latency_path:
+                _write_json(latency_path, _select(results, LATENCY_KEYS))
+                self.stdout.write(self.style.SUCCESS(f"Wrote latencies to {latency_path}."))
+            return
+
+        baseline = _read_json(baseline_path)
+        latencies = {} if options["queries_only"] or not latency_path else _read_json(latency_path)
+        regressions = self._report(results, baseline, latencies, options)
+        if regressions:
+            raise CommandError(f"{regressions} view benchmark regression(s) found.")
+        self.stdout.write(self.style.SUCCESS("No view benchmark regressions."))
+
+    def _run_size(self, scale, repeat):
+        self.stdout.write(f"Generating dataset --scale {scale:g}...")
+        call_command("generate_dataset", scale=scale, stdout=io.StringIO())
+        fixture = _build_fixture()
+
+        measured = {}
+        for case in CASES:
+            # A fresh session per case, so e.g. logout cannot affect later cases
+            client = Client()
+            if case.who != "anon":
+                client.force_login(fixture[case.who])
+            url = reverse(case.url_name, kwargs=case.kwargs(fixture))
+            data = case.data(fixture)
+            send = client.post if case.method == "POST" else client.get
+            # Collector pauses would otherwise land in random requests' timings
+            gc.collect()
+            gc.disable()
+            try:
+                measured[case.name] = self._measure(case.name, send, url, data, repeat)
+            finally:
+                gc.enable()
+        return measured
+
+    @staticmethod
+    def _measure(name, send, url, data, repeat):
+        timings, render = [], []
+        # One warm-up request, then `repeat` measured ones
+        for attempt in range(repeat + 1):
+            totals = [0.0]
+            # The log is a bounded deque; a wrapped log would miscount queries
+            connection.queries_log.clear()
+            with transaction.atomic(), _template_timer(totals):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = send(url, data)
+                    elapsed = (time.perf_counter() - started) * 1000
+                # Every request sees the same data, writes included
+                transaction.set_rollback(True)
+            if settings.SESSION_COOKIE_NAME in response.cookies:
+                # The session write was rolled back too; drop its cached copy
+                caches[settings.SESSION_CACHE_ALIAS].clear()
+            if response.status_code >= 400:
+                raise CommandError(f"{name}: HTTP {response.status_code} for {url}")
+            location = response.get("Location", "")
+            # A GET sent to the login page (home does so without ?next=) measures only the redirect
+            if "?next=" in location or (
+                response.request["REQUEST_METHOD"] == "GET" and location == reverse("login")
+            ):
+                raise CommandError(f"{name}: redirected to log in from {url}")
+            if attempt:
+                timings.append(elapsed)
+                render.append(totals[0] * 1000)
+        return {
+            "p50_ms": round(_percentile(timings, 0.5), 2),
+            "p95_ms": round(_percentile(timings, 0.95), 2),
+            "queries": len(queries),
+            "render_ms": round(_percentile(render, 0.5), 2),
+        }
+
+    def _report(self, results, baseline, latencies, options):
+        regressions = 0
+        for size, views in results.items():
+            self.stdout.write(f"\n--scale {size}")
+            self.stdout.write(f"{'view':<32}{'p50':>9}{'p95':>9}{'render':>9}{'queries':>9}")
+            for name, numbers in views.items():
+                expected = baseline.get(size, {}).get(name)
+                problems = []
+                if expected and numbers["queries"] > expected["queries"]:
+                    problems.append(f"queries {expected['queries']} -> {numbers['queries']}")
+                expected_latency = latencies.get(size, {}).get(name)
+                if expected_latency:
+                    # The tail is noisier than the median, so it gets twice the headroom
+                    for key, threshold in (
+                        ("p50_ms", options["threshold"]), ("p95_ms", 2 * options["threshold"]),
+                    ):
+                        was = expected_latency[key]
+                        if numbers[key] > max(was * (1 + threshold), was + options["min_ms"]):
+                            problems.append(f"{key[:3]} {was} -> {numbers[key]} ms")
+                line = (
+                    f"{name:<32}{numbers['p50_ms']:>7.1f}ms{numbers['p95_ms']:>7.1f}ms"
+                    f"{numbers['render_ms']:>7.1f}ms{numbers['queries']:>9}"
+                )
+                if problems:
+                    regressions += 1
+                    self.stdout.write(self.style.ERROR(f"{line}  REGRESSION: {'; '.join(problems)}"))
+                elif expected is None:
+                    self.stdout.write(f"{line}  (no baseline)")
+                else:
+                    self.stdout.write(line)
+        return regressions
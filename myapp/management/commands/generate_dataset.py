@@ -0,0 +1,265 @@
+import multiprocessing
+import random
+import time
+from datetime import date
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import Max
+from django.utils.text import slugify
+
+from myapp.cache import bump_catalog_version
+from myapp.models import (
+    Category,
+    Course,
+    Course_detail,
+    CustomUser,
+    Enrollment,
+    Module,
+    Option,
+    Question,
+    Quiz,
+)
+from myapp.search import fts_available, rebuild_index
+
+# --scale 1 = 1,000 courses and 10,000 users; --scale 100 is production size
+COURSES_PER_SCALE = 1000
+USERS_PER_SCALE = 10_000
+
+CATEGORY_NAMES = [
+    "Computer Science", "Business Management", "Design & Creativity", "Health & Lifestyle",
+    "Data Science", "Languages", "Marketing", "Finance", "Photography", "Music",
+    "Personal Development", "Engineering", "Mathematics", "Writing", "Cloud & DevOps",
+    "Security", "Teaching", "Law", "Science", "Cooking",
+]
+TOPICS = [
+    "Python", "Django", "SQL", "Machine Learning", "Leadership", "Negotiation", "Figma",
+    "Photoshop", "Yoga", "Nutrition", "Statistics", "Excel", "Public Speaking", "Kubernetes",
+    "Linux", "Accounting", "Copywriting", "Spanish", "Guitar", "Calculus",
+]
+LEVELS = ["for Beginners", "Essentials", "Fundamentals", "in Practice", "Masterclass", "Bootcamp"]
+INSTRUCTORS = [
+    ("Dr. Alice Johnson", "PhD in Computer Science, 10+ years teaching AI & ML."),
+    ("Mr. Bob Smith", "Business consultant with 15 years of leadership experience."),
+    ("Ms. Clara Green", "Award-winning designer, passionate about creative education."),
+    ("Dr. David Brown", "Nutritionist and wellness expert for over 12 years."),
+]
+MODULE_TITLES = ["Introduction", "Core Concepts", "Intermediate Concepts", "Advanced Applications", "Capstone"]
+
+
+def _chunks(total, size):
+    return [(start, min(start + size, total)) for start in range(0, total, size)]
+
+
+def _course_chunk(task):
+    """Create courses [start, end) with details, categories, modules, quizzes,
+    questions and options. Every id is derived from the course index, so the
+    chunk needs nothing back from the database and any worker can write it."""
+    (start, end), plan = task
+    rng = random.Random(f"{plan['seed']}:courses:{start}")
+    mpc, qpq, opq = plan["modules_per_course"], plan["questions_per_quiz"], plan["options_per_question"]
+    base = plan["base"]
+    through = Course_detail.categories.through
+
+    courses, details, links, modules, quizzes, questions, options = [], [], [], [], [], [], []
+    for i in range(start, end):
+        course_id = base["course"] + i
+        topic = rng.choice(TOPICS)
+        title = f"{topic} {rng.choice(LEVELS)} {i}"
+        courses.append(Course(
+            id=course_id,
+            title=title,
+            slug=f"{slugify(title)}-{course_id}",
+            description=f"Learn {topic} step by step with hands-on projects.",
+            price=rng.choice([0, 499, 799, 999, 1499]),
+            duration=rng.choice(["4 weeks", "6 weeks", "8 weeks", "12 weeks"]),
+            start_date=date(2025, 1, 1),
+        ))
+        instructor, bio = rng.choice(INSTRUCTORS)
+        detail = Course_detail(
+            id=base["detail"] + i,
+            course_id=course_id,
+            instructor=instructor,
+            instructor_bio=bio,
+            short_description=f"A practical {topic} course.",
+            overview=f"This course provides in-depth training on {topic}.",
+            outcomes="Understand fundamentals\nApply knowledge in projects\nBuild confidence",
+            skills=f"{topic}\nProblem-solving\nCritical Thinking",
+            tools="Google Colab\nJupyter Notebook\nIndustry Software",
+            requirements="Basic computer knowledge\nWillingness to learn",
+            certificate="Certificate of Completion",
+            languages_available="English, Hindi",
+            exercises_count=rng.randint(5, 40),
+        )
+        # bulk_create skips save(), which is what fills the *_list columns
+        detail.parse_lists()
+        details.append(detail)
+        for category_id in rng.sample(plan["category_ids"], rng.randint(1, 3)):
+            links.append(through(course_detail_id=detail.id, category_id=category_id))
+
+        for m in range(mpc):
+            module_index = i * mpc + m
+            module_title = MODULE_TITLES[m % len(MODULE_TITLES)]
+            modules.append(Module(
+                id=base["module"] + module_index,
+                course_id=course_id,
+                title=f"{module_title} - {title}",
+                description=f"This is the {module_title.lower()} module of {title}.",
+            ))
+            # One quiz per module, sharing its index
+            quizzes.append(Quiz(
+                id=base["quiz"] + module_index,
+                module_id=base["module"] + module_index,
+                title=f"{module_title} Quiz - {title}",
+            ))
+            for q in range(qpq):
+                question_id = base["question"] + module_index * qpq + q
+                questions.append(Question(
+                    id=question_id,
+                    quiz_id=base["quiz"] + module_index,
+                    text=f"Question {q + 1} about {topic}?",
+                ))
+                correct = rng.randrange(opq)
+                for o in range(opq):
+                    options.append(Option(
+                        question_id=question_id, text=f"Option {o + 1}", is_correct=o == correct,
+                    ))
+
+    batch_size = plan["batch_size"]
+    with transaction.atomic():
+        Course.all_objects.bulk_create(courses, batch_size=batch_size)
+        Course_detail.objects.bulk_create(details, batch_size=batch_size)
+        through.objects.bulk_create(links, batch_size=batch_size)
+        Module.objects.bulk_create(modules, batch_size=batch_size)
+        Quiz.objects.bulk_create(quizzes, batch_size=batch_size)
+        Question.objects.bulk_create(questions, batch_size=batch_size)
+        Option.objects.bulk_create(options, batch_size=batch_size)
+    return "courses", end - start
+
+
+def _user_chunk(task):
+    """Create users [start, end) and their enrollments in existing generated courses."""
+    (start, end), plan = task
+    rng = random.Random(f"{plan['seed']}:users:{start}")
+    base = plan["base"]
+    users, enrollments = [], []
+    for j in range(start, end):
+        user_id = base["user"] + j
+        users.append(CustomUser(
+            id=user_id,
+            username=f"user{user_id}",
+            email=f"user{user_id}@example.com",
+            password=plan["password_hash"],
+        ))
+        picked = rng.sample(range(plan["courses"]), min(plan["enrollments_per_user"], plan["courses"]))
+        enrollments.extend(
+            Enrollment(user_id=user_id, course_id=base["course"] + i, is_active=rng.random() > 0.1)
+            for i in picked
+        )
+
+    with transaction.atomic():
+        CustomUser.objects.bulk_create(users, batch_size=plan["batch_size"])
+        Enrollment.objects.bulk_create(enrollments, batch_size=plan["batch_size"])
+    return "users", end - start
+
+
+def _next_id(model, manager=None):
+    manager = manager or model._default_manager
+    return (manager.aggregate(top=Max("id"))["top"] or 0) + 1
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic dataset with bulk_create: --scale N creates N*1,000 courses "
+        "(with details, categories, modules, quizzes, questions and options) and N*10,000 "
+        "users with enrollments. The same --seed always produces the same rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=float, default=1)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--workers", type=int, default=1,
+                            help="Worker processes writing chunks in parallel (needs fork).")
+        parser.add_argument("--chunk-size", type=int, default=1000,
+                            help="Courses or users written per transaction.")
+        parser.add_argument("--batch-size", type=int, default=5000,
+                            help="Rows per INSERT statement (capped by the backend).")
+        parser.add_argument("--modules-per-course", type=int, default=2)
+        parser.add_argument("--questions-per-quiz", type=int, default=5)
+        parser.add_argument("--options-per-question", type=int, default=4)
+        parser.add_argument("--enrollments-per-user", type=int, default=1)
+        parser.add_argument("--categories", type=int, default=len(CATEGORY_NAMES))
+        parser.add_argument("--password", default="password",
+                            help="Password shared by every generated user.")
+        parser.add_argument("--skip-search-index", action="store_true",
+                            help="Do not rebuild the full-text index afterwards.")
+
+    def handle(self, *args, **options):
+        courses = int(options["scale"] * COURSES_PER_SCALE)
+        users = int(options["scale"] * USERS_PER_SCALE)
+        if courses < 1:
+            raise CommandError("--scale is too small to create any course.")
+        if options["options_per_question"] < 1:
+            raise CommandError("--options-per-question must be at least 1.")
+
+        category_ids = []
+        for name in CATEGORY_NAMES[:max(1, options["categories"])]:
+            category, _ = Category.objects.get_or_create(name=name, defaults={"slug": slugify(name)})
+            category_ids.append(category.id)
+
+        plan = {
+            "seed": options["seed"],
+            "courses": courses,
+            "batch_size": options["batch_size"],
+            "modules_per_course": options["modules_per_course"],
+            "questions_per_quiz": options["questions_per_quiz"],
+            "options_per_question": options["options_per_question"],
+            "enrollments_per_user": options["enrollments_per_user"],
+            "category_ids": category_ids,
+            # Hashing once instead of per user is most of the speed-up for users
+            "password_hash": make_password(options["password"]),
+            "base": {
+                "course": _next_id(Course, Course.all_objects),
+                "detail": _next_id(Course_detail),
+                "module": _next_id(Module),
+                "quiz": _next_id(Quiz),
+                "question": _next_id(Question),
+                "user": _next_id(CustomUser),
+            },
+        }
+
+        started = time.perf_counter()
+        chunk = options["chunk_size"]
+        # Users enroll in the generated courses, so all courses are committed first
+        self._run(_course_chunk, [(c, plan) for c in _chunks(courses, chunk)], options["workers"])
+        self._run(_user_chunk, [(c, plan) for c in _chunks(users, chunk)], options["workers"])
+
+        questions = courses * options["modules_per_course"] * options["questions_per_quiz"]
+        self.stdout.write(
+            f"Created {courses} courses, {courses * options['modules_per_course']} modules/quizzes, "
+            f"{questions} questions, {questions * options['options_per_question']} options, "
+            f"{users} users and {users * min(options['enrollments_per_user'], courses)} enrollments "
+            f"in {time.perf_counter() - started:.1f} s."
+        )
+
+        # bulk_create sends no signals: refresh what the signal handlers maintain
+        if fts_available() and not options["skip_search_index"]:
+            self.stdout.write(f"Indexed {rebuild_index()} courses for search.")
+        bump_catalog_version()
+
+    def _run(self, func, tasks, workers):
+        total = sum(end - start for (start, end), _ in tasks)
+        done = 0
+        if workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+            # Children must not share the parent's database connections
+            connections.close_all()
+            with multiprocessing.get_context("fork").Pool(workers, initializer=connections.close_all) as pool:
+                for label, count in pool.imap_unordered(func, tasks):
+                    done += count
+                    self.stdout.write(f"  {label}: {done}/{total}")
+            return
+        for task in tasks:
+            label, count = func(task)
+            done += count
+            self.stdout.write(f"  {label}: {done}/{total}")
@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from myapp.cache import bump_catalog_version
+from myapp.images import build_renditions
+from myapp.models import Course
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the resized WebP/JPEG renditions of course images (see myapp/images.py) "
+        "for courses that do not have them yet, e.g. after deploying or after bulk imports."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true",
+                            help="Rebuild the record of every course, not only missing or stale ones.")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        # Courses sharing an image (the default one, typically) are resized once
+        records = {}
+        updated = failed = 0
+        last_pk = 0
+        # Walk the table in primary-key batches so no cursor stays open across writes
+        while True:
+            batch = list(
+                Course.all_objects.filter(pk__gt=last_pk).order_by("pk")
+                .only("image", "image_renditions")[:options["batch_size"]]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            for course in batch:
+                if not course.image:
+                    continue
+                if not options["force"] and course.image_renditions.get("source") == course.image.name:
+                    continue
+                name = course.image.name
+                if name not in records:
+                    try:
+                        records[name] = build_renditions(course.image)
+                    except Exception as exc:
+                        self.stderr.write(f"Course {course.pk}: cannot read {name}: {exc}")
+                        records[name] = None
+                if records[name] is None:
+                    failed += 1
+                    continue
+                Course.all_objects.filter(pk=course.pk).update(
+                    image_renditions=records[name], updated_at=timezone.now()
+                )
+                updated += 1
+
+        if updated:
+            bump_catalog_version()
+        self.stdout.write(
+            f"Updated {updated} courses from {len(records)} images "
+            f"({failed} failed) in {time.perf_counter() - started:.1f} s."
+        )
@@ -0,0 +1,290 @@
+import json
+import re
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import BooleanField
+from django.db.models.lookups import Exact, In, IsNull
+
+from myapp.api import course_list_queryset
+from myapp.course_state import course_states_queryset
+from myapp.models import (
+    Category,
+    Course,
+    Course_detail,
+    CustomUser,
+    Enrollment,
+    Module,
+    Question,
+    SuggestedCourse,
+    Wishlist,
+)
+from myapp.pagination import CURSOR_NEXT, KeysetPaginator
+from myapp.views import (
+    available_course_rows,
+    category_course_ids,
+    category_courses_by_ids,
+    category_courses_by_membership,
+)
+
+BASELINE_PATH = Path(__file__).resolve().parents[2] / "queryplan_baseline.json"
+
+# SQLite plans differently with no statistics, with those of a small database
+# and with those sqlite_maintenance gathers on a big one, so the audit plans
+# against pinned statistics instead of the database's own: every table holds
+# PINNED_TABLE_ROWS rows and every column value repeats PINNED_ROWS_PER_VALUE
+# times (SQLite's default guess), except boolean and choices columns.
+PINNED_TABLE_ROWS = 100_000
+PINNED_ROWS_PER_VALUE = 10
+
+_SCAN_RE = re.compile(r"^SCAN (\w+)(?: AS (\w+))?(.*)$")
+_TEMP_BTREE_RE = re.compile(r"USE TEMP B-TREE FOR (.+)$")
+_AUTOMATIC_INDEX_RE = re.compile(r"AUTOMATIC (?:COVERING |PARTIAL )*INDEX ON (\w+)\((.*)\)")
+
+
+def _audited_querysets():
+    """
+    (name, queryset) for every queryset the views in myapp/views.py and myapp/api.py run.
+
+    The querysets come from the same helpers the views call. Unsaved
+    placeholder instances stand in for request data: EXPLAIN only needs the
+    shape of the query, not matching rows.
+    """
+    user = CustomUser(pk=1)
+    category = Category(pk=1, slug="category")
+    position = (datetime(2025, 1, 1, tzinfo=timezone.utc), 1, CURSOR_NEXT)
+
+    home = KeysetPaginator(Course.objects.all(), 9)
+    api_columns = ("id", "title", "created_at")
+
+    return [
+        ("home.suggested", SuggestedCourse.objects.select_related("course")),
+        ("home.categories", Category.objects.all()),
+        ("home.page", home.offset_queryset(1)),
+        ("home.shallow_count", home.shallow_count_queryset()),
+        ("home.cursor_page", home.cursor_queryset(position)),
+        ("home.cards", Course.all_objects.filter(id__in=[1, 2, 3])),
+        ("category_courses.category", Category.objects.filter(slug="category")),
+        ("category_courses.ids", category_course_ids(category)),
+        ("category_courses.sparse_page",
+            KeysetPaginator(category_courses_by_ids([1, 2, 3]), 9).offset_queryset(1)),
+        ("category_courses.dense_page",
+            KeysetPaginator(category_courses_by_membership(category), 9).offset_queryset(1)),
+        ("course_detail.course", Course.all_objects.select_related("details").filter(slug="course")),
+        ("course_detail.state", course_states_queryset(user, [1])),
+        ("quiz_detail.questions", Question.objects.filter(quiz_id=1).order_by("id")),
+        ("my_courses.enrollments", Enrollment.objects.filter(user=user, is_active=True)),
+        ("wishlist_page.items", Wishlist.objects.filter(user=user).select_related("course")),
+        ("manage_suggested_courses.suggested", SuggestedCourse.objects.select_related("course")),
+        ("manage_suggested_courses.available", Course.objects.all()),
+        ("manage_categories.categories", Category.objects.all()),
+        ("manage_category_courses.members", category.courses.select_related("course")),
+        ("manage_category_courses.available", available_course_rows(category)[:21]),
+        ("api_courses.page", course_list_queryset(position=position).values(*api_columns)[:21]),
+        ("api_courses.category", course_list_queryset("category").values(*api_columns)[:21]),
+        ("api_course_detail.categories", Course_detail.categories.through.objects.filter(
+            course_detail__course_id=1).order_by("category_id").values_list("category_id", "category__name")),
+        ("api_course_outline.modules", Module.objects.filter(course_id=1).order_by("id", "quizzes__id")
+            .values_list("id", "quizzes__id")),
+        ("api_categories.page", Category.objects.filter(id__gt=1).order_by("id").values("id", "name")[:21]),
+    ]
+
+
+def _values_per_column(field):
+    if isinstance(field, BooleanField):
+        return 2
+    if field is not None and field.choices:
+        return len(field.choices)
+    return PINNED_TABLE_ROWS // PINNED_ROWS_PER_VALUE
+
+
+def _pinned_stats(cursor):
+    """sqlite_stat1 rows (table, index, stat) for every model table in the database."""
+    existing = set(connection.introspection.table_names(cursor))
+    rows = []
+    for table, model in _table_models().items():
+        if table not in existing:
+            continue
+        fields = {field.column: field for field in model._meta.concrete_fields}
+        rows.append((table, None, str(PINNED_TABLE_ROWS)))
+        cursor.execute(f"PRAGMA index_list({connection.ops.quote_name(table)})")
+        for _, index, unique, *_ in cursor.fetchall():
+            cursor.execute(f"PRAGMA index_info({connection.ops.quote_name(index)})")
+            stat = [PINNED_TABLE_ROWS]
+            for _, _, column in sorted(cursor.fetchall()):
+                stat.append(max(1, stat[-1] // _values_per_column(fields.get(column))))
+            if unique:
+                stat[-1] = 1
+            rows.append((table, index, " ".join(map(str, stat))))
+    return rows
+
+
+@contextmanager
+def pinned_statistics():
+    """Plan with _pinned_stats() in place of the database's statistics, then restore them."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE name LIKE 'sqlite_stat%'")
+        stat_tables = [name for name, in cursor.fetchall()]
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # Creates sqlite_stat1 when the database has never been analyzed
+            cursor.execute("ANALYZE sqlite_master")
+            for table in stat_tables:
+                cursor.execute(f"DELETE FROM {table}")
+            cursor.executemany(
+                "INSERT INTO sqlite_stat1 (tbl, idx, stat) VALUES (%s, %s, %s)",
+                _pinned_stats(cursor),
+            )
+            # Makes the planner reload the statistics
+            cursor.execute("ANALYZE sqlite_master")
+        try:
+            yield
+        finally:
+            transaction.set_rollback(True)
+    if stat_tables:
+        # Rolling back a new sqlite_stat1 resets the planner; existing tables need a reload
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE sqlite_master")
+
+
+def _explain(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+        return [row[3] for row in cursor.fetchall()]
+
+
+def _table_models():
+    from django.apps import apps
+    return {model._meta.db_table: model for model in apps.get_models(include_auto_created=True)}
+
+
+def _lookups(node):
+    """Yield the leaf lookups of a WHERE tree."""
+    for child in getattr(node, "children", ()):
+        if hasattr(child, "children"):
+            yield from _lookups(child)
+        else:
+            yield child
+
+
+def _suggest_index(queryset, table):
+    """
+    Suggest a composite index for table from the query's own filters and ordering:
+    equality columns first, then the ORDER BY (or range) columns.
+    """
+    model = _table_models().get(table)
+    if model is None:
+        return None
+    equality, other = [], []
+    for node in _lookups(queryset.query.where):
+        lhs = getattr(node, "lhs", None)
+        target = getattr(lhs, "target", None)
+        if target is None or target.model._meta.db_table != table:
+            continue
+        name = target.name
+        bucket = equality if isinstance(node, (Exact, In, IsNull)) else other
+        if name not in equality and name not in other:
+            bucket.append(name)
+
+    ordering = []
+    if queryset.model is model:
+        field_names = {f.name for f in model._meta.concrete_fields}
+        for name in queryset.query.order_by or model._meta.ordering:
+            if isinstance(name, str) and name.lstrip("-") in field_names:
+                ordering.append(name)
+    fields = list(dict.fromkeys(equality + (ordering or other)))
+    if not fields:
+        return None
+    return f"{model.__name__}({', '.join(fields)})"
+
+
+def audit_queryset(queryset):
+    """Return [(kind, table, detail, suggestion)] findings for one queryset."""
+    has_where = bool(queryset.query.where)
+    has_limit = queryset.query.high_mark is not None
+    findings = []
+    for detail in _explain(queryset):
+        scan = _SCAN_RE.match(detail)
+        if scan:
+            table, how = scan.group(1), scan.group(3)
+            if table in ("CONSTANT", "subquery") or "INDEX" in how or "PRIMARY KEY" in how:
+                continue
+            # Reading a whole unfiltered, unlimited table is the point of the query
+            if has_where or has_limit:
+                findings.append(("full-scan", table, detail, _suggest_index(queryset, table)))
+            continue
+        temp = _TEMP_BTREE_RE.search(detail)
+        if temp:
+            findings.append((
+                "temp-btree", queryset.model._meta.db_table, detail,
+                _suggest_index(queryset, queryset.model._meta.db_table),
+            ))
+            continue
+        automatic = _AUTOMATIC_INDEX_RE.search(detail)
+        if automatic:
+            table = automatic.group(1)
+            model = _table_models().get(table)
+            label = model.__name__ if model else table
+            findings.append(("missing-index", table, detail, f"{label}({automatic.group(2)})"))
+    return findings
+
+
+class Command(BaseCommand):
+    help = (
+        "Run EXPLAIN QUERY PLAN on the querysets behind every view, flag full table "
+        "scans, temp B-tree sorts and automatic (missing) indexes, suggest composite "
+        "indexes, and exit non-zero when a finding is not in the checked-in baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--baseline", default=str(BASELINE_PATH),
+            help="JSON file of accepted findings (default: myapp/queryplan_baseline.json).",
+        )
+        parser.add_argument(
+            "--update-baseline", action="store_true",
+            help="Accept the current findings by writing them to the baseline file.",
+        )
+        parser.add_argument("--verbose-plans", action="store_true", help="Print every query plan.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("queryplan_audit reads SQLite's EXPLAIN QUERY PLAN output.")
+
+        current = {}
+        with pinned_statistics():
+            for name, queryset in _audited_querysets():
+                if options["verbose_plans"]:
+                    self.stdout.write(f"{name}:")
+                    for detail in _explain(queryset):
+                        self.stdout.write(f"    {detail}")
+                for kind, table, detail, suggestion in audit_queryset(queryset):
+                    current[f"{name}: {kind} {table}"] = suggestion
+
+        baseline_path = Path(options["baseline"])
+        if options["update_baseline"]:
+            baseline_path.write_text(json.dumps(sorted(current), indent=2) + "\n")
+            self.stdout.write(self.style.SUCCESS(
+                f"Wrote {len(current)} accepted findings to {baseline_path}."
+            ))
+            return
+
+        accepted = set(json.loads(baseline_path.read_text())) if baseline_path.exists() else set()
+        regressions = []
+        for key, suggestion in sorted(current.items()):
+            hint = f"  -> consider an index on {suggestion}" if suggestion else ""
+            if key in accepted:
+                self.stdout.write(f"accepted   {key}{hint}")
+            else:
+                regressions.append(key)
+                self.stdout.write(self.style.ERROR(f"REGRESSION {key}{hint}"))
+        for key in sorted(accepted - set(current)):
+            self.stdout.write(self.style.SUCCESS(f"fixed      {key} (remove it from the baseline)"))
+
+        if regressions:
+            raise CommandError(f"{len(regressions)} query plan regression(s) found.")
+        self.stdout.write(self.style.SUCCESS("No query plan regressions."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from myapp.search import fts_available, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the FTS5 course search index from the course and course detail tables."
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            raise CommandError("Full-text search needs the SQLite backend.")
+        with transaction.atomic():
+            count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} courses."))
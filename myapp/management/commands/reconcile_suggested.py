@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from myapp.cache import bump_catalog_version
+from myapp.models import Course, SuggestedCourse
+
+
+class Command(BaseCommand):
+    help = "Repair Course.is_suggested so it matches the SuggestedCourse table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Only report how many courses have drifted."
+        )
+
+    def handle(self, *args, **options):
+        has_suggestion = Exists(SuggestedCourse.objects.filter(course=OuterRef("pk")))
+        missing_flag = Course.all_objects.filter(has_suggestion, is_suggested=False)
+        stale_flag = Course.all_objects.filter(~has_suggestion, is_suggested=True)
+
+        if options["dry_run"]:
+            self.stdout.write(
+                f"{missing_flag.count()} suggested courses are not flagged, "
+                f"{stale_flag.count()} flagged courses are not suggested."
+            )
+            return
+
+        with transaction.atomic():
+            flagged = missing_flag.update(is_suggested=True)
+            cleared = stale_flag.update(is_suggested=False)
+        if flagged or cleared:
+            # update() skips the save signals that normally invalidate cached listings
+            bump_catalog_version()
+        self.stdout.write(
+            self.style.SUCCESS(f"Flagged {flagged} courses, cleared {cleared} courses.")
+        )
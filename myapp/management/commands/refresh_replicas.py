@@ -0,0 +1,56 @@
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from myapp.routers import catalog_replicas
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh the SQLite catalog replicas (CATALOG_REPLICAS) from the primary with "
+        "the online backup API. With --interval it keeps refreshing every N seconds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval", type=float, default=0,
+            help="Refresh every N seconds until interrupted (default: refresh once).",
+        )
+        parser.add_argument(
+            "--pages", type=int, default=1000,
+            help="Pages copied per backup step; the primary stays writable between steps.",
+        )
+
+    def handle(self, *args, **options):
+        replicas = catalog_replicas()
+        if not replicas:
+            raise CommandError("CATALOG_REPLICAS is empty; there is nothing to refresh.")
+        for alias in (DEFAULT_DB_ALIAS, *replicas):
+            if connections[alias].vendor != "sqlite":
+                raise CommandError(f"Database '{alias}' is not SQLite; use the server's own replication.")
+
+        while True:
+            for alias in replicas:
+                started = time.perf_counter()
+                self._refresh(alias, options["pages"])
+                self.stdout.write(
+                    f"Refreshed '{alias}' in {(time.perf_counter() - started) * 1000:.0f} ms."
+                )
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
+
+    @staticmethod
+    def _refresh(alias, pages):
+        primary = connections[DEFAULT_DB_ALIAS]
+        primary.ensure_connection()
+        # A separate connection, so Django's own connection to the replica (and
+        # its open transactions) are not involved in the copy
+        target = sqlite3.connect(connections[alias].settings_dict["NAME"], timeout=30)
+        try:
+            primary.connection.backup(target, pages=pages)
+        finally:
+            target.close()
+        primary.close_if_unusable_or_obsolete()
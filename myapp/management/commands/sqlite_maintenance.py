@@ -0,0 +1,83 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from myapp.db import sqlite_journal_mode
+
+# sqlite3 PRAGMA auto_vacuum values
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+class Command(BaseCommand):
+    help = (
+        "Routine SQLite maintenance, meant to run on deploy and from cron: switch to "
+        "SQLITE_JOURNAL_MODE, PRAGMA optimize (or a full ANALYZE), an incremental vacuum "
+        "of free pages and a WAL checkpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--analyze", action="store_true",
+            help="Run a full ANALYZE instead of letting PRAGMA optimize decide what to analyze.",
+        )
+        parser.add_argument(
+            "--vacuum-pages", type=int, default=0,
+            help="Free pages to release per run (default 0 = all of them).",
+        )
+        parser.add_argument(
+            "--enable-incremental-vacuum", action="store_true",
+            help="One-off: switch the database to auto_vacuum=INCREMENTAL. "
+                 "Rewrites the whole file with VACUUM, so run it off-peak.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("sqlite_maintenance only applies to the SQLite backend.")
+
+        with connection.cursor() as cursor:
+            # Stored in the file, so one switch lasts for every later connection
+            wanted = sqlite_journal_mode().lower()
+            cursor.execute("PRAGMA journal_mode")
+            if cursor.fetchone()[0].lower() != wanted:
+                cursor.execute(f"PRAGMA journal_mode = {wanted}")
+                self.stdout.write(f"Switched to journal_mode={cursor.fetchone()[0]}.")
+
+            if options["enable_incremental_vacuum"]:
+                cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                cursor.execute("VACUUM")
+                self.stdout.write("Switched to auto_vacuum=INCREMENTAL.")
+
+            if options["analyze"]:
+                cursor.execute("ANALYZE")
+                self.stdout.write("ANALYZE done.")
+            else:
+                # Only re-analyzes tables whose statistics are stale or missing
+                cursor.execute("PRAGMA optimize")
+                self.stdout.write("PRAGMA optimize done.")
+
+            cursor.execute("PRAGMA auto_vacuum")
+            auto_vacuum = cursor.fetchone()[0]
+            cursor.execute("PRAGMA freelist_count")
+            free_pages = cursor.fetchone()[0]
+            if auto_vacuum == AUTO_VACUUM_INCREMENTAL:
+                cursor.execute(f"PRAGMA incremental_vacuum({int(options['vacuum_pages'])})")
+                cursor.fetchall()
+                cursor.execute("PRAGMA freelist_count")
+                released = free_pages - cursor.fetchone()[0]
+                self.stdout.write(f"Released {released} of {free_pages} free pages.")
+            elif free_pages:
+                self.stdout.write(
+                    f"{free_pages} free pages; run with --enable-incremental-vacuum once "
+                    "to let later runs release them."
+                )
+
+            cursor.execute("PRAGMA journal_mode")
+            if cursor.fetchone()[0].lower() == "wal":
+                # Fold the WAL back into the database file and truncate it
+                cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                busy, log_pages, checkpointed = cursor.fetchone()
+                if busy:
+                    self.stdout.write("WAL checkpoint was blocked by an open reader; it will catch up next run.")
+                else:
+                    self.stdout.write(f"WAL checkpoint: {checkpointed} of {log_pages} pages.")
+
+        self.stdout.write(self.style.SUCCESS("SQLite maintenance complete."))
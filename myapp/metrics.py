@@ -0,0 +1,282 @@
+# myapp/metrics.py
+"""
+Per-view request metrics in Prometheus text format.
+
+``MetricsMiddleware`` records, per resolved URL name, method and status class:
+request count, a latency histogram, SQL query count and time (an execute
+wrapper installed on every connection), template render time (with
+``METRICS_TIME_TEMPLATES``, ``Template.render`` is wrapped once at startup) and
+response bytes. It works under WSGI and ASGI.
+
+Each process keeps its series in a flat dict behind one lock; a request costs
+a couple of dozen dict increments. With ``METRICS_SHARED_PATH`` set, every
+process also adds its deltas to an SQLite file at most every
+``METRICS_FLUSH_INTERVAL`` seconds, so ``/manage/metrics/`` reports the sum
+over all gunicorn workers rather than whichever worker answered the scrape.
+"""
+import bisect
+import math
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.template.base import Template
+
+PREFIX = "myapp_http"
+KNOWN_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name: (type, help)
+FAMILIES = {
+    f"{PREFIX}_requests_total": ("counter", "Requests handled."),
+    f"{PREFIX}_request_duration_seconds": ("histogram", "Time spent handling the request."),
+    f"{PREFIX}_db_queries_total": ("counter", "SQL queries executed."),
+    f"{PREFIX}_db_query_seconds_total": ("counter", "Time spent executing SQL."),
+    f"{PREFIX}_template_render_seconds_total": ("counter", "Time spent rendering templates."),
+    f"{PREFIX}_response_bytes_total": ("counter", "Response body bytes (non-streaming responses)."),
+}
+
+# Per-request accumulator: [query count, query seconds, template seconds, template depth]
+_current = ContextVar("request_metrics", default=None)
+
+
+def _series(name, labels, extra=""):
+    text = ",".join(f'{key}="{value}"' for key, value in labels)
+    if extra:
+        text = f"{text},{extra}" if text else extra
+    return f"{name}{{{text}}}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+        self._unflushed = defaultdict(float)
+        self._last_flush = time.monotonic()
+        # (view, method, status) -> series names, built once per label set
+        self._names = {}
+
+    def _series_names(self, labels):
+        names = self._names.get(labels)
+        if names is None:
+            pairs = tuple(zip(("view", "method", "status"), labels))
+            names = (
+                _series(f"{PREFIX}_requests_total", pairs),
+                _series(f"{PREFIX}_request_duration_seconds_sum", pairs),
+                _series(f"{PREFIX}_request_duration_seconds_count", pairs),
+                _series(f"{PREFIX}_db_queries_total", pairs),
+                _series(f"{PREFIX}_db_query_seconds_total", pairs),
+                _series(f"{PREFIX}_template_render_seconds_total", pairs),
+                _series(f"{PREFIX}_response_bytes_total", pairs),
+                tuple(
+                    _series(f"{PREFIX}_request_duration_seconds_bucket", pairs, f'le="{bound}"')
+                    for bound in (*LATENCY_BUCKETS, "+Inf")
+                ),
+            )
+            self._names[labels] = names
+        return names
+
+    def observe(self, view, method, status, seconds, queries, query_seconds,
+                template_seconds, response_bytes):
+        *names, buckets = self._series_names((view, method, status))
+        amounts = (1, seconds, 1, queries, query_seconds, template_seconds, response_bytes)
+        # Cumulative buckets, as Prometheus expects them: every bucket from the first bound >= seconds
+        first_bucket = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+
+        with self._lock:
+            values, unflushed = self._values, self._unflushed
+            if buckets[0] not in values:
+                # Export the whole histogram, empty buckets included, in bucket order
+                for name in (*names, *buckets):
+                    values[name] = 0
+            for name, amount in zip(names, amounts):
+                values[name] += amount
+                unflushed[name] += amount
+            for name in buckets[first_bucket:]:
+                values[name] += 1
+                unflushed[name] += 1
+        shared = _shared_path()
+        if shared and time.monotonic() - self._last_flush >= _flush_interval():
+            self.flush(shared)
+
+    def flush(self, path):
+        """Add the deltas since the last flush to the shared SQLite file."""
+        with self._lock:
+            deltas, self._unflushed = self._unflushed, defaultdict(float)
+            self._last_flush = time.monotonic()
+        if not deltas:
+            return
+        try:
+            db = sqlite3.connect(path, timeout=5)
+            try:
+                with db:
+                    db.execute("CREATE TABLE IF NOT EXISTS metrics (series TEXT PRIMARY KEY, value REAL NOT NULL)")
+                    db.executemany(
+                        "INSERT INTO metrics (series, value) VALUES (?, ?) "
+                        "ON CONFLICT (series) DO UPDATE SET value = value + excluded.value",
+                        deltas.items(),
+                    )
+            finally:
+                db.close()
+        except sqlite3.Error:
+            # Keep the deltas for the next flush rather than losing them
+            with self._lock:
+                for key, value in deltas.items():
+                    self._unflushed[key] += value
+
+    def collect(self):
+        """{series: value} for this process, or for all processes when shared."""
+        shared = _shared_path()
+        if not shared:
+            with self._lock:
+                return dict(self._values)
+        self.flush(shared)
+        try:
+            db = sqlite3.connect(shared, timeout=5)
+            try:
+                return dict(db.execute("SELECT series, value FROM metrics"))
+            finally:
+                db.close()
+        except sqlite3.Error:
+            return {}
+
+
+def _shared_path():
+    return getattr(settings, "METRICS_SHARED_PATH", None)
+
+
+def _flush_interval():
+    return getattr(settings, "METRICS_FLUSH_INTERVAL", 10)
+
+
+def _sort_key(item):
+    # Histogram buckets in ascending le order, "+Inf" last
+    series, _ = item
+    head, _, le = series.partition(',le="')
+    return head, float(le.rstrip('"}').replace("+Inf", "inf")) if le else -math.inf
+
+
+def render_prometheus(values):
+    """Prometheus text exposition (format 0.0.4) of {series: value}."""
+    by_family = defaultdict(list)
+    for series, value in values.items():
+        name = series.split("{", 1)[0]
+        for suffix in ("_bucket", "_sum", "_count"):
+            base = name[: -len(suffix)]
+            if name.endswith(suffix) and FAMILIES.get(base, ("",))[0] == "histogram":
+                name = base
+                break
+        by_family[name].append((series, value))
+
+    lines = []
+    for name in sorted(by_family):
+        kind, help_text = FAMILIES.get(name, ("untyped", ""))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for series, value in sorted(by_family[name], key=_sort_key):
+            lines.append(f"{series} {int(value) if float(value).is_integer() else repr(value)}")
+    return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def _time_queries(execute, sql, params, many, context):
+    state = _current.get()
+    if state is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        state[0] += 1
+        state[1] += time.perf_counter() - started
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """
+    connection_created receiver: time every query of the connection. Installed
+    per connection rather than per request, so queries are counted whichever
+    thread runs them (sync views under ASGI, myapp.db.run_db pool threads);
+    outside a measured request _time_queries costs one ContextVar lookup.
+    """
+    if _time_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_queries)
+
+
+_template_render = Template.render
+
+
+def _timed_template_render(self, context):
+    state = _current.get()
+    if state is None:
+        return _template_render(self, context)
+    # Included templates render inside their parent: only time the outermost
+    state[3] += 1
+    started = time.perf_counter()
+    try:
+        return _template_render(self, context)
+    finally:
+        state[3] -= 1
+        if not state[3]:
+            state[2] += time.perf_counter() - started
+
+
+def install_template_timer():
+    """
+    Time Template.render for MetricsMiddleware. Called once from
+    MyappConfig.ready() when the middleware is installed and METRICS_TIME_TEMPLATES
+    is on; outside a measured request the wrapper costs one ContextVar lookup.
+    """
+    if Template.render is not _timed_template_render:
+        Template.render = _timed_template_render
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = [0, 0.0, 0.0, 0]
+        token = _current.set(state)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._observe(request, response, state, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        state = [0, 0.0, 0.0, 0]
+        token = _current.set(state)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._observe(request, response, state, time.perf_counter() - started)
+
+    @staticmethod
+    def _observe(request, response, state, elapsed):
+        match = getattr(request, "resolver_match", None)
+        # Unresolved paths (404s) share one label so scanners cannot blow up the series count
+        view = match.view_name if match else "<unresolved>"
+        size = 0 if response.streaming else len(response.content)
+        method = request.method if request.method in KNOWN_METHODS else "OTHER"
+        registry.observe(
+            view, method, f"{response.status_code // 100}xx", elapsed,
+            state[0], state[1], state[2], size,
+        )
+        return response
@@ -0,0 +1,39 @@
+from django.db import migrations
+
+FTS_TABLE = "myapp_course_fts"
+
+
+def create_fts_table(apps, schema_editor):
+    # FTS5 is SQLite-only; other backends fall back to icontains in myapp.search
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        "title, description, short_description, overview, skills, tools, instructor, "
+        "tokenize = 'porter unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        f"INSERT INTO {FTS_TABLE} "
+        "(rowid, title, description, short_description, overview, skills, tools, instructor) "
+        "SELECT c.id, c.title, c.description, "
+        "COALESCE(d.short_description, ''), COALESCE(d.overview, ''), "
+        "COALESCE(d.skills, ''), COALESCE(d.tools, ''), COALESCE(d.instructor, '') "
+        "FROM myapp_course c LEFT JOIN myapp_course_detail d ON d.course_id = c.id"
+    )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0004_quizattempt_quizanswer'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
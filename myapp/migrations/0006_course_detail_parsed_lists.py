@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:31
+
+from django.db import migrations, models
+
+
+def _split_items(text):
+    # Same rules as Course_detail._split_items (historical models have no methods)
+    items = []
+    for line in text.splitlines():
+        for item in line.split(','):
+            cleaned = item.strip()
+            if cleaned:
+                items.append(cleaned)
+    return items
+
+
+BATCH_SIZE = 500
+
+
+def fill_parsed_lists(apps, schema_editor):
+    Course_detail = apps.get_model('myapp', 'Course_detail')
+    last_pk = 0
+    # Primary-key batches: memory stays flat and no cursor is open across writes
+    while True:
+        details = list(Course_detail.objects.filter(pk__gt=last_pk).order_by('pk')[:BATCH_SIZE])
+        if not details:
+            break
+        for detail in details:
+            detail.overview_list = [line.strip() for line in detail.overview.splitlines() if line.strip()]
+            detail.outcomes_list = _split_items(detail.outcomes)
+            detail.skills_list = _split_items(detail.skills)
+            detail.tools_list = _split_items(detail.tools)
+            detail.requirements_list = _split_items(detail.requirements)
+        Course_detail.objects.bulk_update(
+            details,
+            ['overview_list', 'outcomes_list', 'skills_list', 'tools_list', 'requirements_list'],
+            batch_size=BATCH_SIZE,
+        )
+        last_pk = details[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0005_course_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course_detail',
+            name='outcomes_list',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course_detail',
+            name='overview_list',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course_detail',
+            name='requirements_list',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course_detail',
+            name='skills_list',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course_detail',
+            name='tools_list',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.RunPython(fill_parsed_lists, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:33
+
+from django.db import migrations, models
+
+
+def mark_suggested_courses(apps, schema_editor):
+    Course = apps.get_model('myapp', 'Course')
+    SuggestedCourse = apps.get_model('myapp', 'SuggestedCourse')
+    Course.objects.filter(
+        id__in=SuggestedCourse.objects.values('course_id')
+    ).update(is_suggested=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0006_course_detail_parsed_lists'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='is_suggested',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(condition=models.Q(('is_suggested', False)), fields=['created_at', 'id'], name='course_listing_idx'),
+        ),
+        migrations.RunPython(mark_suggested_courses, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0007_course_is_suggested'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['title', 'id'], name='course_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='suggestedcourse',
+            index=models.Index(fields=['order', '-created_at'], name='suggested_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wishlist',
+            index=models.Index(fields=['user', '-created_at'], name='wishlist_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0010_course_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoginThrottleBucket',
+            fields=[
+                ('key', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('tokens', models.FloatField()),
+                ('counted_at', models.FloatField()),
+                ('allowed', models.BooleanField(default=True)),
+            ],
+        ),
+    ]
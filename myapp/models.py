@@ -1,8 +1,9 @@
 # models.py
-from django.db import models
+from django.db import models, transaction
 from django.utils.text import slugify
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
+from django.utils import timezone
 
 
 # ---------------------
@@ -13,9 +14,10 @@ class VisibleCourseManager(models.Manager):
     Default manager: returns courses that are NOT suggested.
     So Course.objects.all() will not include suggested courses.
     Use Course.all_objects to access all courses (including suggested).
+    Filters on the denormalized, indexed is_suggested flag instead of joining SuggestedCourse.
     """
     def get_queryset(self):
-        return super().get_queryset().filter(suggestedcourse__isnull=True)
+        return super().get_queryset().filter(is_suggested=False)
 
 
 # -------- User --------
@@ -34,12 +36,32 @@ class Course(models.Model):
     slug = models.SlugField(unique=True, blank=True, null=True)
     start_date = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
+    # also moved by module changes (myapp/signals.py); part of the course page's ETag
+    updated_at = models.DateTimeField(auto_now=True)
+    # kept in sync by the SuggestedCourse handlers in myapp/signals.py; repair with `manage.py reconcile_suggested`
+    is_suggested = models.BooleanField(default=False, editable=False)
+    # resized WebP/JPEG copies of image, filled after save by myapp/images.py
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
 
     # default manager: only non-suggested courses (so "all courses" section won't include suggested ones)
     objects = VisibleCourseManager()
     # full manager if you ever need to access everything (including suggested)
     all_objects = models.Manager()
 
+    class Meta:
+        indexes = [
+            # keyset pagination order used by catalog listings (see myapp/pagination.py)
+            models.Index(fields=["created_at", "id"], name="course_created_id_idx"),
+            # same order, partial on visible (non-suggested) courses for Course.objects listings
+            models.Index(
+                fields=["created_at", "id"],
+                condition=models.Q(is_suggested=False),
+                name="course_listing_idx",
+            ),
+            # title-ordered course picker on the category management page
+            models.Index(fields=["title", "id"], name="course_title_idx"),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
@@ -66,11 +88,18 @@ class Course_detail(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     categories = models.ManyToManyField('Category', related_name="courses", blank=True)
 
-    def __str__(self):
-        return f"Details for {self.course.title}"
+    # Pre-parsed versions of the text fields above, filled in save().
+    # Templates read these instead of re-splitting the text on every access.
+    overview_list = models.JSONField(default=list, blank=True, editable=False)
+    outcomes_list = models.JSONField(default=list, blank=True, editable=False)
+    skills_list = models.JSONField(default=list, blank=True, editable=False)
+    tools_list = models.JSONField(default=list, blank=True, editable=False)
+    requirements_list = models.JSONField(default=list, blank=True, editable=False)
 
+    LIST_FIELDS = ("overview_list", "outcomes_list", "skills_list", "tools_list", "requirements_list")
 
-    def _split_items(self, text):
+    @staticmethod
+    def _split_items(text):
         """
         Split text by both newlines and commas.
         Handles data entered as:
@@ -87,22 +116,36 @@ class Course_detail(models.Model):
                     items.append(cleaned)
         return items
 
-    def get_overview(self):
+    def parse_lists(self):
+        """Refresh the *_list columns from their text fields."""
         # Overview is typically paragraph text, so keep it line-based only
-        return [line.strip() for line in self.overview.splitlines() if line.strip()]
+        self.overview_list = [line.strip() for line in self.overview.splitlines() if line.strip()]
+        self.outcomes_list = self._split_items(self.outcomes)
+        self.skills_list = self._split_items(self.skills)
+        self.tools_list = self._split_items(self.tools)
+        self.requirements_list = self._split_items(self.requirements)
+
+    def save(self, *args, **kwargs):
+        self.parse_lists()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = set(update_fields) | set(self.LIST_FIELDS)
+        super().save(*args, **kwargs)
+
+    def get_overview(self):
+        return self.overview_list
 
     def get_outcomes(self):
-        return self._split_items(self.outcomes)
+        return self.outcomes_list
 
     def get_skills(self):
-        return self._split_items(self.skills)
+        return self.skills_list
 
     def get_tools(self):
-        return self._split_items(self.tools)
+        return self.tools_list
 
     def get_requirements(self):
-        return self._split_items(self.requirements)
-
+        return self.requirements_list
 
     def __str__(self):
         return f"Details for {self.course.title}"
@@ -153,6 +196,37 @@ class Option(models.Model):
     def __str__(self):
         return self.text
 
+# -------- Quiz attempts --------
+class QuizAttempt(models.Model):
+    """One graded quiz submission. Written in batches by myapp.attempts."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="quiz_attempts", null=True, blank=True)
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name="attempts")
+    correct = models.IntegerField(default=0)
+    total = models.IntegerField(default=0)
+    score = models.IntegerField(default=0)
+    submitted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ("-submitted_at",)
+        indexes = [
+            models.Index(fields=["user", "quiz", "-submitted_at"], name="attempt_user_quiz_idx"),
+        ]
+
+    def __str__(self):
+        who = self.user.username if self.user_id else "anonymous"
+        return f"{who} - {self.quiz.title} ({self.score}%)"
+
+
+class QuizAnswer(models.Model):
+    attempt = models.ForeignKey(QuizAttempt, on_delete=models.CASCADE, related_name="answers")
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name="answers")
+    selected_option = models.ForeignKey(Option, on_delete=models.SET_NULL, related_name="answers", null=True, blank=True)
+    is_correct = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"Answer to {self.question_id} in attempt {self.attempt_id}"
+
+
 # -------- Enrollment --------
 class Enrollment(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="enrollments")
@@ -177,6 +251,9 @@ class Wishlist(models.Model):
     class Meta:
         unique_together = ("user", "course")
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["user", "-created_at"], name="wishlist_user_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user.username} wishlisted {self.course.title}"
@@ -195,6 +272,41 @@ class SuggestedCourse(models.Model):
 
     class Meta:
         ordering = ["order", "-created_at"]
+        indexes = [
+            models.Index(fields=["order", "-created_at"], name="suggested_order_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember the stored course so the post_save handler can clear its flag if it changes
+        instance._loaded_course_id = instance.__dict__.get("course_id")
+        return instance
+
+    # Course.is_suggested is kept in step by the post_save/post_delete handlers in
+    # myapp.signals, which also run for queryset and cascade deletes. The overrides
+    # only put the row and the flag update in one transaction.
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
 
     def __str__(self):
         return f"Suggested: {self.course.title}"
+
+
+# -------- Login throttling --------
+class LoginThrottleBucket(models.Model):
+    """A token bucket for login attempts (per client IP or username). Written by myapp.throttle."""
+    key = models.CharField(max_length=100, primary_key=True)
+    tokens = models.FloatField()
+    # Unix time the tokens were counted at; they refill from there
+    counted_at = models.FloatField()
+    # Whether the last attempt got a token
+    allowed = models.BooleanField(default=True)
+
+    def __str__(self):
+        return f"{self.key}: {self.tokens:.1f}"
@@ -0,0 +1,243 @@
+# myapp/pagination.py
+"""
+Keyset (seek) pagination for catalog listings.
+
+Shallow pages are addressed by number (``?page=3``) and use a small OFFSET.
+Beyond ``CATALOG_OFFSET_PAGES`` the listing switches to opaque cursors
+(``?cursor=...``) that seek on the indexed ``(created_at, id)`` ordering, so
+every deep page costs the same as the first one. No full ``COUNT(*)`` is run:
+the count is capped at the number of rows the shallow pages can show.
+"""
+import base64
+import binascii
+import json
+import math
+from datetime import datetime
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db.models import Q
+
+KEYSET_ORDERING = ("created_at", "id")
+CURSOR_NEXT = "n"
+CURSOR_PREV = "p"
+
+
+def _offset_pages():
+    return getattr(settings, "CATALOG_OFFSET_PAGES", 10)
+
+
+def encode_position(created_at, pk, direction):
+    """Build an opaque cursor pointing just past (created_at, pk) in the given direction."""
+    created_at = created_at.isoformat() if created_at else None
+    raw = json.dumps([created_at, pk, direction], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def encode_cursor(obj, direction):
+    """Build an opaque cursor pointing just past obj in the given direction."""
+    return encode_position(obj.created_at, obj.pk, direction)
+
+
+def decode_cursor(token):
+    """Return (created_at, pk, direction) for a cursor, or None if it is invalid."""
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        created_at, pk, direction = json.loads(base64.urlsafe_b64decode(padded))
+        if created_at is not None:
+            created_at = datetime.fromisoformat(created_at)
+        pk = int(pk)
+    except (ValueError, TypeError, binascii.Error):
+        return None
+    if direction not in (CURSOR_NEXT, CURSOR_PREV):
+        return None
+    return created_at, pk, direction
+
+
+def seek_filter(created_at, pk, forward):
+    """Rows strictly after (forward) or before (backward) the cursor position.
+
+    The leading ``created_at`` bound lets SQLite start an index range scan
+    instead of walking the index from the beginning. NULL created_at values
+    sort first, as they do in SQLite; since the field is auto_now_add they only
+    exist in legacy rows and are reached through the numbered pages.
+    """
+    if forward:
+        if created_at is None:
+            return Q(created_at__isnull=True, id__gt=pk) | Q(created_at__isnull=False)
+        return Q(created_at__gte=created_at) & (Q(created_at__gt=created_at) | Q(id__gt=pk))
+    if created_at is None:
+        return Q(created_at__isnull=True, id__lt=pk)
+    return Q(created_at__lte=created_at) & (Q(created_at__lt=created_at) | Q(id__lt=pk))
+
+
+class CatalogPage:
+    """
+    One page of a catalog listing.
+
+    ``number`` is set for offset pages and is None for cursor pages.
+    ``next_query``/``previous_query`` are ready-made query strings for the links.
+    """
+
+    def __init__(self, object_list, number, shallow_pages, truncated,
+                 next_query=None, previous_query=None):
+        self.object_list = object_list
+        self.number = number
+        self.shallow_pages = shallow_pages
+        self.truncated = truncated
+        self.next_query = next_query
+        self.previous_query = previous_query
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def is_cursor(self):
+        return self.number is None
+
+    @property
+    def page_range(self):
+        return range(1, self.shallow_pages + 1)
+
+    def has_next(self):
+        return self.next_query is not None
+
+    def has_previous(self):
+        return self.previous_query is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def get_state(self):
+        """Picklable description of the page, with objects replaced by their pks."""
+        return {
+            "ids": [obj.pk for obj in self.object_list],
+            "number": self.number,
+            "shallow_pages": self.shallow_pages,
+            "truncated": self.truncated,
+            "next_query": self.next_query,
+            "previous_query": self.previous_query,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        return cls(
+            state["ids"],
+            state["number"],
+            state["shallow_pages"],
+            state["truncated"],
+            state["next_query"],
+            state["previous_query"],
+        )
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset on ``(created_at, id)``.
+
+    Use ``get_page(page_number, cursor)`` with the raw ``page`` and ``cursor``
+    query parameters; a valid cursor takes precedence over a page number.
+    """
+
+    def __init__(self, queryset, per_page, offset_pages=None):
+        self.queryset = queryset.order_by(*KEYSET_ORDERING)
+        self.per_page = per_page
+        self.offset_pages = offset_pages or _offset_pages()
+
+    def shallow_count_queryset(self):
+        # COUNT over a LIMITed subquery: bounded no matter how big the catalog is
+        return self.queryset[:self.offset_pages * self.per_page + 1]
+
+    def offset_queryset(self, number):
+        """Rows of shallow page ``number``, plus one to tell whether more follow."""
+        start = (number - 1) * self.per_page
+        return self.queryset[start:start + self.per_page + 1]
+
+    def cursor_queryset(self, position):
+        """Rows after (or, going back, before) a decoded cursor position, plus one."""
+        created_at, pk, direction = position
+        forward = direction == CURSOR_NEXT
+        queryset = self.queryset.filter(seek_filter(created_at, pk, forward))
+        if not forward:
+            queryset = queryset.reverse()
+        return queryset[:self.per_page + 1]
+
+    def page_key(self, page_number=None, cursor=None):
+        """
+        Normalized name of the page get_page(page_number, cursor) returns, for
+        cache keys: a cursor is re-encoded from its decoded position, and an
+        invalid cursor or page number names the page get_page falls back to.
+        """
+        position = decode_cursor(cursor)
+        if position is not None:
+            return encode_position(*position)
+        return self._page_number(page_number, self.offset_pages)
+
+    @staticmethod
+    def _page_number(page_number, last):
+        try:
+            number = int(page_number)
+        except (TypeError, ValueError):
+            number = 1
+        return min(max(number, 1), last)
+
+    def _shallow_count(self):
+        limit = self.offset_pages * self.per_page + 1
+        count = self.shallow_count_queryset().count()
+        shallow_pages = max(1, min(self.offset_pages, math.ceil(count / self.per_page)))
+        return shallow_pages, count == limit
+
+    @staticmethod
+    def _query(**params):
+        return "?" + urlencode(params)
+
+    def get_page(self, page_number=None, cursor=None):
+        shallow_pages, truncated = self._shallow_count()
+        position = decode_cursor(cursor)
+        if position is not None:
+            return self._cursor_page(position, shallow_pages, truncated)
+        return self._offset_page(page_number, shallow_pages, truncated)
+
+    def _offset_page(self, page_number, shallow_pages, truncated):
+        number = self._page_number(page_number, shallow_pages)
+
+        rows = list(self.offset_queryset(number))
+        objects = rows[:self.per_page]
+
+        next_query = None
+        if number < shallow_pages:
+            next_query = self._query(page=number + 1)
+        elif len(rows) > self.per_page:
+            # Past the last numbered page: continue with a cursor
+            next_query = self._query(cursor=encode_cursor(objects[-1], CURSOR_NEXT))
+        previous_query = self._query(page=number - 1) if number > 1 else None
+        return CatalogPage(objects, number, shallow_pages, truncated, next_query, previous_query)
+
+    def _cursor_page(self, position, shallow_pages, truncated):
+        forward = position[2] == CURSOR_NEXT
+        rows = list(self.cursor_queryset(position))
+        more = len(rows) > self.per_page
+        objects = rows[:self.per_page]
+        if not forward:
+            objects.reverse()
+
+        if not objects:
+            return CatalogPage([], None, shallow_pages, truncated,
+                               previous_query=self._query(page=1))
+
+        if forward:
+            has_next, has_previous = more, True
+        else:
+            has_next, has_previous = True, more
+        next_query = (
+            self._query(cursor=encode_cursor(objects[-1], CURSOR_NEXT)) if has_next else None
+        )
+        previous_query = (
+            self._query(cursor=encode_cursor(objects[0], CURSOR_PREV)) if has_previous else None
+        )
+        return CatalogPage(objects, None, shallow_pages, truncated, next_query, previous_query)
@@ -0,0 +1,122 @@
+# myapp/quiz.py
+"""
+Compiled quiz snapshots and grading.
+
+A quiz is compiled once into an immutable snapshot of its questions, options
+and answer key, and cached under the quiz version. The signal handlers in
+``myapp.signals`` bump that version whenever the quiz, one of its questions or
+options, or its module/course changes. Both quiz templates render from the
+snapshot and submissions are validated and scored against it in memory, so a
+quiz page costs the same number of queries whatever the quiz size.
+"""
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
+
+from .cache import bump_version, get_version
+from .models import Option, Question, Quiz
+
+QuizSnapshot = namedtuple("QuizSnapshot", "id title course_slug questions answer_key")
+QuestionSnapshot = namedtuple("QuestionSnapshot", "id text options")
+OptionSnapshot = namedtuple("OptionSnapshot", "id text is_correct")
+
+
+def quiz_version_key(quiz_id):
+    return f"quiz:{quiz_id}:version"
+
+
+def get_quiz_version(quiz_id):
+    return get_version(quiz_version_key(quiz_id))
+
+
+def bump_quiz_version(quiz_id):
+    return bump_version(quiz_version_key(quiz_id))
+
+
+def _timeout():
+    return getattr(settings, "QUIZ_CACHE_TIMEOUT", 60 * 60)
+
+
+def build_quiz_snapshot(quiz_id):
+    """Compile a quiz into a QuizSnapshot, or return None if it does not exist."""
+    quiz = (
+        Quiz.objects.filter(id=quiz_id)
+        .select_related("module__course")
+        .prefetch_related(
+            Prefetch(
+                "questions",
+                queryset=Question.objects.order_by("id").prefetch_related(
+                    Prefetch("options", queryset=Option.objects.order_by("id"))
+                ),
+            )
+        )
+        .first()
+    )
+    if quiz is None:
+        return None
+
+    questions = []
+    answer_key = {}
+    for question in quiz.questions.all():
+        options = tuple(
+            OptionSnapshot(option.id, option.text, option.is_correct)
+            for option in question.options.all()
+        )
+        questions.append(QuestionSnapshot(question.id, question.text, options))
+        # {question_id: (option_ids, correct_option_ids)}
+        answer_key[question.id] = (
+            frozenset(option.id for option in options),
+            frozenset(option.id for option in options if option.is_correct),
+        )
+    return QuizSnapshot(
+        quiz.id, quiz.title, quiz.module.course.slug, tuple(questions), answer_key
+    )
+
+
+def get_quiz_snapshot(quiz_id):
+    key = f"quiz:{quiz_id}:{get_quiz_version(quiz_id)}:snapshot"
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_quiz_snapshot(quiz_id)
+        if snapshot is not None:
+            cache.set(key, snapshot, _timeout())
+    return snapshot
+
+
+def grade_submission(snapshot, data):
+    """
+    Score submitted answers against a quiz snapshot.
+
+    ``data`` maps ``question_<id>`` to the selected option id (e.g. request.POST).
+    An option that does not belong to its question is treated as unanswered.
+    Returns the context the quiz result template expects.
+    """
+    answer_key = snapshot.answer_key
+    total = len(answer_key)
+    correct = 0
+    user_answers = {}
+    unanswered = {}  # Track unanswered questions
+
+    for question_id, (option_ids, correct_ids) in answer_key.items():
+        try:
+            selected = int(data.get(f"question_{question_id}"))
+        except (TypeError, ValueError):
+            selected = None
+        if selected not in option_ids:
+            user_answers[question_id] = None
+            unanswered[question_id] = True
+            continue
+        user_answers[question_id] = selected
+        if selected in correct_ids:
+            correct += 1
+
+    score = int((correct / total) * 100) if total > 0 else 0
+    return {
+        "total": total,
+        "correct": correct,
+        "score": score,
+        "user_answers": user_answers,
+        "unanswered": unanswered,
+    }
@@ -0,0 +1,167 @@
+# myapp/routers.py
+"""
+Read-replica routing for catalog pages.
+
+Reads of catalog models (courses, their details and categories, suggested
+courses, modules and quizzes) go to one of the ``CATALOG_REPLICAS`` database
+aliases; everything else, and every write, goes to ``default``.
+
+A request is pinned to the primary, so it reads its own writes, when:
+
+* it is not a safe method (POST enroll, wishlist, quiz submit, manage forms);
+* it saved or deleted a model (``pin_after_write`` is connected to
+  post_save/post_delete in ``MyappConfig.ready``) or wrote with raw SQL,
+  which calls ``record_write`` itself (``myapp.enrollment``);
+* it is inside a transaction on the primary;
+* it arrives within ``CATALOG_REPLICA_PIN_SECONDS`` of such a request from the
+  same browser (``ReplicaPinningMiddleware`` sets a short-lived cookie), which
+  covers the redirect after a POST while the replicas catch up.
+
+Locally a replica is an SQLite copy of the primary refreshed with
+``manage.py refresh_replicas``.
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+CATALOG_MODELS = {
+    "myapp.course",
+    "myapp.course_detail",
+    "myapp.course_detail_categories",
+    "myapp.category",
+    "myapp.suggestedcourse",
+    "myapp.module",
+    "myapp.quiz",
+    "myapp.question",
+    "myapp.option",
+}
+
+PIN_COOKIE = "primary_pin"
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_pinned = ContextVar("pinned_to_primary", default=False)
+_wrote = ContextVar("wrote_to_primary", default=False)
+
+
+def catalog_replicas():
+    return getattr(settings, "CATALOG_REPLICAS", [])
+
+
+def _pin_seconds():
+    return getattr(settings, "CATALOG_REPLICA_PIN_SECONDS", 5)
+
+
+def pin_to_primary():
+    """Send every further read of the current request (or thread) to the primary."""
+    _pinned.set(True)
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+@contextmanager
+def use_primary():
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+def record_write():
+    """Pin the request after a write, and the browser's next requests through the cookie."""
+    _wrote.set(True)
+    pin_to_primary()
+
+
+def pin_after_write(sender, **kwargs):
+    if not kwargs.get("raw"):
+        record_write()
+
+
+class CatalogReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = catalog_replicas()
+        if not replicas or model._meta.label_lower not in CATALOG_MODELS:
+            return DEFAULT_DB_ALIAS
+        if _pinned.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are copies of the primary and get its schema with the data
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaPinningMiddleware:
+    """Pin unsafe requests, and the requests that shortly follow them, to the primary."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        unsafe, tokens = self._pin(request)
+        try:
+            response = self.get_response(request)
+            wrote = unsafe or _wrote.get()
+        finally:
+            self._unpin(tokens)
+        return self._remember_write(response, wrote)
+
+    async def __acall__(self, request):
+        # The async ORM and myapp.db.run_db copy these contextvars into their
+        # threads and carry changes back, so writes made there are seen here
+        unsafe, tokens = self._pin(request)
+        try:
+            response = await self.get_response(request)
+            wrote = unsafe or _wrote.get()
+        finally:
+            self._unpin(tokens)
+        return self._remember_write(response, wrote)
+
+    @staticmethod
+    def _pin(request):
+        unsafe = request.method not in SAFE_METHODS
+        try:
+            recent_write = float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            recent_write = False
+        return unsafe, (_pinned.set(unsafe or recent_write), _wrote.set(False))
+
+    @staticmethod
+    def _unpin(tokens):
+        pinned_token, wrote_token = tokens
+        _pinned.reset(pinned_token)
+        _wrote.reset(wrote_token)
+
+    @staticmethod
+    def _remember_write(response, wrote):
+        if wrote and catalog_replicas():
+            seconds = _pin_seconds()
+            response.set_cookie(
+                PIN_COOKIE, str(time.time() + seconds), max_age=seconds,
+                httponly=True, samesite="Lax",
+            )
+        return response
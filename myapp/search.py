@@ -0,0 +1,150 @@
+# myapp/search.py
+"""
+Full-text course search backed by an SQLite FTS5 table.
+
+``myapp_course_fts`` holds one row per course (rowid = course id) with the
+searchable text of the course and its details. The signal handlers in
+``myapp.signals`` keep it in sync on save/delete, and
+``manage.py rebuild_search_index`` refills it in bulk after imports that
+bypass signals (bulk_create, raw SQL). Results are ranked with bm25 and come
+with a highlighted snippet.
+
+On other database backends search degrades to an ``icontains`` filter.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+
+from .models import Course
+
+FTS_TABLE = "myapp_course_fts"
+FTS_COLUMNS = (
+    "title",
+    "description",
+    "short_description",
+    "overview",
+    "skills",
+    "tools",
+    "instructor",
+)
+# bm25 column weights, in FTS_COLUMNS order: a title hit outranks a body hit
+FTS_WEIGHTS = (10.0, 2.0, 4.0, 1.0, 3.0, 3.0, 3.0)
+
+# Private-use markers survive escaping and are swapped for <mark> afterwards
+_MARK_START = "\ue000"
+_MARK_END = "\ue001"
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_SOURCE_SQL = """
+    SELECT c.id, c.title, c.description,
+           COALESCE(d.short_description, ''), COALESCE(d.overview, ''),
+           COALESCE(d.skills, ''), COALESCE(d.tools, ''), COALESCE(d.instructor, '')
+    FROM myapp_course c
+    LEFT JOIN myapp_course_detail d ON d.course_id = c.id
+"""
+
+
+def fts_available():
+    return connection.vendor == "sqlite"
+
+
+def index_course(course_id):
+    """(Re)index one course from its current database row."""
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [course_id])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) "
+            f"{_SOURCE_SQL} WHERE c.id = %s",
+            [course_id],
+        )
+
+
+def remove_course(course_id):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [course_id])
+
+
+def rebuild_index():
+    """Refill the whole index with one INSERT ... SELECT. Returns the row count."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) {_SOURCE_SQL}"
+        )
+        count = cursor.rowcount
+        # Merge the b-tree segments written by the bulk insert
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+    return count
+
+
+def build_match_query(text):
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+
+    Every word becomes a quoted prefix term and all terms must match, so
+    user input can never produce an FTS5 syntax error.
+    """
+    terms = _TOKEN_RE.findall(text or "")
+    return " ".join(f'"{term}"*' for term in terms[:16])
+
+
+def _highlight(snippet):
+    return (
+        escape(snippet)
+        .replace(_MARK_START, "<mark>")
+        .replace(_MARK_END, "</mark>")
+    )
+
+
+def search_courses(text, limit=10, offset=0):
+    """
+    Return (courses, has_more) for a search.
+
+    Each course carries ``search_snippet`` (safe HTML) when FTS5 is used.
+    """
+    match = build_match_query(text)
+    if not match:
+        return [], False
+
+    if not fts_available():
+        words = _TOKEN_RE.findall(text)
+        condition = Q()
+        for word in words:
+            condition &= (
+                Q(title__icontains=word)
+                | Q(description__icontains=word)
+                | Q(details__short_description__icontains=word)
+            )
+        rows = list(Course.all_objects.filter(condition)[offset:offset + limit + 1])
+        return rows[:limit], len(rows) > limit
+
+    weights = ", ".join(str(weight) for weight in FTS_WEIGHTS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, snippet({FTS_TABLE}, -1, %s, %s, '…', 16) "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+            f"ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT %s OFFSET %s",
+            [_MARK_START, _MARK_END, match, limit + 1, offset],
+        )
+        hits = cursor.fetchall()
+
+    has_more = len(hits) > limit
+    hits = hits[:limit]
+    courses = Course.all_objects.only(
+        "title", "slug", "description", "duration", "price", "image", "image_renditions"
+    ).in_bulk([course_id for course_id, _ in hits])
+
+    results = []
+    for course_id, snippet in hits:
+        course = courses.get(course_id)
+        if course is None:
+            continue  # index is ahead of a deleted row until the next rebuild
+        course.search_snippet = _highlight(snippet)
+        results.append(course)
+    return results, has_more
@@ -0,0 +1,40 @@
+# myapp/sessions.py
+"""
+Cache-first session engine with database write-through.
+
+``SessionStore`` is Django's ``cached_db`` store: a request reads its session
+from the ``SESSION_CACHE_ALIAS`` cache and only falls back to
+``django_session`` on a miss, while every save is written to the database
+first and then to the cache, so a restart or an evicted entry loses nothing.
+
+``clear_expired`` (run by ``manage.py clearsessions``) deletes expired rows
+in batches of ``SESSION_PURGE_BATCH_SIZE``, each in its own short
+transaction, so a large purge never holds SQLite's write lock for long.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.utils import timezone
+
+
+class SessionStore(CachedDBStore):
+    @classmethod
+    def clear_expired(cls):
+        model = cls.get_model_class()
+        batch_size = getattr(settings, "SESSION_PURGE_BATCH_SIZE", 1000)
+        pause = getattr(settings, "SESSION_PURGE_PAUSE", 0.05)
+        now = timezone.now()
+        while True:
+            # The keys first, then a delete by primary key: each batch is one quick write
+            keys = list(
+                model.objects.filter(expire_date__lt=now)
+                .values_list("session_key", flat=True)[:batch_size]
+            )
+            if not keys:
+                return
+            model.objects.filter(session_key__in=keys).delete()
+            if len(keys) < batch_size:
+                return
+            # Let requests waiting on the write lock in between batches
+            time.sleep(pause)
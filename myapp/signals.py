@@ -0,0 +1,138 @@
+# myapp/signals.py
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .auth import invalidate_cached_user
+from .cache import bump_catalog_version
+from .images import schedule_renditions
+from .models import (
+    Category,
+    Course,
+    Course_detail,
+    CustomUser,
+    Module,
+    Option,
+    Question,
+    Quiz,
+    SuggestedCourse,
+)
+from .quiz import bump_quiz_version
+from .search import index_course, remove_course
+
+CATALOG_MODELS = (Course, Course_detail, SuggestedCourse, Category)
+
+
+# -------- Suggested flag --------
+# Connected before the catalog handlers, so the flag is written before the version moves
+@receiver(post_save, sender=SuggestedCourse, dispatch_uid="suggested_flag_saved")
+def flag_suggested_course(sender, instance, **kwargs):
+    previous = getattr(instance, "_loaded_course_id", None)
+    if previous is not None and previous != instance.course_id:
+        Course.all_objects.filter(pk=previous).update(is_suggested=False)
+    Course.all_objects.filter(pk=instance.course_id).update(is_suggested=True)
+    instance._loaded_course_id = instance.course_id
+    # keep the in-memory course in step with the row
+    if SuggestedCourse.course.is_cached(instance):
+        instance.course.is_suggested = True
+
+
+@receiver(post_delete, sender=SuggestedCourse, dispatch_uid="suggested_flag_deleted")
+def unflag_suggested_course(sender, instance, **kwargs):
+    # Also sent for queryset deletes, the admin's "delete selected" and cascades
+    Course.all_objects.filter(pk=instance.course_id).update(is_suggested=False)
+
+
+def invalidate_catalog(sender, **kwargs):
+    bump_catalog_version()
+
+
+for model in CATALOG_MODELS:
+    post_save.connect(invalidate_catalog, sender=model, dispatch_uid=f"catalog_save_{model.__name__}")
+    post_delete.connect(invalidate_catalog, sender=model, dispatch_uid=f"catalog_delete_{model.__name__}")
+
+
+@receiver(m2m_changed, sender=Course_detail.categories.through, dispatch_uid="catalog_categories_changed")
+def invalidate_catalog_categories(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump_catalog_version()
+
+
+# -------- Course modification time --------
+@receiver(post_save, sender=Module, dispatch_uid="course_touch_module_saved")
+@receiver(post_delete, sender=Module, dispatch_uid="course_touch_module_deleted")
+def touch_course_for_module(sender, instance, **kwargs):
+    # Course.updated_at covers its modules too (see myapp/conditional.py)
+    Course.all_objects.filter(pk=instance.course_id).update(updated_at=timezone.now())
+
+
+# -------- Quiz snapshots --------
+@receiver(post_save, sender=Quiz, dispatch_uid="quiz_saved")
+@receiver(post_delete, sender=Quiz, dispatch_uid="quiz_deleted")
+def invalidate_quiz(sender, instance, **kwargs):
+    bump_quiz_version(instance.id)
+
+
+@receiver(post_save, sender=Module, dispatch_uid="quiz_module_saved")
+def invalidate_quizzes_for_module(sender, instance, **kwargs):
+    # snapshots carry the course slug for the back link
+    for quiz_id in instance.quizzes.values_list("id", flat=True):
+        bump_quiz_version(quiz_id)
+
+
+@receiver(post_save, sender=Course, dispatch_uid="quiz_course_saved")
+def invalidate_quizzes_for_course(sender, instance, created, **kwargs):
+    if created:
+        return
+    for quiz_id in Quiz.objects.filter(module__course=instance).values_list("id", flat=True):
+        bump_quiz_version(quiz_id)
+
+
+@receiver(post_save, sender=Question, dispatch_uid="quiz_question_saved")
+@receiver(post_delete, sender=Question, dispatch_uid="quiz_question_deleted")
+def invalidate_quiz_for_question(sender, instance, **kwargs):
+    bump_quiz_version(instance.quiz_id)
+
+
+@receiver(post_save, sender=Option, dispatch_uid="quiz_option_saved")
+@receiver(post_delete, sender=Option, dispatch_uid="quiz_option_deleted")
+def invalidate_quiz_for_option(sender, instance, **kwargs):
+    quiz_id = (
+        Question.objects.filter(pk=instance.question_id)
+        .values_list("quiz_id", flat=True)
+        .first()
+    )
+    if quiz_id is not None:
+        bump_quiz_version(quiz_id)
+
+
+# -------- Search index --------
+@receiver(post_save, sender=Course, dispatch_uid="search_course_saved")
+def index_saved_course(sender, instance, **kwargs):
+    index_course(instance.id)
+
+
+@receiver(post_delete, sender=Course, dispatch_uid="search_course_deleted")
+def unindex_deleted_course(sender, instance, **kwargs):
+    remove_course(instance.id)
+
+
+@receiver(post_save, sender=Course_detail, dispatch_uid="search_detail_saved")
+@receiver(post_delete, sender=Course_detail, dispatch_uid="search_detail_deleted")
+def index_course_for_detail(sender, instance, **kwargs):
+    if instance.course_id:
+        index_course(instance.course_id)
+
+
+# -------- Image renditions --------
+@receiver(post_save, sender=Course, dispatch_uid="image_renditions_course_saved")
+def build_course_renditions(sender, instance, **kwargs):
+    schedule_renditions(instance)
+
+
+# -------- Cached users --------
+@receiver(post_save, sender=CustomUser, dispatch_uid="auth_user_saved")
+@receiver(post_delete, sender=CustomUser, dispatch_uid="auth_user_deleted")
+def invalidate_user(sender, instance, **kwargs):
+    # Covers password changes: the next request loads the new hash
+    invalidate_cached_user(instance.pk)
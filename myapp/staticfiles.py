@@ -0,0 +1,233 @@
+# myapp/staticfiles.py
+"""
+Hashed, precompressed static files served straight from STATIC_ROOT.
+
+``CompressedManifestStaticFilesStorage`` is Django's manifest storage
+(``style.3f2a9c.css``) that also writes ``.gz`` and, when the optional
+``brotli`` package is installed, ``.br`` siblings of every hashed text asset
+during ``collectstatic``.
+
+``StaticFilesMiddleware`` answers requests under STATIC_URL before sessions,
+auth or the database are touched. It picks the best precompressed sibling
+for ``Accept-Encoding``, marks hashed names ``immutable`` for a year, and
+handles ``If-None-Match``/``If-Modified-Since`` (304) and single ``Range``
+requests (206). Files not in STATIC_ROOT (course images uploaded under
+``static/images/`` since the last collectstatic) are looked up through the
+staticfiles finders and get a short max-age instead.
+"""
+import gzip
+import mimetypes
+import os
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip siblings are written without it
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".svg", ".json", ".txt", ".html", ".xml", ".map", ".ico"}
+# A sibling must save at least this fraction of the original to be worth serving
+MIN_SAVING = 0.05
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Unhashed names can change content under the same URL
+DEFAULT_CACHE_CONTROL = "public, max-age=60"
+
+# (content-coding, file suffix), best first
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _compress(path, suffix, data):
+    if suffix == ".br":
+        compressed = brotli.compress(data, quality=11)
+    else:
+        # mtime=0 keeps the output identical between collectstatic runs
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(compressed) > len(data) * (1 - MIN_SAVING):
+        return False
+    with open(path + suffix, "wb") as handle:
+        handle.write(compressed)
+    return True
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        suffixes = [suffix for _, suffix in ENCODINGS if suffix != ".br" or brotli is not None]
+        for name in sorted(set(self.hashed_files.values())):
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            path = self.path(name)
+            with open(path, "rb") as handle:
+                data = handle.read()
+            for suffix in suffixes:
+                if _compress(path, suffix, data):
+                    yield name, name + suffix, True
+
+
+def _accepted(header):
+    """Content-codings the client accepts (q > 0)."""
+    accepted = set()
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _byte_range(header, size):
+    """(start, end) inclusive for a single satisfiable range, None if unsatisfiable,
+    False if the header is not a single byte range (serve the whole file)."""
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return False
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        return (max(0, size - length), size - 1) if length and size else None
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return None
+    return start, end
+
+
+def _with_headers(response, headers):
+    for key, value in headers.items():
+        response[key] = value
+    return response
+
+
+class StaticFilesMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.STATIC_ROOT or not settings.STATIC_URL:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.prefix = settings.STATIC_URL if settings.STATIC_URL.startswith("/") else f"/{settings.STATIC_URL}"
+        self.root = settings.STATIC_ROOT
+        # Names written by collectstatic with a content hash in them
+        self.hashed = frozenset(getattr(staticfiles_storage, "hashed_files", {}).values())
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        found = self._lookup(request) if self._wants_static(request) else None
+        if found is None:
+            return self.get_response(request)
+        return self.serve(request, *found)
+
+    async def __acall__(self, request):
+        found = None
+        if self._wants_static(request):
+            # Filesystem calls stay off the event loop
+            found = await sync_to_async(self._lookup, thread_sensitive=False)(request)
+        if found is None:
+            return await self.get_response(request)
+        return await sync_to_async(self.serve, thread_sensitive=False)(request, *found)
+
+    def _wants_static(self, request):
+        return request.method in ("GET", "HEAD") and request.path.startswith(self.prefix)
+
+    def _lookup(self, request):
+        """(name, path) of the static file request asks for, or None."""
+        name = request.path[len(self.prefix):]
+        path = self._find(name)
+        return None if path is None else (name, path)
+
+    def _find(self, name):
+        if not name or name.endswith("/"):
+            return None
+        try:
+            path = safe_join(self.root, name)
+        except ValueError:
+            return None
+        if os.path.isfile(path):
+            return path
+        return finders.find(name)
+
+    def serve(self, request, name, path):
+        content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        siblings = [(coding, suffix) for coding, suffix in ENCODINGS if os.path.isfile(path + suffix)]
+        coding = suffix = ""
+        range_header = request.headers.get("Range")
+        # Ranges are served from the identity representation only
+        if siblings and not range_header:
+            accepted = _accepted(request.headers.get("Accept-Encoding", ""))
+            for candidate, candidate_suffix in siblings:
+                if candidate in accepted:
+                    coding, suffix = candidate, candidate_suffix
+                    break
+
+        stat = os.stat(path + suffix)
+        etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}{"-" + coding if coding else ""}"'
+        headers = {
+            "ETag": etag,
+            "Last-Modified": http_date(stat.st_mtime),
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL if name in self.hashed else DEFAULT_CACHE_CONTROL,
+            "Accept-Ranges": "bytes",
+        }
+        if siblings:
+            headers["Vary"] = "Accept-Encoding"
+
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match:
+            tags = parse_etags(if_none_match)
+            # Weak comparison, as RFC 9110 requires for If-None-Match
+            if "*" in tags or etag in [tag.removeprefix("W/") for tag in tags]:
+                return _with_headers(HttpResponseNotModified(), headers)
+        elif not was_modified_since(request.headers.get("If-Modified-Since"), stat.st_mtime):
+            return _with_headers(HttpResponseNotModified(), headers)
+
+        if range_header and request.headers.get("If-Range", etag) in (etag, headers["Last-Modified"]):
+            byte_range = _byte_range(range_header, stat.st_size)
+            if byte_range is None:
+                response = HttpResponse(status=416)
+                response["Content-Range"] = f"bytes */{stat.st_size}"
+                return response
+            if byte_range:
+                start, end = byte_range
+                with open(path, "rb") as handle:
+                    handle.seek(start)
+                    body = handle.read(end - start + 1) if request.method == "GET" else b""
+                response = HttpResponse(body, status=206, content_type=content_type)
+                response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+                response["Content-Length"] = end - start + 1
+                return _with_headers(response, headers)
+
+        if request.method == "HEAD":
+            response = HttpResponse(content_type=content_type)
+            response["Content-Length"] = stat.st_size
+        else:
+            # FileResponse streams the file and sets Content-Length
+            response = FileResponse(open(path + suffix, "rb"), content_type=content_type)
+            # Assets are shown inline, not downloaded as "style.css.gz"
+            del response["Content-Disposition"]
+        if coding:
+            response["Content-Encoding"] = coding
+        return _with_headers(response, headers)
@@ -1,4 +1,9 @@
 from django import template
+from django.core.files.storage import default_storage
+from django.forms.utils import flatatt
+from django.templatetags.static import static
+from django.utils.html import format_html
+
 register = template.Library()
 
 @register.filter
@@ -6,17 +11,7 @@ def get_item(dictionary, key):
     return dictionary.get(key)
 
 
-@register.simple_tag
-def compact_page_range(page_obj, window=2):
-    """
-    Return a compact page range list for pagination with ellipses.
-    Example output: [1, '...', 4, 5, 6, '...', 10]
-    window controls how many pages to show around current page.
-    """
-    if not page_obj:
-        return []
-    total = page_obj.paginator.num_pages
-    current = page_obj.number
+def _compact_range(current, total, window):
     if total <= (window * 2) + 5:
         return list(range(1, total + 1))
 
@@ -35,4 +30,77 @@ def compact_page_range(page_obj, window=2):
     else:
         pages.extend(range(right + 1, total + 1))
 
-    return pages
\ No newline at end of file
+    return pages
+
+
+@register.simple_tag
+def compact_page_range(page_obj, window=2):
+    """
+    Return a compact page range list for pagination with ellipses.
+    Example output: [1, '...', 4, 5, 6, '...', 10]
+    window controls how many pages to show around current page.
+    """
+    if not page_obj:
+        return []
+    return _compact_range(page_obj.number, page_obj.paginator.num_pages, window)
+
+
+@register.simple_tag
+def compact_cursor_range(page_obj, window=2):
+    """
+    Cursor-aware variant of compact_page_range for keyset pages.
+    Only the numbered (shallow) pages are listed; a trailing '...' marks
+    that the listing continues through cursors.
+    Example output on a cursor page: [1, '...', 8, 9, 10, '...']
+    """
+    if page_obj is None or not page_obj.shallow_pages:
+        return []
+    total = page_obj.shallow_pages
+    current = page_obj.number or total
+    pages = _compact_range(current, total, window)
+    if page_obj.truncated or page_obj.is_cursor:
+        pages.append('...')
+    return pages
+
+
+# width the image is displayed at, per layout (matches the widths in static/style.css)
+IMAGE_SIZES = {
+    'card': '(max-width: 440px) 100vw, 400px',
+    'thumb': '(max-width: 768px) 100vw, 280px',
+    'detail': '(max-width: 900px) 100vw, 400px',
+}
+
+
+def _srcset(renditions):
+    return ', '.join(f'{default_storage.url(name)} {width}w' for width, name in renditions)
+
+
+@register.simple_tag
+def course_image(course, layout='card', **attrs):
+    """
+    Responsive <picture> for a course image, built from course.image_renditions
+    (see myapp/images.py): a WebP source and a JPEG <img>, each with a srcset,
+    and the sizes of the given layout ('card', 'thumb' or 'detail').
+    Extra keyword arguments become <img> attributes, e.g.
+    {% course_image course 'thumb' class='wishlist-thumb' %}.
+    Until the renditions exist it falls back to a plain <img> of the original.
+    """
+    attrs = {'alt': course.title, 'loading': 'lazy', 'decoding': 'async', **attrs}
+    renditions = course.image_renditions or {}
+    if not renditions.get('jpeg') or renditions.get('source') != course.image.name:
+        src = course.image.url if course.image else static('images/default.png')
+        return format_html('<img src="{}"{}>', src, flatatt(attrs))
+
+    sizes = IMAGE_SIZES.get(layout, IMAGE_SIZES['card'])
+    # smallest JPEG as src for browsers without srcset support
+    _, fallback = renditions['jpeg'][0]
+    largest, _ = renditions['jpeg'][-1]
+    height = round(renditions['height'] * largest / renditions['width'])
+    attrs.setdefault('width', largest)
+    attrs.setdefault('height', height)
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}"{}></picture>',
+        _srcset(renditions.get('webp', [])), sizes,
+        default_storage.url(fallback), _srcset(renditions['jpeg']), sizes, flatatt(attrs),
+    )
@@ -1,3 +1,838 @@
-from django.test import TestCase
+import base64
+import gzip
+import io
+import json
+import signal
+import sqlite3
+import tempfile
+from contextlib import closing
+from contextvars import Context
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth import BACKEND_SESSION_KEY, authenticate
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import OperationalError, connection
+from django.http import HttpResponse
+from django.template.base import Template
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import views
+from .attempts import AttemptBuffer, _flushing_handler
+from .cache import get_catalog_version
+from .checks import check_shared_auth_caches
+from .conditional import async_conditional_page
+from .course_state import get_course_states
+from .db import configure_sqlite_connection
+from .enrollment import enroll, toggle_enrollment, unenroll, wishlist_course
+from .management.commands.benchmark_views import CASES as BENCHMARK_CASES, ViewCase
+from .metrics import MetricsMiddleware, _timed_template_render, install_template_timer
+from .models import (
+    Category, Course, Course_detail, CustomUser, Enrollment, Module, Option, Question, Quiz,
+    QuizAttempt, SuggestedCourse, Wishlist,
+)
+from .pagination import CURSOR_NEXT, encode_position
+from .quiz import build_quiz_snapshot, get_quiz_snapshot, grade_submission
+from .routers import PIN_COOKIE, CatalogReplicaRouter, ReplicaPinningMiddleware, pin_after_write
+from .sessions import SessionStore
+from .staticfiles import IMMUTABLE_CACHE_CONTROL, StaticFilesMiddleware
+from .views import CATEGORY_PICKER_MAX_PAGE, SEARCH_MAX_PAGE
+
+
+# Pages render {% static %} without a collectstatic manifest
+PLAIN_STATIC = override_settings(STORAGES={
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+})
+
+
+def make_course(slug, **fields):
+    fields = {"title": slug.replace("-", " ").title(), "description": "", "price": 0, **fields}
+    return Course.all_objects.create(slug=slug, **fields)
+
+
+class SuggestedFlagTests(TestCase):
+    def setUp(self):
+        self.course = make_course("suggested-course")
+        SuggestedCourse.objects.create(course=self.course)
+
+    def test_suggesting_hides_the_course(self):
+        self.assertFalse(Course.objects.filter(pk=self.course.pk).exists())
+
+    def test_queryset_delete_shows_the_course_again(self):
+        SuggestedCourse.objects.filter(course=self.course).delete()
+        self.assertTrue(Course.objects.filter(pk=self.course.pk).exists())
+
+    def test_moving_a_suggestion_clears_the_previous_course(self):
+        other = make_course("other-course")
+        suggestion = SuggestedCourse.objects.get(course=self.course)
+        suggestion.course = other
+        suggestion.save()
+        self.assertTrue(Course.objects.filter(pk=self.course.pk).exists())
+        self.assertFalse(Course.objects.filter(pk=other.pk).exists())
+
+
+LOCMEM = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+SHARED = {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "myapp_test_cache"}
+
+
+class SharedAuthCacheCheckTests(TestCase):
+    @override_settings(DEBUG=False, CACHES={"default": LOCMEM, "sessions": LOCMEM})
+    def test_process_local_session_and_user_cache_fails_without_debug(self):
+        errors = check_shared_auth_caches(None)
+        self.assertEqual([error.id for error in errors], ["myapp.E001", "myapp.E001"])
+
+    @override_settings(DEBUG=False, CACHES={"default": LOCMEM, "sessions": SHARED})
+    def test_shared_cache_passes(self):
+        self.assertEqual(check_shared_auth_caches(None), [])
+
+    @override_settings(DEBUG=True, CACHES={"default": LOCMEM, "sessions": LOCMEM})
+    def test_debug_allows_locmem(self):
+        self.assertEqual(check_shared_auth_caches(None), [])
+
+
+@PLAIN_STATIC
+class CachedUserTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user("cached-user", password="old-pass-123")
+
+    def test_session_from_model_backend_stays_logged_in(self):
+        client = Client()
+        client.force_login(self.user, backend="django.contrib.auth.backends.ModelBackend")
+        self.assertEqual(
+            client.session[BACKEND_SESSION_KEY], "django.contrib.auth.backends.ModelBackend"
+        )
+        self.assertEqual(client.get("/my-courses/").status_code, 200)
+
+    def test_password_change_logs_out_cached_session(self):
+        client = Client()
+        client.force_login(self.user)
+        self.assertEqual(client.get("/my-courses/").status_code, 200)
+        self.user.set_password("new-pass-456")
+        self.user.save()
+        self.assertEqual(client.get("/my-courses/").status_code, 302)
+
+    def test_deactivation_logs_out_cached_session(self):
+        client = Client()
+        client.force_login(self.user)
+        client.get("/my-courses/")
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(client.get("/my-courses/").status_code, 302)
+
+    def test_bad_password_is_checked_once(self):
+        with mock.patch.object(CustomUser, "check_password", autospec=True, return_value=False) as check:
+            self.assertIsNone(authenticate(None, username="cached-user", password="wrong"))
+        self.assertEqual(check.call_count, 1)
+
+
+@override_settings(SESSION_PURGE_BATCH_SIZE=2, SESSION_PURGE_PAUSE=0.5)
+class SessionPurgeTests(TestCase):
+    def test_expired_sessions_are_deleted_in_batches(self):
+        model = SessionStore.get_model_class()
+        now = timezone.now()
+        model.objects.bulk_create(
+            model(session_key=f"expired-{number}", session_data="", expire_date=now - timedelta(days=1))
+            for number in range(5)
+        )
+        model.objects.create(session_key="live", session_data="", expire_date=now + timedelta(days=1))
+
+        with mock.patch("myapp.sessions.time.sleep") as sleep, CaptureQueriesContext(connection) as queries:
+            SessionStore.clear_expired()
+        self.assertEqual(list(model.objects.values_list("session_key", flat=True)), ["live"])
+        deletes = [query for query in queries if query["sql"].startswith("DELETE")]
+        self.assertEqual(len(deletes), 3)
+        # A pause between full batches, none after the last one
+        self.assertEqual(sleep.call_args_list, [mock.call(0.5)] * 2)
+
+
+@PLAIN_STATIC
+class HomePageCacheTests(TestCase):
+    def setUp(self):
+        self.client.force_login(CustomUser.objects.create_user("home-user", password="pass-123"))
+
+    def _page_keys(self, *queries):
+        keys = []
+        real_cached_page = views.cached_page
+
+        def recording_cached_page(key, build_page):
+            keys.append(key)
+            return real_cached_page(key, build_page)
+
+        with mock.patch("myapp.views.cached_page", recording_cached_page):
+            for query in queries:
+                self.assertEqual(self.client.get("/", query).status_code, 200)
+        return keys
+
+    def test_invalid_cursors_and_pages_share_the_first_page_key(self):
+        keys = self._page_keys({}, {"page": "1"}, {"page": "x"}, {"cursor": "garbage"}, {"cursor": "other"})
+        self.assertEqual(len(set(keys)), 1)
+
+    def test_cursor_key_is_normalized(self):
+        position = [None, 5, CURSOR_NEXT]
+        spaced = base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+        keys = self._page_keys({"cursor": spaced}, {"cursor": encode_position(None, 5, CURSOR_NEXT)})
+        self.assertEqual(len(set(keys)), 1)
+
+
+@PLAIN_STATIC
+class CatalogFragmentCacheTests(TestCase):
+    def setUp(self):
+        self.client.force_login(CustomUser.objects.create_user("fragment-user", password="pass-123"))
+        self.category = Category.objects.create(name="Old Name")
+
+    def test_saving_a_category_moves_the_version_and_rerenders_the_bar(self):
+        self.assertContains(self.client.get("/"), "Old Name")
+        version = get_catalog_version()
+        # No signal: the cached bar is still served
+        Category.objects.filter(pk=self.category.pk).update(name="Unsignalled Name")
+        self.assertContains(self.client.get("/"), "Old Name")
+
+        self.category.name = "New Name"
+        self.category.save()
+        self.assertNotEqual(get_catalog_version(), version)
+        response = self.client.get("/")
+        self.assertContains(response, "New Name")
+        self.assertNotContains(response, "Old Name")
+
+
+@PLAIN_STATIC
+@override_settings(LOGIN_THROTTLE_RATES={"ip": (100, 60), "username": (2, 1)})
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user("throttled", password="right-pass-123")
+
+    def _login(self, password):
+        return self.client.post("/login/", {"username": "throttled", "password": password})
+
+    def test_empty_bucket_is_rejected_before_hashing(self):
+        self._login("wrong")
+        self._login("wrong")
+        with mock.patch.object(CustomUser, "check_password", autospec=True) as check:
+            response = self._login("right-pass-123")
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response["Retry-After"]), 0)
+        check.assert_not_called()
+
+    def test_successful_login_refills_the_username_bucket(self):
+        self._login("wrong")
+        self.assertEqual(self._login("right-pass-123").status_code, 302)
+        self.client.logout()
+        self._login("wrong")
+        self.assertEqual(self._login("right-pass-123").status_code, 302)
+
+
+@PLAIN_STATIC
+class QuizAttemptTests(TestCase):
+    def setUp(self):
+        module = Module.objects.create(course=make_course("quiz-course"), title="Module")
+        self.quiz = Quiz.objects.create(module=module, title="Quiz")
+        question = Question.objects.create(quiz=self.quiz, text="Question")
+        self.option = Option.objects.create(question=question, text="Answer", is_correct=True)
+        # No flusher thread: writes happen in the test's own transaction
+        patcher = mock.patch.object(AttemptBuffer, "_ensure_worker")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _record(self):
+        return {
+            "user_id": None, "quiz_id": self.quiz.pk, "correct": 1, "total": 1, "score": 100,
+            "submitted_at": timezone.now(), "answers": [(self.option.question_id, self.option.pk, True)],
+        }
+
+    def test_submission_is_queued_until_a_batch_is_due(self):
+        buffer = AttemptBuffer(batch_size=2, flush_interval=60)
+        with mock.patch("myapp.attempts.attempt_buffer", buffer):
+            response = self.client.post(
+                f"/quiz/{self.quiz.pk}/", {f"question_{self.option.question_id}": self.option.pk}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(buffer), 1)
+        self.assertFalse(QuizAttempt.objects.filter(quiz=self.quiz).exists())
+
+    def test_shutdown_signal_drains_the_queue_before_the_previous_handler(self):
+        buffer = AttemptBuffer(flush_interval=60)
+        buffer.add(self._record())
+        previous = mock.Mock()
+        with mock.patch("myapp.attempts.attempt_buffer", buffer):
+            _flushing_handler(previous)(signal.SIGTERM, None)
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(QuizAttempt.objects.filter(quiz=self.quiz).count(), 1)
+        previous.assert_called_once_with(signal.SIGTERM, None)
+
+    def test_failed_inline_flush_is_queued_again_not_raised(self):
+        buffer = AttemptBuffer(flush_interval=0)
+        with mock.patch.object(AttemptBuffer, "_write", side_effect=OperationalError("locked")):
+            with self.assertLogs("myapp.attempts", "ERROR") as logs:
+                buffer.add(self._record())
+        self.assertIn("Failed to flush 1 quiz attempts", logs.output[0])
+        self.assertEqual(len(buffer), 1)
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(QuizAttempt.objects.filter(quiz=self.quiz).count(), 1)
+
+
+@PLAIN_STATIC
+class QuizGradingTests(TestCase):
+    def _quiz(self, questions):
+        module = Module.objects.create(course=make_course(f"graded-{questions}"), title="Module")
+        quiz = Quiz.objects.create(module=module, title=f"{questions} questions")
+        for number in range(questions):
+            question = Question.objects.create(quiz=quiz, text=f"Question {number}")
+            Option.objects.create(question=question, text="Right", is_correct=True)
+            Option.objects.create(question=question, text="Wrong")
+        return quiz
+
+    def test_option_of_another_question_is_unanswered(self):
+        snapshot = build_quiz_snapshot(self._quiz(2).pk)
+        first, second = snapshot.questions
+        result = grade_submission(snapshot, {
+            f"question_{first.id}": str(second.options[0].id),
+            f"question_{second.id}": str(second.options[0].id),
+        })
+        self.assertEqual(result["user_answers"][first.id], None)
+        self.assertTrue(result["unanswered"][first.id])
+        self.assertEqual((result["correct"], result["total"], result["score"]), (1, 2, 50))
+
+    def test_non_integer_option_is_unanswered(self):
+        snapshot = build_quiz_snapshot(self._quiz(1).pk)
+        question = snapshot.questions[0]
+        result = grade_submission(snapshot, {f"question_{question.id}": "1 OR 1=1"})
+        self.assertEqual(result["user_answers"], {question.id: None})
+        self.assertEqual(result["score"], 0)
+
+    def test_query_count_does_not_grow_with_questions(self):
+        small, large = self._quiz(1), self._quiz(12)
+        with self.assertNumQueries(3):
+            build_quiz_snapshot(small.pk)
+        with self.assertNumQueries(3):
+            build_quiz_snapshot(large.pk)
+
+        counts = []
+        for quiz in (small, large):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(f"/quiz/{quiz.pk}/").status_code, 200)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+@PLAIN_STATIC
+class CourseStateTests(TestCase):
+    def setUp(self):
+        # Rolled-back tests reuse user pks, and with them the cached states
+        cache.clear()
+        self.user = CustomUser.objects.create_user("stateful", password="pass-123")
+        self.course = make_course("state-course")
+        self.client.force_login(self.user)
+
+    def test_states_of_many_courses_are_one_query_then_cached(self):
+        courses = [self.course, make_course("state-other"), make_course("state-third")]
+        Enrollment.objects.create(user=self.user, course=courses[0])
+        Enrollment.objects.create(user=self.user, course=courses[1], is_active=False)
+        Wishlist.objects.create(user=self.user, course=courses[2])
+        with self.assertNumQueries(1):
+            states = get_course_states(self.user, [course.pk for course in courses])
+        self.assertEqual(
+            [tuple(states[course.pk]) for course in courses],
+            [(True, True, False), (False, True, False), (False, False, True)],
+        )
+        with self.assertNumQueries(0):
+            get_course_states(self.user, [course.pk for course in courses])
+
+    def test_course_page_shows_the_state_after_each_write(self):
+        url = f"/course/{self.course.slug}/"
+        self.assertContains(self.client.get(url), "Enroll Now")
+        self.client.post(f"{url}enroll/")
+        self.assertContains(self.client.get(url), "You are already enrolled")
+        self.client.post(f"{url}wishlist/add/")
+        self.assertContains(self.client.get(url), "Remove from Wishlist")
+
+
+@PLAIN_STATIC
+class QuizSnapshotTests(TestCase):
+    def setUp(self):
+        module = Module.objects.create(course=make_course("snapshot-course"), title="Module")
+        self.quiz = Quiz.objects.create(module=module, title="Snapshot quiz")
+        self.question = Question.objects.create(quiz=self.quiz, text="Old question")
+        self.option = Option.objects.create(question=self.question, text="Answer", is_correct=True)
+
+    def test_snapshot_is_cached_until_the_quiz_changes(self):
+        get_quiz_snapshot(self.quiz.pk)
+        with self.assertNumQueries(0):
+            get_quiz_snapshot(self.quiz.pk)
+        # No signal, so the cached snapshot is still served
+        Question.objects.filter(pk=self.question.pk).update(text="Unsignalled question")
+        self.assertEqual(get_quiz_snapshot(self.quiz.pk).questions[0].text, "Old question")
+
+        self.question.text = "New question"
+        self.question.save()
+        self.assertContains(self.client.get(f"/quiz/{self.quiz.pk}/"), "New question")
+
+    def test_option_change_updates_the_answer_key(self):
+        wrong = Option.objects.create(question=self.question, text="Other")
+        get_quiz_snapshot(self.quiz.pk)
+        wrong.is_correct, self.option.is_correct = True, False
+        wrong.save()
+        self.option.save()
+        snapshot = get_quiz_snapshot(self.quiz.pk)
+        result = grade_submission(snapshot, {f"question_{self.question.pk}": str(wrong.pk)})
+        self.assertEqual(result["score"], 100)
+
+
+class EnrollmentWriteTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user("enrolling", password="pass-123")
+        self.course = make_course("enroll-course")
+        self.client.force_login(self.user)
+
+    def test_enroll_is_idempotent_and_reactivates(self):
+        self.assertEqual(enroll(self.user, self.course.slug), self.course.pk)
+        self.assertEqual(enroll(self.user, self.course.slug), self.course.pk)
+        unenroll(self.user, self.course.slug)
+        self.assertEqual(enroll(self.user, self.course.slug), self.course.pk)
+        enrollment = Enrollment.objects.get(user=self.user)
+        self.assertEqual((enrollment.course_id, enrollment.is_active), (self.course.pk, True))
+
+    def test_wishlist_is_idempotent(self):
+        self.assertEqual(wishlist_course(self.user, self.course.slug), self.course.pk)
+        self.assertEqual(wishlist_course(self.user, self.course.slug), self.course.pk)
+        self.assertEqual(Wishlist.objects.filter(user=self.user).count(), 1)
+
+    def test_toggle_returns_the_new_state(self):
+        self.assertIsNone(toggle_enrollment(self.user, self.course.slug))
+        enroll(self.user, self.course.slug)
+        self.assertIs(toggle_enrollment(self.user, self.course.slug), False)
+        self.assertIs(toggle_enrollment(self.user, self.course.slug), True)
+
+    def test_missing_course_is_404(self):
+        self.assertEqual(self.client.get("/course/no-such-course/enroll/").status_code, 404)
+        self.assertEqual(self.client.post("/course/no-such-course/wishlist/add/").status_code, 404)
+        self.assertFalse(Enrollment.objects.exists() or Wishlist.objects.exists())
+
+    @override_settings(CATALOG_REPLICAS=["default"])
+    def test_raw_writes_pin_the_next_requests_to_the_primary(self):
+        response = self.client.get(f"/course/{self.course.slug}/enroll/")
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(PIN_COOKIE, response.cookies)
+        response = self.client.post(f"/course/{self.course.slug}/wishlist/add/")
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+
+@override_settings(CATALOG_REPLICAS=["replica"])
+class ReplicaRouterTests(SimpleTestCase):
+    def _route(self):
+        return CatalogReplicaRouter().db_for_read(Course)
+
+    def _in_request(self, test):
+        # The pin lives in context variables, which saves in earlier tests have set
+        Context().run(test)
+
+    def test_catalog_reads_go_to_the_primary_after_a_write(self):
+        def test():
+            self.assertEqual(self._route(), "replica")
+            pin_after_write(sender=Course, instance=None)
+            self.assertEqual(self._route(), "default")
+        self._in_request(test)
+
+    def test_fixture_loads_do_not_pin(self):
+        def test():
+            pin_after_write(sender=Course, instance=None, raw=True)
+            self.assertEqual(self._route(), "replica")
+        self._in_request(test)
+
+    def test_write_sets_the_pin_cookie_for_the_next_request(self):
+        routes = []
+
+        def get_response(request):
+            routes.append(self._route())
+            if request.GET.get("write"):
+                pin_after_write(sender=Course, instance=None)
+            return HttpResponse()
+
+        middleware = ReplicaPinningMiddleware(get_response)
+        factory = RequestFactory()
+        self.assertNotIn(PIN_COOKIE, middleware(factory.get("/")).cookies)
+        response = middleware(factory.get("/", {"write": "1"}))
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        pinned = factory.get("/")
+        pinned.COOKIES[PIN_COOKIE] = response.cookies[PIN_COOKIE].value
+        middleware(pinned)
+        middleware(factory.get("/"))
+        self.assertEqual(routes, ["replica", "replica", "default", "replica"])
+
+
+@PLAIN_STATIC
+class SearchPagingTests(TestCase):
+    def test_huge_page_is_not_found(self):
+        response = self.client.get("/search/", {"q": "python", "page": "99999999999999999999"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_last_allowed_page_renders(self):
+        response = self.client.get("/search/", {"q": "python", "page": SEARCH_MAX_PAGE})
+        self.assertEqual(response.status_code, 200)
+
+
+@PLAIN_STATIC
+@override_settings(CATALOG_OFFSET_PAGES=1)
+class CategoryCoursesTests(TestCase):
+    def setUp(self):
+        self.client.force_login(CustomUser.objects.create_user("browsing", password="pass-123"))
+        self.category = Category.objects.create(name="Listed")
+        self.expected = []
+        for number in range(11):
+            course = make_course(f"listed-{number}")
+            Course_detail.objects.create(course=course).categories.add(self.category)
+            self.expected.append(course.pk)
+        make_course("not-listed")
+
+    def _walk(self):
+        """Course ids of every page, following the next links."""
+        ids, query = [], ""
+        while query is not None:
+            response = self.client.get(f"/category/{self.category.slug}/{query}")
+            ids += [course.pk for course in response.context["courses"]]
+            query = response.context["page_obj"].next_query
+        return ids
+
+    def test_both_plans_list_the_category_in_order(self):
+        self.assertEqual(self._walk(), self.expected)
+        # A category too big for the id list walks the course index instead
+        with mock.patch("myapp.views.CATEGORY_ID_LIST_LIMIT", 5):
+            self.assertEqual(self._walk(), self.expected)
+
+
+class CategoryPickerPagingTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Picker")
+        staff = CustomUser.objects.create_user("picker-staff", password="pass-123", is_staff=True)
+        self.client.force_login(staff)
+
+    def _get(self, page):
+        return self.client.get(f"/manage/categories/{self.category.pk}/courses/available/", {"page": page})
+
+    def test_huge_page_is_not_found(self):
+        self.assertEqual(self._get("1" * 30).status_code, 404)
+
+    def test_last_allowed_page_is_empty(self):
+        response = self._get(CATEGORY_PICKER_MAX_PAGE)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"results": [], "page": CATEGORY_PICKER_MAX_PAGE, "has_next": False})
+
+
+@PLAIN_STATIC
+class BenchmarkGateTests(TestCase):
+    """manage.py benchmark_views: the query budget gate."""
+
+    def _run(self, baseline, **options):
+        options = {"queries_only": True, **options}
+        call_command(
+            "benchmark_views", sizes="0.01", repeat=1,
+            baseline=str(baseline), stdout=io.StringIO(), **options,
+        )
+
+    def test_unchanged_counts_pass_and_an_extra_query_fails(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline = Path(tmp) / "baseline.json"
+            self._run(baseline, update_baseline=True)
+            self._run(baseline)
+
+            recorded = json.loads(baseline.read_text())
+            self.assertIn("home", recorded["0.01"])
+            recorded["0.01"]["course_detail (user)"]["queries"] -= 1
+            baseline.write_text(json.dumps(recorded))
+            with self.assertRaisesMessage(CommandError, "1 view benchmark regression(s) found."):
+                self._run(baseline)
+
+    def test_latency_is_only_gated_against_a_local_baseline(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline, latencies = Path(tmp) / "baseline.json", Path(tmp) / "latency.json"
+            self._run(baseline, latency_baseline=str(latencies), update_baseline=True)
+            self.assertEqual(set(json.loads(baseline.read_text())["0.01"]["home"]), {"queries"})
+
+            recorded = json.loads(latencies.read_text())
+            for numbers in recorded["0.01"].values():
+                numbers["p50_ms"] = numbers["p95_ms"] = 0.0
+            latencies.write_text(json.dumps(recorded))
+            strict = {"queries_only": False, "threshold": 0.0, "min_ms": 0.0}
+            with self.assertRaisesMessage(CommandError, "view benchmark regression(s) found."):
+                self._run(baseline, latency_baseline=str(latencies), **strict)
+            self._run(baseline, **strict)
+
+    def test_page_redirected_to_log_in_fails(self):
+        anonymous_home = ViewCase("home", "anon", "GET", "home", lambda f: {}, lambda f: {})
+        with tempfile.TemporaryDirectory() as tmp, mock.patch(
+            "myapp.management.commands.benchmark_views.CASES", [*BENCHMARK_CASES, anonymous_home],
+        ):
+            with self.assertRaisesMessage(CommandError, "home: redirected to log in"):
+                self._run(Path(tmp) / "baseline.json", update_baseline=True)
+
+
+class GenerateDatasetTests(TestCase):
+    def _generate(self):
+        call_command(
+            "generate_dataset", scale=0.005, chunk_size=2, modules_per_course=1, questions_per_quiz=2,
+            options_per_question=3, stdout=io.StringIO(),
+        )
+
+    def test_generates_every_level_and_can_run_again(self):
+        self._generate()
+        # Ids are derived from the highest existing ones, so a second run appends
+        self._generate()
+        self.assertEqual(Course.all_objects.count(), 10)
+        self.assertEqual(Course_detail.objects.count(), 10)
+        self.assertEqual(Quiz.objects.count(), 10)
+        self.assertEqual(Question.objects.count(), 20)
+        self.assertEqual(Option.objects.filter(is_correct=True).count(), 20)
+        self.assertEqual(Option.objects.count(), 60)
+        self.assertEqual(CustomUser.objects.count(), 100)
+        self.assertEqual(Enrollment.objects.count(), 100)
+        self.assertTrue(CustomUser.objects.first().check_password("password"))
+
+    def test_too_small_scale_is_an_error(self):
+        with self.assertRaisesMessage(CommandError, "--scale is too small"):
+            call_command("generate_dataset", scale=0.0001, stdout=io.StringIO())
+
+
+class QueryPlanAuditTests(TestCase):
+    """manage.py queryplan_audit plans against pinned statistics."""
+
+    def _audit(self):
+        out = io.StringIO()
+        call_command("queryplan_audit", stdout=out)
+        return out.getvalue()
+
+    def _statistics(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT tbl, idx, stat FROM sqlite_stat1 ORDER BY tbl, idx")
+            return cursor.fetchall()
+
+    def test_baseline_holds_without_statistics(self):
+        self.assertNotIn("fixed", self._audit())
+
+    def test_baseline_holds_with_statistics_and_keeps_them(self):
+        for number in range(20):
+            make_course(f"course-{number}")
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        analyzed = self._statistics()
+        self.assertNotIn("fixed", self._audit())
+        self.assertEqual(self._statistics(), analyzed)
+
+
+class StaticFilesMiddlewareTests(SimpleTestCase):
+    CSS = b"body { color: black; }" * 20
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        for name in ("app.3f2a9c.css", "app.css"):
+            (Path(root.name) / name).write_bytes(self.CSS)
+        (Path(root.name) / "app.3f2a9c.css.gz").write_bytes(gzip.compress(self.CSS))
+        storage = mock.Mock(hashed_files={"app.css": "app.3f2a9c.css"})
+        with override_settings(STATIC_ROOT=root.name, STATIC_URL="/static/"), mock.patch(
+            "myapp.staticfiles.staticfiles_storage", storage,
+        ):
+            self.middleware = StaticFilesMiddleware(lambda request: HttpResponse("not static"))
+        self.factory = RequestFactory()
+
+    def test_hashed_names_are_immutable(self):
+        response = self.middleware(self.factory.get("/static/app.3f2a9c.css"))
+        self.assertEqual(response["Cache-Control"], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(b"".join(response.streaming_content), self.CSS)
+        response = self.middleware(self.factory.head("/static/app.css"))
+        self.assertNotIn("immutable", response["Cache-Control"])
+
+    def test_precompressed_sibling_is_served_when_accepted(self):
+        request = self.factory.get("/static/app.3f2a9c.css", HTTP_ACCEPT_ENCODING="gzip, br")
+        response = self.middleware(request)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), self.CSS)
+
+    def test_range_is_served_from_the_identity_file(self):
+        response = self.middleware(self.factory.get(
+            "/static/app.3f2a9c.css", HTTP_RANGE="bytes=5-9", HTTP_ACCEPT_ENCODING="gzip",
+        ))
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.content, self.CSS[5:10])
+        self.assertEqual(response["Content-Range"], f"bytes 5-9/{len(self.CSS)}")
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(response["Cache-Control"], IMMUTABLE_CACHE_CONTROL)
+
+    def test_unsatisfiable_range(self):
+        response = self.middleware(self.factory.get("/static/app.css", HTTP_RANGE=f"bytes={len(self.CSS)}-"))
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(self.CSS)}")
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self.middleware(self.factory.head("/static/app.css"))["ETag"]
+        response = self.middleware(self.factory.get("/static/app.css", HTTP_IF_NONE_MATCH=etag))
+        self.assertEqual(response.status_code, 304)
+
+    def test_other_paths_pass_through(self):
+        self.assertEqual(self.middleware(self.factory.get("/static/missing.css")).content, b"not static")
+        self.assertEqual(self.middleware(self.factory.post("/static/app.css")).content, b"not static")
+
+
+class SqliteConnectionTests(SimpleTestCase):
+    def test_new_connection_keeps_the_journal_mode_of_the_file(self):
+        with tempfile.TemporaryDirectory() as tmp, closing(sqlite3.connect(Path(tmp) / "dev.sqlite3")) as db:
+            db.execute("CREATE TABLE t (id INTEGER PRIMARY KEY)")
+            wrapper = mock.Mock(vendor="sqlite")
+            wrapper.cursor.return_value = closing(db.cursor())
+            configure_sqlite_connection(sender=None, connection=wrapper)
+            self.assertEqual(db.execute("PRAGMA journal_mode").fetchone()[0], "delete")
+            self.assertEqual(db.execute("PRAGMA busy_timeout").fetchone()[0], 20000)
+
+
+@PLAIN_STATIC
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client.force_login(CustomUser.objects.create_user("revalidating", password="pass-123"))
+        self.course = make_course("etag-course")
+        self.category = Category.objects.create(name="Etag Category")
+
+    def _revalidate(self, url):
+        # The first visit sets the CSRF cookie, which the validator covers
+        self.client.get(url)
+        etag = self.client.get(url)["ETag"]
+        return etag, self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_matching_etag_is_not_modified(self):
+        for url in (f"/course/{self.course.slug}/", f"/category/{self.category.slug}/"):
+            with self.subTest(url=url):
+                etag, response = self._revalidate(url)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response["ETag"], etag)
+
+    def test_course_save_changes_the_etag(self):
+        url = f"/course/{self.course.slug}/"
+        etag, _ = self._revalidate(url)
+        self.course.title = "Retitled Course"
+        self.course.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, "Retitled Course")
+        self.assertNotEqual(response["ETag"], etag)
+
+
+class AsyncConditionalPageTests(SimpleTestCase):
+    def setUp(self):
+        async def etag_func(request):
+            return "v1"
+
+        @async_conditional_page(etag_func)
+        async def view(request):
+            return HttpResponse("page")
+
+        self.view = async_to_sync(view)
+
+    def test_not_modified_keeps_etag_and_must_revalidate(self):
+        etag = self.view(RequestFactory().get("/"))["ETag"]
+        response = self.view(RequestFactory().get("/", headers={"if-none-match": etag}))
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertIn("no-cache", response["Cache-Control"])
+        self.assertIn("Cookie", response["Vary"])
+
+
+class TemplateTimerTests(SimpleTestCase):
+    def test_building_the_middleware_leaves_template_render_alone(self):
+        with mock.patch.object(Template, "render", "sentinel"):
+            MetricsMiddleware(lambda request: HttpResponse())
+            self.assertEqual(Template.render, "sentinel")
+
+    def test_timer_is_installed_once(self):
+        with mock.patch.object(Template, "render", Template.render):
+            install_template_timer()
+            timed = Template.render
+            install_template_timer()
+            self.assertIs(Template.render, timed)
+            self.assertIs(timed, _timed_template_render)
+
+
+class CatalogApiTests(TestCase):
+    """The /api/ endpoints answer with a fixed number of queries (see myapp/api.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Data")
+        cls.courses = [make_course(f"api-course-{index}", price="9.90") for index in range(5)]
+        for course in cls.courses:
+            detail = Course_detail.objects.create(course=course, short_description="Short", skills="SQL\nPython")
+            detail.categories.add(cls.category)
+        module = Module.objects.create(course=cls.courses[0], title="Basics")
+        Module.objects.create(course=cls.courses[0], title="No quiz yet")
+        Quiz.objects.create(module=module, title="Basics quiz")
+
+    def _get(self, path, queries, **params):
+        with self.assertNumQueries(queries):
+            response = self.client.get(path, params)
+        return response.status_code, response.json()
+
+    def test_course_list(self):
+        status, data = self._get("/api/courses/", 1)
+        self.assertEqual(status, 200)
+        self.assertEqual([course["slug"] for course in data["results"]], [c.slug for c in self.courses])
+        self.assertEqual(data["results"][0]["price"], "9.90")
+        self.assertIsNone(data["next"])
+
+    def test_course_list_by_category(self):
+        status, data = self._get("/api/courses/", 1, category=self.category.slug)
+        self.assertEqual(len(data["results"]), 5)
+        status, data = self._get("/api/courses/", 1, category="nope")
+        self.assertEqual(data["results"], [])
+
+    def test_cursor_paging_visits_every_course_once(self):
+        slugs, params = [], {"limit": 2}
+        while True:
+            status, data = self._get("/api/courses/", 1, **params)
+            self.assertEqual(status, 200)
+            slugs += [course["slug"] for course in data["results"]]
+            if data["next"] is None:
+                break
+            params = {"limit": 2, "cursor": data["next"].split("cursor=")[1]}
+        self.assertEqual(slugs, [course.slug for course in self.courses])
+
+    def test_fields_projection(self):
+        status, data = self._get("/api/courses/", 1, fields="slug,title")
+        self.assertEqual(set(data["results"][0]), {"slug", "title"})
+
+    def test_course_detail(self):
+        slug = self.courses[0].slug
+        status, data = self._get(f"/api/courses/{slug}/", 2)
+        self.assertEqual(data["skills"], ["SQL", "Python"])
+        self.assertEqual(data["categories"], [{"id": self.category.id, "name": "Data", "slug": "data"}])
+        # Without categories the second query is skipped
+        status, data = self._get(f"/api/courses/{slug}/", 1, fields="title,instructor")
+        self.assertEqual(set(data), {"title", "instructor"})
+
+    def test_course_outline(self):
+        status, data = self._get(f"/api/courses/{self.courses[0].slug}/outline/", 2)
+        self.assertEqual([module["title"] for module in data["modules"]], ["Basics", "No quiz yet"])
+        self.assertEqual([len(module["quizzes"]) for module in data["modules"]], [1, 0])
+
+    def test_categories_and_suggested(self):
+        status, data = self._get("/api/categories/", 1)
+        self.assertEqual([category["slug"] for category in data["results"]], ["data"])
+        SuggestedCourse.objects.create(course=self.courses[1])
+        status, data = self._get("/api/suggested/", 1)
+        self.assertEqual([item["slug"] for item in data["results"]], [self.courses[1].slug])
+
+    def test_invalid_parameters_are_400(self):
+        for params in ({"fields": "slug,nope"}, {"limit": "ten"}, {"cursor": "garbage"}):
+            with self.subTest(**params):
+                status, data = self._get("/api/courses/", 0, **params)
+                self.assertEqual(status, 400)
+                self.assertIn("error", data)
+
+    def test_unknown_course_is_404(self):
+        status, data = self._get("/api/courses/nope/", 1)
+        self.assertEqual(status, 404)
+        status, data = self._get("/api/courses/nope/outline/", 1)
+        self.assertEqual(status, 404)
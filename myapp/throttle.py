@@ -0,0 +1,145 @@
+# myapp/throttle.py
+"""
+Login throttling.
+
+Every login attempt runs a full PBKDF2 hash, so a burst of bad logins can
+keep every worker busy hashing. ``take_login_token`` is called before the
+form is validated and spends one token from two token buckets, one for the
+client IP and one for the username tried; when either is empty the attempt
+is rejected with 429 and ``Retry-After`` before any hashing happens. The
+buckets refill continuously at the rates in ``LOGIN_THROTTLE_RATES`` and a
+successful login refills the username's bucket.
+
+Buckets are ``LoginThrottleBucket`` rows, so every worker process sees the
+same counts. Each one is refilled, checked and spent by a single
+``INSERT ... ON CONFLICT DO UPDATE ... RETURNING`` statement: concurrent
+attempts are serialized by the database and a parallel burst cannot all
+read the same token count. Rows of buckets that have refilled completely
+are deleted now and then (``PURGE_PROBABILITY``).
+
+``hash_slot`` bounds how many logins hash at once in a process
+(``LOGIN_HASH_SLOTS``); the rest wait up to ``LOGIN_HASH_WAIT`` seconds and
+then get 503, leaving the other cores to catalog traffic.
+"""
+import hashlib
+import math
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+
+from .models import LoginThrottleBucket
+
+BUCKET_TABLE = LoginThrottleBucket._meta.db_table
+
+# bucket: (burst, attempts refilled per minute)
+DEFAULT_LOGIN_THROTTLE_RATES = {
+    "ip": (20, 10),
+    "username": (5, 2),
+}
+# Share of attempts that also delete the rows of full buckets
+PURGE_PROBABILITY = 0.001
+
+
+class Throttled(Exception):
+    def __init__(self, retry_after, status=429):
+        super().__init__(f"Retry after {retry_after} s")
+        self.retry_after = retry_after
+        self.status = status
+
+
+def client_ip(request):
+    # Behind a proxy, the proxy (or gunicorn's forwarded_allow_ips) must set REMOTE_ADDR
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def _username_key(username):
+    # Case variants of a name share a bucket; hashing bounds the key length
+    digest = hashlib.sha256(username.strip().casefold().encode()).hexdigest()[:32]
+    return f"username:{digest}"
+
+
+def _rates():
+    return getattr(settings, "LOGIN_THROTTLE_RATES", DEFAULT_LOGIN_THROTTLE_RATES)
+
+
+def _take(key, burst, per_minute, now):
+    """Spend a token from the bucket; returns (allowed, tokens left)."""
+    least = "LEAST" if connection.vendor == "postgresql" else "MIN"
+    # In DO UPDATE every expression sees the row as it was before the update
+    refilled = (
+        f"{least}(%s, {BUCKET_TABLE}.tokens "
+        f"+ (excluded.counted_at - {BUCKET_TABLE}.counted_at) * %s)"
+    )
+    per_second = per_minute / 60
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {BUCKET_TABLE} (key, tokens, counted_at, allowed) "
+            f"VALUES (%s, %s, %s, %s) "
+            f"ON CONFLICT (key) DO UPDATE SET "
+            f"tokens = CASE WHEN {refilled} >= 1 THEN {refilled} - 1 ELSE {refilled} END, "
+            f"counted_at = excluded.counted_at, "
+            f"allowed = {refilled} >= 1 "
+            f"RETURNING allowed, tokens",
+            [key, burst - 1, now, True, *[burst, per_second] * 4],
+        )
+        allowed, tokens = cursor.fetchone()
+    return bool(allowed), tokens
+
+
+# Plain DELETEs: a queryset delete would load the rows first to send post_delete
+def _delete(where, params):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {BUCKET_TABLE} WHERE {where}", params)
+
+
+def _purge(now):
+    # A bucket idle this long has refilled completely; a missing row reads as full
+    for kind, (burst, per_minute) in _rates().items():
+        idle = burst / (per_minute / 60)
+        _delete("key LIKE %s AND counted_at < %s", [f"{kind}:%", now - idle])
+
+
+def take_login_token(request, username):
+    """Spend a login attempt for the client and username, or raise Throttled."""
+    rates = _rates()
+    buckets = [(f"ip:{client_ip(request)}", *rates["ip"])]
+    if username.strip():
+        buckets.append((_username_key(username), *rates["username"]))
+    now = time.time()
+    if random.random() < PURGE_PROBABILITY:
+        _purge(now)
+    for key, burst, per_minute in buckets:
+        allowed, tokens = _take(key, burst, per_minute, now)
+        if not allowed:
+            # Later buckets are left alone: the attempt is not made
+            raise Throttled(math.ceil((1 - tokens) / (per_minute / 60)))
+
+
+def reset_login_throttle(username):
+    """A successful login refills the username's bucket (not the IP's)."""
+    _delete("key = %s", [_username_key(username)])
+
+
+_hash_slots = None
+_hash_slots_lock = threading.Lock()
+
+
+@contextmanager
+def hash_slot():
+    """Hold one of LOGIN_HASH_SLOTS while hashing a password, or raise Throttled (503)."""
+    global _hash_slots
+    if _hash_slots is None:
+        with _hash_slots_lock:
+            if _hash_slots is None:
+                _hash_slots = threading.BoundedSemaphore(getattr(settings, "LOGIN_HASH_SLOTS", 2))
+    wait = getattr(settings, "LOGIN_HASH_WAIT", 5)
+    if not _hash_slots.acquire(timeout=wait):
+        raise Throttled(math.ceil(wait), status=503)
+    try:
+        yield
+    finally:
+        _hash_slots.release()
@@ -1,6 +1,6 @@
 # myapp/urls.py
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     path('', views.home, name='home'),
@@ -14,6 +14,9 @@ urlpatterns = [
     # Category (public)
     path('category/<slug:slug>/', views.category_courses, name='category_courses'),
 
+    # Search (public)
+    path('search/', views.search, name='search'),
+
     # Courses
     path('course/<slug:slug>/', views.course_detail, name='course_detail'),
     path('course/<slug:slug>/enroll/', views.enroll_course, name='enroll_course'),
@@ -40,6 +43,17 @@ urlpatterns = [
     path('manage/categories/update/<int:pk>/', views.update_category, name='category_update'),
     path('manage/categories/delete/<int:pk>/', views.delete_category, name='category_delete'),
     path('manage/categories/<int:pk>/courses/', views.manage_category_courses, name='manage_category_courses'),
+    path('manage/categories/<int:pk>/courses/available/', views.available_category_courses, name='available_category_courses'),
     path('manage/categories/<int:pk>/courses/add/', views.add_course_to_category, name='add_course_to_category'),
     path('manage/categories/<int:pk>/courses/remove/<int:course_detail_id>/', views.remove_course_from_category, name='remove_course_from_category'),
+
+    # Management - Metrics (Prometheus)
+    path('manage/metrics/', views.metrics, name='metrics'),
+
+    # JSON catalog API (read-only)
+    path('api/courses/', api.courses_api, name='api_courses'),
+    path('api/courses/<slug:slug>/', api.course_detail_api, name='api_course_detail'),
+    path('api/courses/<slug:slug>/outline/', api.course_outline_api, name='api_course_outline'),
+    path('api/categories/', api.categories_api, name='api_categories'),
+    path('api/suggested/', api.suggested_api, name='api_suggested'),
 ]
\ No newline at end of file
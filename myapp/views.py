@@ -5,8 +5,33 @@ from django.contrib.auth.forms import AuthenticationForm
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
-from django.http import JsonResponse
-from django.core.paginator import Paginator
+from django.http import Http404, HttpResponse, JsonResponse
+from django.db.models import Count, Exists, OuterRef
+from django.template.loader import render_to_string
+
+from .cache import (
+    cached_page,
+    catalog_key,
+    get_catalog_version,
+    get_or_set_fragment,
+    get_or_set_many_fragments,
+)
+
+from .attempts import record_attempt
+from .conditional import (
+    catalog_etag,
+    conditional_page,
+    course_detail_etag,
+    detail_page_course,
+    home_etag,
+)
+from .course_state import get_course_state, invalidate_course_state
+from .enrollment import enroll, toggle_enrollment, unenroll, wishlist_course
+from .metrics import registry as metrics_registry, render_prometheus
+from .pagination import KeysetPaginator
+from .quiz import get_quiz_snapshot, grade_submission
+from .search import search_courses
+from .throttle import Throttled, hash_slot, reset_login_throttle, take_login_token
 
 #  only import the form you actually have
 from .forms import CustomUserCreationForm
@@ -17,39 +42,74 @@ from .models import (
     Course,
     Course_detail,
     Module,
-    Quiz,
     Enrollment,
-    Question,
-    Option,
     Wishlist,
     SuggestedCourse,
 )
 
 
 # -------- Home --------
-def home(request):
-    if not request.user.is_authenticated:
-        return redirect("login")
+def _render_course_cards(course_ids):
+    courses = Course.all_objects.filter(id__in=course_ids)
+    return {
+        course.id: render_to_string("fragments/course_card.html", {"course": course})
+        for course in courses
+    }
+
+
+def home_suggested_html(version):
+    """Suggested strip, rendered once per catalog version."""
+    return get_or_set_fragment(
+        catalog_key("home", "suggested", version=version),
+        lambda: render_to_string(
+            "fragments/suggested_strip.html",
+            {"suggested_courses": SuggestedCourse.objects.select_related("course")},
+        ),
+    )
 
-    # Get suggested courses
-    suggested_courses = SuggestedCourse.objects.select_related("course").all()
 
-    # Get regular courses (excludes suggested ones via VisibleCourseManager)
-    courses = Course.objects.all()
-    categories = Category.objects.all()
+def home_category_bar_html(version):
+    """Category bar, rendered once per catalog version."""
+    return get_or_set_fragment(
+        catalog_key("home", "categories", version=version),
+        lambda: render_to_string(
+            "fragments/category_bar.html", {"categories": Category.objects.all()}
+        ),
+    )
 
-    paginator = Paginator(courses, 9)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
 
+def home_course_page(version, page_number, cursor):
+    """(page, rendered course cards) of the regular courses (suggested ones excluded)."""
+    paginator = KeysetPaginator(Course.objects.all(), 9)
+    # Garbage cursors and page numbers share the key of the page they fall back to
+    page_obj = cached_page(
+        catalog_key("home", "page", paginator.page_key(page_number, cursor), version=version),
+        lambda: paginator.get_page(page_number, cursor),
+    )
+    course_cards = get_or_set_many_fragments(
+        {pk: catalog_key("card", pk, version=version) for pk in page_obj.object_list},
+        _render_course_cards,
+    )
+    return page_obj, course_cards
+
+
+@conditional_page(home_etag)
+def home(request):
+    if not request.user.is_authenticated:
+        return redirect("login")
+
+    version = get_catalog_version()
+    page_obj, course_cards = home_course_page(
+        version, request.GET.get("page"), request.GET.get("cursor")
+    )
     return render(
         request,
         "home.html",
         {
-            "courses": page_obj.object_list,
+            "course_cards": course_cards,
             "page_obj": page_obj,
-            "categories": categories,
-            "suggested_courses": suggested_courses,
+            "category_bar_html": home_category_bar_html(version),
+            "suggested_html": home_suggested_html(version),
         },
     )
 
@@ -69,8 +129,27 @@ def register_view(request):
 
 def login_view(request):
     if request.method == "POST":
+        username = request.POST.get("username", "")
         form = AuthenticationForm(request, data=request.POST)
-        if form.is_valid():
+        try:
+            # Rejected before the password is hashed
+            take_login_token(request, username)
+            with hash_slot():
+                valid = form.is_valid()
+        except Throttled as exc:
+            response = render(
+                request,
+                "login.html",
+                {
+                    "form": AuthenticationForm(initial={"username": username}),
+                    "error": f"Too many login attempts. Please try again in {exc.retry_after} seconds.",
+                },
+                status=exc.status,
+            )
+            response["Retry-After"] = exc.retry_after
+            return response
+        if valid:
+            reset_login_throttle(username)
             user = form.get_user()
             login(request, user)
             return redirect("home")
@@ -85,15 +164,60 @@ def logout_view(request):
 
 
 # -------- Category listing (public) --------
+# Categories with at most this many courses are filtered by their id list;
+# bigger ones walk the (created_at, id) index and probe the category per row.
+CATEGORY_ID_LIST_LIMIT = 2000
+
+
+# only load the columns the course card renders
+CATEGORY_CARD_FIELDS = (
+    "title", "slug", "description", "duration", "price", "image", "image_renditions", "created_at"
+)
+
+
+def category_course_ids(category):
+    """Bounded id fetch that category_course_queryset picks its plan from."""
+    return (
+        Course_detail.objects.filter(categories=category)
+        .values_list("course_id", flat=True)[: CATEGORY_ID_LIST_LIMIT + 1]
+    )
+
+
+def category_courses_by_ids(course_ids):
+    """Plan for small categories: the courses by primary key, sorted afterwards."""
+    return Course.all_objects.filter(id__in=course_ids).only(*CATEGORY_CARD_FIELDS)
+
+
+def category_courses_by_membership(category):
+    """Plan for big categories: walk the (created_at, id) index, probe the category per row."""
+    # Course_detail has M2M to Category via related_name="courses"
+    in_category = Course_detail.categories.through.objects.filter(
+        course_detail__course=OuterRef("pk"), category=category
+    )
+    return Course.all_objects.filter(Exists(in_category)).only(*CATEGORY_CARD_FIELDS)
+
+
+def category_course_queryset(category):
+    """
+    Courses in a category as a single queryset, ready for keyset pagination.
+
+    SQLite picks one join order for every category, which is wrong either for
+    small categories (scans the course index) or for big ones (sorts the whole
+    category in a temp B-tree), so choose the plan from a bounded id fetch.
+    """
+    course_ids = list(category_course_ids(category))
+    if len(course_ids) <= CATEGORY_ID_LIST_LIMIT:
+        return category_courses_by_ids(course_ids)
+    return category_courses_by_membership(category)
+
+
+@conditional_page(catalog_etag)
 def category_courses(request, slug):
     category = get_object_or_404(Category, slug=slug)
-    # Course_detail has M2M to Category via related_name="courses"
-    course_details = category.courses.select_related("course").all()
-    courses = [cd.course for cd in course_details]
+    courses = category_course_queryset(category)
 
-    paginator = Paginator(courses, 9)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    paginator = KeysetPaginator(courses, 9)
+    page_obj = paginator.get_page(request.GET.get("page"), request.GET.get("cursor"))
 
     return render(
         request,
@@ -106,27 +230,52 @@ def category_courses(request, slug):
     )
 
 
+# -------- Search (public) --------
+# Deeper result pages are not useful and a huge ?page= would overflow SQLite's OFFSET
+SEARCH_MAX_PAGE = 100
+
+
+def search(request):
+    query = request.GET.get("q", "").strip()
+    try:
+        page = max(int(request.GET.get("page", 1)), 1)
+    except ValueError:
+        page = 1
+    if page > SEARCH_MAX_PAGE:
+        raise Http404("No such search results page.")
+    per_page = 9
+
+    courses, has_next = search_courses(query, limit=per_page, offset=(page - 1) * per_page)
+    has_next = has_next and page < SEARCH_MAX_PAGE
+
+    return render(
+        request,
+        "search.html",
+        {
+            "query": query,
+            "courses": courses,
+            "page": page,
+            "has_next": has_next,
+        },
+    )
+
+
 # -------- Course Detail --------
+@conditional_page(course_detail_etag)
 def course_detail(request, slug):
-    course = get_object_or_404(Course.all_objects, slug=slug)
-    modules = course.modules.all()
-    enrolled = False
-    wishlisted = False
-
-    if request.user.is_authenticated:
-        enrolled = Enrollment.objects.filter(
-            user=request.user, course=course, is_active=True
-        ).exists()
-        wishlisted = Wishlist.objects.filter(user=request.user, course=course).exists()
+    # already loaded by course_detail_etag
+    course = detail_page_course(request, slug)
+    if course is None:
+        raise Http404("No Course matches the given query.")
+    state = get_course_state(request.user, course.id)
 
     return render(
         request,
         "course_detail.html",
         {
             "course": course,
-            "modules": modules,
-            "enrolled": enrolled,
-            "wishlisted": wishlisted,
+            "enrolled": state.enrolled,
+            "wishlisted": state.wishlisted,
         },
     )
 
@@ -134,7 +283,7 @@ def course_detail(request, slug):
 # -------- Module List / Quiz --------
 def module_list(request, course_slug):
     course = get_object_or_404(Course.all_objects, slug=course_slug)
-    modules = course.modules.all()
+    modules = course.modules.prefetch_related("quizzes")
     return render(
         request, "modules/module_test.html", {"course": course, "modules": modules}
     )
@@ -143,24 +292,19 @@ def module_list(request, course_slug):
 # -------- Enroll --------
 @login_required
 def enroll_course(request, slug):
-    course = get_object_or_404(Course.all_objects, slug=slug)
-    enrollment, created = Enrollment.objects.get_or_create(
-        user=request.user, course=course
-    )
-    if not created and not enrollment.is_active:
-        enrollment.is_active = True
-        enrollment.save()
-    return redirect("course_detail", slug=course.slug)
+    if enroll(request.user, slug) is None:
+        raise Http404("No Course matches the given query.")
+    invalidate_course_state(request.user)
+    return redirect("course_detail", slug=slug)
 
 
 @login_required
 def toggle_enrollment_status(request, course_slug):
-    enrollment = get_object_or_404(
-        Enrollment, user=request.user, course__slug=course_slug
-    )
-    enrollment.is_active = not enrollment.is_active
-    enrollment.save()
-    return JsonResponse({"status": "success", "is_active": enrollment.is_active})
+    is_active = toggle_enrollment(request.user, course_slug)
+    if is_active is None:
+        raise Http404("No Enrollment matches the given query.")
+    invalidate_course_state(request.user)
+    return JsonResponse({"status": "success", "is_active": is_active})
 
 
 @login_required
@@ -171,52 +315,30 @@ def my_courses(request):
 
 @login_required
 def unenroll_course(request, course_slug):
-    enrollment = get_object_or_404(
-        Enrollment, user=request.user, course__slug=course_slug
-    )
-    enrollment.is_active = False
-    enrollment.save()
+    if unenroll(request.user, course_slug) is None:
+        raise Http404("No Enrollment matches the given query.")
+    invalidate_course_state(request.user)
     return redirect("my_courses")
 
 
 # -------- Quiz --------
 def quiz_detail(request, quiz_id):
-    quiz = get_object_or_404(Quiz, id=quiz_id)
-    questions = quiz.questions.all()
+    # Questions, options and the answer key come from the compiled snapshot
+    quiz = get_quiz_snapshot(quiz_id)
+    if quiz is None:
+        raise Http404("No Quiz matches the given query.")
 
     if request.method == "POST":
-        total = questions.count()
-        correct = 0
-        user_answers = {}
-        unanswered = {}  # Track unanswered questions
-
-        for question in questions:
-            selected_option_id = request.POST.get(f"question_{question.id}")
-            if selected_option_id:
-                option = Option.objects.get(id=selected_option_id)
-                user_answers[question.id] = option.id
-                if option.is_correct:
-                    correct += 1
-            else:
-                user_answers[question.id] = None
-                unanswered[question.id] = True
-
-        score = int((correct / total) * 100) if total > 0 else 0
+        result = grade_submission(quiz, request.POST)
+        record_attempt(request.user, quiz, result)
         return render(
             request,
             "modules/quiz_result.html",
-            {
-                "quiz": quiz,
-                "total": total,
-                "correct": correct,
-                "score": score,
-                "user_answers": user_answers,
-                "unanswered": unanswered,
-            },
+            {"quiz": quiz, **result},
         )
 
     return render(
-        request, "modules/quiz_detail.html", {"quiz": quiz, "questions": questions}
+        request, "modules/quiz_detail.html", {"quiz": quiz, "questions": quiz.questions}
     )
 
 
@@ -227,8 +349,9 @@ from django.views.decorators.http import require_POST
 @login_required
 @require_POST
 def add_to_wishlist(request, slug):
-    course = get_object_or_404(Course.all_objects, slug=slug)
-    Wishlist.objects.get_or_create(user=request.user, course=course)
+    if wishlist_course(request.user, slug) is None:
+        raise Http404("No Course matches the given query.")
+    invalidate_course_state(request.user)
     # simple redirect flow (no JS)
     return redirect("course_detail", slug=slug)
 
@@ -244,6 +367,7 @@ def wishlist_page(request):
 def remove_from_wishlist(request, slug):
     course = get_object_or_404(Course.all_objects, slug=slug)
     Wishlist.objects.filter(user=request.user, course=course).delete()
+    invalidate_course_state(request.user)
     return redirect("wishlist_page")
 
 
@@ -252,8 +376,8 @@ def remove_from_wishlist(request, slug):
 def manage_suggested_courses(request):
     """View to list and manage suggested courses - Staff only"""
     suggested_courses = SuggestedCourse.objects.select_related("course").all()
-    # Get courses that are not yet suggested (using all_objects to bypass the manager)
-    available_courses = Course.all_objects.filter(suggestedcourse__isnull=True)
+    # Get courses that are not yet suggested
+    available_courses = Course.objects.all()
 
     return render(
         request,
@@ -301,7 +425,8 @@ def remove_suggested_course(request, suggestion_id):
 @staff_member_required
 def manage_categories(request):
     """View to list all categories - Staff only"""
-    categories = Category.objects.all()
+    # One query whatever the number of categories (the card shows the course count)
+    categories = Category.objects.annotate(course_count=Count("courses"))
     return render(
         request,
         "manage/categories/list.html",
@@ -377,6 +502,22 @@ def delete_category(request, pk):
     )
 
 
+def courses_available_for_category(category):
+    """Courses with details that are not in category yet (a single anti-join)."""
+    in_category = Course_detail.categories.through.objects.filter(
+        course_detail__course=OuterRef("pk"), category=category
+    )
+    return Course.all_objects.filter(details__isnull=False).filter(~Exists(in_category))
+
+
+def available_course_rows(category, query=""):
+    """The picker's {id, title} rows, by title; query narrows them to matching titles."""
+    courses = courses_available_for_category(category)
+    if query:
+        courses = courses.filter(title__icontains=query)
+    return courses.order_by("title", "id").values("id", "title")
+
+
 @staff_member_required
 def manage_category_courses(request, pk):
     """View to manage courses in a category - Staff only"""
@@ -384,29 +525,47 @@ def manage_category_courses(request, pk):
 
     # Get all course details that belong to this category
     category_course_details = category.courses.select_related("course").all()
-    category_course_ids = [cd.course.id for cd in category_course_details]
-
-    # Get all courses that are NOT in this category
-    all_courses = Course.all_objects.all()
-    available_courses = []
-
-    for course in all_courses:
-        # Check if course has details
-        if hasattr(course, "details"):
-            if course.id not in category_course_ids:
-                available_courses.append(course)
 
+    # Courses that can be added are loaded by the page through available_category_courses
     return render(
         request,
         "manage/categories/manage_courses.html",
         {
             "category": category,
             "category_courses": category_course_details,
-            "available_courses": available_courses,
         },
     )
 
 
+# As for search: a huge ?page= would overflow SQLite's OFFSET
+CATEGORY_PICKER_MAX_PAGE = 500
+
+
+@staff_member_required
+def available_category_courses(request, pk):
+    """JSON picker of courses that can be added to a category - Staff only"""
+    category = get_object_or_404(Category, pk=pk)
+    query = request.GET.get("q", "").strip()
+    try:
+        page = max(int(request.GET.get("page", 1)), 1)
+    except ValueError:
+        page = 1
+    if page > CATEGORY_PICKER_MAX_PAGE:
+        raise Http404("No such picker page.")
+    per_page = 20
+
+    start = (page - 1) * per_page
+    rows = list(available_course_rows(category, query)[start:start + per_page + 1])
+
+    return JsonResponse(
+        {
+            "results": rows[:per_page],
+            "page": page,
+            "has_next": len(rows) > per_page and page < CATEGORY_PICKER_MAX_PAGE,
+        }
+    )
+
+
 @staff_member_required
 @require_POST
 def add_course_to_category(request, pk):
@@ -447,3 +606,13 @@ def remove_course_from_category(request, pk, course_detail_id):
     )
 
     return redirect("manage_category_courses", pk=pk)
+
+
+# -------- Metrics --------
+@staff_member_required
+def metrics(request):
+    """Request metrics in Prometheus text format - Staff only"""
+    return HttpResponse(
+        render_prometheus(metrics_registry.collect()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )